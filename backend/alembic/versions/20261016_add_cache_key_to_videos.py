@@ -0,0 +1,29 @@
+"""add cache_key to videos
+
+Revision ID: add_cache_key_20261016
+Revises: add_thumbnail_20251123
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "add_cache_key_20261016"
+down_revision = "add_thumbnail_20251123"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "videos",
+        sa.Column("cache_key", sa.String(length=32), nullable=True),
+    )
+    op.create_index(op.f("ix_videos_cache_key"), "videos", ["cache_key"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_videos_cache_key"), table_name="videos")
+    op.drop_column("videos", "cache_key")
@@ -0,0 +1,29 @@
+"""add composite index on videos (user_id, created_at DESC)
+
+Revision ID: videos_user_created_20261016
+Revises: created_at_tz_20261016
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "videos_user_created_20261016"
+down_revision = "created_at_tz_20261016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_videos_user_created",
+        "videos",
+        ["user_id", "created_at"],
+        unique=False,
+        postgresql_ops={"created_at": "DESC"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_videos_user_created", table_name="videos")
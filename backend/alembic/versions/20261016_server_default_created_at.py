@@ -0,0 +1,45 @@
+"""server-side timezone-aware created_at on users and videos
+
+Revision ID: created_at_tz_20261016
+Revises: add_cache_key_20261016
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "created_at_tz_20261016"
+down_revision = "add_cache_key_20261016"
+branch_labels = None
+depends_on = None
+
+TABLES = ("users", "videos")
+
+
+def upgrade() -> None:
+    # Existing values were written with datetime.utcnow (naive UTC)
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "created_at",
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime(),
+            existing_nullable=False,
+            server_default=sa.func.now(),
+            postgresql_using="created_at AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(
+            table,
+            "created_at",
+            type_=sa.DateTime(),
+            existing_type=sa.DateTime(timezone=True),
+            existing_nullable=False,
+            server_default=None,
+            postgresql_using="created_at AT TIME ZONE 'UTC'",
+        )
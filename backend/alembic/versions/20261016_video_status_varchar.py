@@ -0,0 +1,43 @@
+"""store videos.status as varchar enum values
+
+Revision ID: video_status_varchar_20261016
+Revises: videos_user_created_20261016
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "video_status_varchar_20261016"
+down_revision = "videos_user_created_20261016"
+branch_labels = None
+depends_on = None
+
+STATUS_ENUM = sa.Enum("PROCESSING", "COMPLETED", "FAILED", name="videostatus")
+
+
+def upgrade() -> None:
+    # Native enum stored member names (PROCESSING); the model now stores values (processing)
+    op.alter_column(
+        "videos",
+        "status",
+        type_=sa.String(length=16),
+        existing_type=STATUS_ENUM,
+        existing_nullable=False,
+        postgresql_using="lower(status::text)",
+    )
+    STATUS_ENUM.drop(op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    STATUS_ENUM.create(op.get_bind(), checkfirst=True)
+    op.alter_column(
+        "videos",
+        "status",
+        type_=STATUS_ENUM,
+        existing_type=sa.String(length=16),
+        existing_nullable=False,
+        postgresql_using="upper(status)::videostatus",
+    )
@@ -208,7 +208,7 @@ def node_analisar(state: CortAIState) -> CortAIState:
     agent = AnalystAgent()
 
     # Decide se usa chunking baseado no tamanho da transcrição
-    use_chunking = should_use_chunking(texto_transcricao, threshold_chars=20000)
+    use_chunking = should_use_chunking(texto_transcricao, threshold_tokens=5000)
 
     if use_chunking:
         print(f"  Transcrição longa detectada ({len(texto_transcricao)} chars)")
@@ -7,20 +7,16 @@ Detecta automaticamente o tipo de conteúdo e roteia para o worker apropriado.
 import os # Importa o módulo os
 import sys # Importa o módulo sys
 import logging # Importa o módulo logging
-import uuid # Importa o módulo uuid
-import re # Importa o módulo re
+import secrets # Importa o módulo secrets
 
 # Importa o módulo messaging_rabbit
-from src.services.messaging_rabbit import (
-    new_job,
-    publish,
-    TRANSCRIBE_QUEUE,
-    COLLECT_QUEUE,
-    declare_infraestructure,
-)
+from src.services.messaging_rabbit import ensure_infraestructure
+
+# Submissão de jobs (Redis + fila)
+from src.services.job_submission import submit_video_job, submit_stream_job
 
-# Importa o módulo initialize_job
-from src.services.state_manager import initialize_job
+# Importa o classificador de URLs compartilhado
+from src.utils.url_classifier import classify
 
 # Configuração do logging
 logging.basicConfig(
@@ -43,22 +39,7 @@ def detect_content_type(url: str) -> str:
         'youtube' para URLs do YouTube (requer confirmação do usuário)
         'video' para vídeos gravados de outras plataformas
     """
-    url_lower = url.lower()
-    
-    # Detecta streams HLS
-    if '.m3u8' in url_lower or 'manifest' in url_lower:
-        return 'stream'
-    
-    # Detecta YouTube (pode ser live ou vídeo gravado)
-    if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-        return 'youtube'
-    
-    # Detecta Twitch (stream)
-    if 'twitch.tv' in url_lower:
-        return 'stream'
-    
-    # Por padrão, trata como vídeo gravado
-    return 'video'
+    return classify(url)
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
@@ -184,18 +165,8 @@ def process_video(url: str, job_id: str):
     print("   4. Geração de highlights")
     print("="*70)
     
-    # Inicializa o job no Redis
-    initialize_job(job_id, url)
-    
-    # Cria e publica a mensagem
-    msg = new_job(
-        step="transcribe",
-        job_id=job_id,
-        payload={"url": url}
-    )
-    
-    # Publica na fila de transcrição
-    publish(TRANSCRIBE_QUEUE, msg)
+    # Inicializa o job no Redis e publica na fila de transcrição
+    submit_video_job(url, job_id)
     
     print()
     print("✅ Job publicado com sucesso!")
@@ -237,22 +208,8 @@ def process_stream(url: str, job_id: str, params: dict):
     print("   4. Geração de highlights")
     print("="*70)
     
-    # Inicializa o job no Redis
-    initialize_job(job_id, url)
-    
-    # Cria e publica a mensagem
-    msg = new_job(
-        step="collect",
-        job_id=job_id,
-        payload={
-            "stream_url": url,
-            "segment_duration": params['segment_duration'],
-            "max_duration": params['max_duration']
-        }
-    )
-    
-    # Publica na fila de coleta
-    publish(COLLECT_QUEUE, msg)
+    # Inicializa o job no Redis e publica na fila de coleta
+    submit_stream_job(url, job_id, params['segment_duration'], params['max_duration'])
     
     print()
     print("✅ Job publicado com sucesso!")
@@ -288,7 +245,7 @@ def main():
     
     # Inicializa infraestrutura
     log.info("Inicializando infraestrutura de filas...")
-    declare_infraestructure()
+    ensure_infraestructure()
     log.info("Infraestrutura pronta!\n")
     sys.stdout.flush()
     
@@ -308,7 +265,7 @@ def main():
         content_type = ask_youtube_type()
     
     # Gera job_id único
-    job_id = uuid.uuid4().hex[:12]
+    job_id = secrets.token_hex(6)
     
     # Processa baseado no tipo
     if content_type == 'stream':
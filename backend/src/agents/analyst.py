@@ -1,15 +1,21 @@
 import os # Interage com o Sistema Operacional
 import json # Manipulação de arquivos JSON
+import orjson # Escrita rápida dos arquivos JSON
 import logging # Registro de logs
 import shutil # Copia e move arquivos
 import uuid # Geração de identificadores únicos
+import hashlib # Chave do cache de embeddings
 from typing import List, Optional, Dict, Any # Tipagem estática
 from dotenv import load_dotenv # Carrega variáveis de ambiente
 import google.generativeai as genai # Importa o modelo de linguagem do Google (Gemini)
 from pydantic import BaseModel, ValidationError #
 import time # Controle de tempo
+import threading # Protege o limitador de taxa compartilhado
 import chromadb # Banco de Dados Vetorial
 from chromadb.utils import embedding_functions # Função de embedding
+from src.utils.codec import load_artifact # Lê transcrições em JSON ou MessagePack
+from src.utils import safe_api # Chamada ao Gemini com tratamento de erros e cache (resolvida a cada chamada)
+from src.services.result_cache import get_cached_many, set_cached_many # Cache de embeddings no Redis
 
 # Configuração de logs
 logging.basicConfig(level=logging.INFO)
@@ -38,53 +44,115 @@ class Highlight(BaseModel):
 
 # -----------------------------------------------------------------------------------------------------------------
 
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) compartilhado pelas threads do processo.
+    `rate` tokens por segundo, acumulando no máximo `capacity` (capacity=1 = chamadas espaçadas).
+    """
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        """
+        Bloqueia até haver `tokens` disponíveis e os consome.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        # Dorme fora do lock: o saldo negativo já reserva a vez das próximas chamadas
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Requisições por minuto à API de embedding (plano gratuito: 15 RPM; 13 deixa margem)
+EMBEDDING_RPM = float(os.getenv("GEMINI_EMBEDDING_RPM", "13"))
+
+# Textos por requisição (limite do batch do embed_content)
+EMBEDDING_BATCH_SIZE = 100
+
+# Um único bucket por processo: vários AnalystAgent respeitam o mesmo limite
+_embedding_bucket = TokenBucket(rate=EMBEDDING_RPM / 60)
+
+# Tempo de vida dos embeddings em cache (o mesmo texto no mesmo modelo gera o mesmo vetor)
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
 class RateLimitedGeminiEmbeddingFunction(embedding_functions.EmbeddingFunction):
     """
     Função de embedding customizada para o Gemini com Rate Limiting.
     O plano gratuito permite apenas 15 RPM (Requisições Por Minuto).
-    Esta classe garante um intervalo seguro entre as chamadas.
+    Os textos vão em lotes (uma requisição por lote) e cada requisição
+    consome um token do bucket do processo. Embeddings já calculados vêm do
+    cache no Redis (chave: hash do modelo + texto) e não gastam requisição.
     """
     def __init__(self, api_key: str, model_name: str = "models/text-embedding-004"):
         self.api_key = api_key
         self.model_name = model_name
         genai.configure(api_key=api_key)
 
+    def _cache_key(self, text: str) -> str:
+        """
+        Chave de cache de um texto: hash (blake2b) do nome do modelo + texto.
+        """
+        return hashlib.blake2b(f"{self.model_name}|{text}".encode("utf-8"), digest_size=16).hexdigest()
+
     def __call__(self, input: List[str]) -> List[List[float]]:
-        embeddings = []
-        total = len(input)
-        
+        # Substitui textos vazios por placeholder para evitar erro da API
+        texts = []
         for i, text in enumerate(input):
-            logger.info(f"Gerando embedding {i+1}/{total}...")
+            if not isinstance(text, str) or not text.strip():
+                logger.warning(f"Input de embedding vazio no índice {i}. Usando placeholder.")
+                text = "[no_text]"
+            texts.append(text)
+
+        # Busca todos no cache de uma vez; só os ausentes vão para a API
+        keys = [self._cache_key(text) for text in texts]
+        embeddings = get_cached_many("embedding", keys)
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if len(missing) < len(texts):
+            logger.info(f"{len(texts) - len(missing)}/{len(texts)} embeddings obtidos do cache")
+
+        total = len(missing)
+
+        for start in range(0, total, EMBEDDING_BATCH_SIZE):
+            indices = missing[start:start + EMBEDDING_BATCH_SIZE]
+            batch = [texts[i] for i in indices]
+            logger.info(f"Gerando embeddings {start + 1}-{start + len(batch)}/{total}...")
             retry_count = 0
-            
+
             while True:
                 try:
-                    # Substitui textos vazios por placeholder para evitar erro da API
-                    if not isinstance(text, str) or not text.strip():
-                        logger.warning(f"Input de embedding vazio no índice {i}. Usando placeholder.")
-                        text_to_embed = "[no_text]"
-                    else:
-                        text_to_embed = text
-
-                    # Delay preventivo de 4.5s (garante ~13 RPM, abaixo do limite de 15)
-                    # O primeiro também espera para garantir intervalo com requisições anteriores
-                    time.sleep(4.5)
+                    _embedding_bucket.acquire()
 
                     result = genai.embed_content(
                         model=self.model_name,
-                        content=text_to_embed,
+                        content=batch,
                         task_type="retrieval_document"
                     )
-                    embeddings.append(result['embedding'])
+                    for i, emb in zip(indices, result['embedding']):
+                        embeddings[i] = emb
+                    # Grava o lote inteiro no cache em um único round-trip (pipeline)
+                    set_cached_many(
+                        "embedding",
+                        {keys[i]: embeddings[i] for i in indices},
+                        ttl=EMBEDDING_CACHE_TTL
+                    )
                     break
-                    
+
                 except Exception as e:
                     error_msg = str(e)
                     if "429" in error_msg or "ResourceExhausted" in error_msg:
                         if retry_count >= 3:
                             logger.error("Máximo de tentativas (3) excedido para rate limit.")
                             raise e
-                            
+
                         wait_time = 60 # Espera 1 minuto se tomar 429
                         logger.warning(f"Rate limit (429) atingido. Aguardando {wait_time}s... (Tentativa {retry_count+1}/3)")
                         time.sleep(wait_time)
@@ -92,7 +160,7 @@ class RateLimitedGeminiEmbeddingFunction(embedding_functions.EmbeddingFunction):
                     else:
                         logger.error(f"Erro não tratado no embedding: {e}")
                         raise e
-                        
+
         return embeddings
 
 # -----------------------------------------------------------------------------------------------------------------
@@ -271,8 +339,7 @@ class AnalystAgent:
         logger.info(f"Iniciando análise RAG para arquivo: {transcription_path}")
 
         # Carregar Transcrição
-        with open(transcription_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_artifact(transcription_path)
 
         # Chunking
         chunks = self._chunk_transcription(data)
@@ -296,30 +363,38 @@ class AnalystAgent:
         retrieved_docs = set()
         context_chunks = []
 
-        for query in queries:
-            try:
-                results = collection.query(
-                    query_texts=[query],
-                    n_results=2 # Pega os top 2 de cada categoria
-                )
-            except Exception as e:
-                logger.warning(f"Erro na query do ChromaDB para '{query}': {e}")
-                continue
+        # Todas as consultas em uma única chamada (um embedding em lote e uma busca)
+        try:
+            results = collection.query(
+                query_texts=queries,
+                n_results=2 # Pega os top 2 de cada categoria
+            )
+        except Exception as e:
+            logger.warning(f"Erro na query do ChromaDB: {e}")
+            results = None
 
-            # Valida estrutura retornada para evitar IndexError
-            docs_outer = results.get('documents') if isinstance(results, dict) else None
-            ids_outer = results.get('ids') if isinstance(results, dict) else None
-            metas_outer = results.get('metadatas') if isinstance(results, dict) else None
+        # Valida estrutura retornada para evitar IndexError
+        docs_all = results.get('documents') if isinstance(results, dict) else None
+        ids_all = results.get('ids') if isinstance(results, dict) else None
+        metas_all = results.get('metadatas') if isinstance(results, dict) else None
 
-            if not docs_outer or not isinstance(docs_outer, list) or not docs_outer[0]:
+        for q, query in enumerate(queries):
+            try:
+                docs_outer = docs_all[q]
+                ids_outer = ids_all[q]
+                metas_outer = metas_all[q]
+            except Exception:
+                docs_outer = None
+
+            if not docs_outer or not isinstance(docs_outer, list):
                 logger.debug(f"Nenhum documento recuperado para a query: '{query}'")
                 continue
 
             # Adiciona os chunks mais relevantes ao contexto (com proteção contra índices inválidos)
-            for i, doc in enumerate(docs_outer[0]):
+            for i, doc in enumerate(docs_outer):
                 try:
-                    doc_id = ids_outer[0][i]
-                    meta = metas_outer[0][i]
+                    doc_id = ids_outer[i]
+                    meta = metas_outer[i]
                 except Exception:
                     logger.debug(f"Ignorando resultado inconsistente na query '{query}' index {i}")
                     continue
@@ -371,8 +446,10 @@ class AnalystAgent:
                 """
 
         try:
-            response = self.model.generate_content(prompt) # Geração com LLM
-            result_json = json.loads(response.text) # Resultado da geração
+            text, error = safe_api.safe_llm_call(self.model, prompt) # Geração com LLM (com cache)
+            if text is None:
+                raise RuntimeError(error)
+            result_json = json.loads(text) # Resultado da geração
 
             # Validação Pydantic
             validated = AnalystOutput(**result_json)
@@ -427,11 +504,7 @@ def executar_agente_analista(input_json: str, output_json: str) -> Dict:
     Instancia a classe AnalystAgent e executa o fluxo.
     """
 
-    # Carrega o arquivo de transcrição
-    with open(input_json, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    # Instancia o agente
+    # Instancia o agente (a transcrição é carregada em agent.run)
     agent = AnalystAgent()
     
     # Executa o agente
@@ -446,8 +519,8 @@ def executar_agente_analista(input_json: str, output_json: str) -> Dict:
             logger.warning(f"Não foi possível criar diretório de saída {output_dir}: {e}")
 
     # Salva o resultado no disco (como o worker espera)
-    with open(output_json, "w", encoding="utf-8") as f:
-        json.dump(resultado, f, ensure_ascii=False, indent=4)
+    with open(output_json, "wb") as f:
+        f.write(orjson.dumps(resultado, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     
     # Retorna o resultado
     return resultado
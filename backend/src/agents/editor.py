@@ -1,6 +1,13 @@
 import os # Interage com Sistema Operacional
 import subprocess # Executa outros programas/comandos do SO
-import json # Faz a leitura/escrita em objetos do tipo JSON
+import orjson # Leitura rápida do JSON de highlights
+import logging # Registro de logs
+from src.utils.transcript_clip import build_clipped_transcriptions # Recorte da transcrição por highlight (legendas)
+
+log = logging.getLogger("editor")
+
+# Separador dos blocos de log (alocado uma vez)
+_BANNER = "-" * 50
 
 # Duração mínima de fallback (segundos) quando um highlight tem fim <= início
 DEFAULT_FALLBACK_SECONDS = 5
@@ -78,8 +85,8 @@ def cortar_video_ffmpeg(input_video, inicio, fim, output_video="data/highlight.m
         output_video
     ])
 
-    # Exibe o comando que será executado para debugging transparente
-    print(f"Executando FFmpeg: {comando}")
+    # Registra o comando que será executado para debugging transparente
+    log.debug("Executando FFmpeg: %s", comando)
 
     # Executa o comando FFmpeg e captura stdout/stderr
     resultado = subprocess.run(
@@ -91,25 +98,38 @@ def cortar_video_ffmpeg(input_video, inicio, fim, output_video="data/highlight.m
     # Verifica se o FFmpeg executou com sucesso (returncode 0 = sucesso)
     if resultado.returncode != 0:
         # Exibe a saída de erro do FFmpeg para diagnóstico
-        print("Saída do FFmpeg:", resultado.stderr)
+        log.error("Saída do FFmpeg: %s", resultado.stderr)
         raise RuntimeError("Erro ao cortar vídeo com FFmpeg.")
 
      # Confirmação de sucesso na geração do highlight
-    print(f"Highlight gerado: {output_video}")
+    log.info("Highlight gerado: %s", output_video)
 
     # Remoção do vídeo original (para limpeza de arquivos)
     if remover_original:
         try:
             os.remove(input_video)
-            print(f"Vídeo original removido: {input_video}")
+            log.info("Vídeo original removido: %s", input_video)
         except Exception as e:
-            print(f"Aviso: não foi possível remover {input_video}: {e}")
+            log.warning("Não foi possível remover %s: %s", input_video, e)
 
     # Retorna o caminho do arquivo gerado para uso em pipelines
     return output_video
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
+# Chaves aceitas para início/fim de um highlight único, em ordem de prioridade
+_START_KEYS = ("start", "highlight_inicio_segundos", "inicio")
+_END_KEYS = ("end", "highlight_fim_segundos", "fim")
+
+
+def _first_key(dados, keys):
+    """Valor da primeira chave presente em `dados` (None se nenhuma existir)."""
+    for key in keys:
+        if key in dados:
+            return dados[key]
+    return None
+
+
 def _normalize_highlights(dados):
     """Normaliza diferentes formatos de highlight para uma lista uniforme.
 
@@ -119,29 +139,87 @@ def _normalize_highlights(dados):
     - dict único com chaves start/end ou highlight_inicio_segundos/highlight_fim_segundos
     """
 
-    if isinstance(dados, dict) and "highlights" in dados:
-        return dados["highlights"]
-
     if isinstance(dados, list):
         return dados
 
-    if isinstance(dados, dict):
-        start = dados.get("start", dados.get("highlight_inicio_segundos", dados.get("inicio")))
-        end = dados.get("end", dados.get("highlight_fim_segundos", dados.get("fim")))
+    if not isinstance(dados, dict):
+        raise ValueError("ERRO: Formato do JSON inválido. Esperado lista ou chave 'highlights'.")
+
+    if "highlights" in dados:
+        return dados["highlights"]
+
+    start = _first_key(dados, _START_KEYS)
+    end = _first_key(dados, _END_KEYS)
+
+    # Garante que start/end existam
+    if start is None or end is None:
+        raise ValueError("ERRO: JSON de highlight não contém campos de início/fim válidos")
+
+    return [{
+        "start": float(start),
+        "end": float(end),
+        "summary": dados.get("summary") or dados.get("resumo") or dados.get("resposta_bruta", ""),
+        "score": dados.get("score") or dados.get("pontuacao", 0),
+    }]
+
+
+def cortar_videos_ffmpeg_lote(input_video, cortes):
+    """
+    Gera vários cortes do mesmo vídeo em uma única execução do FFmpeg.
+
+    Cada corte abre o vídeo como uma entrada própria com -ss/-t antes do -i (seek
+    rápido, como em cortar_video_ffmpeg): só o trecho do highlight é decodificado.
+    O ganho é um único processo FFmpeg para todos os highlights.
+
+    Args:
+        input_video (str) - Caminho para o vídeo original a ser cortado
+        cortes (list[tuple[float, float, str]]) - Lista de (inicio, fim, output_video)
+
+    Returns:
+        list[str] - Caminhos dos arquivos gerados, na mesma ordem de `cortes`
+
+    Raises:
+        FileNotFoundError - Se o vídeo de entrada não for encontrado
+        ValueError - Se algum corte tiver duração inválida
+        RuntimeError - Se o FFmpeg falhar durante o processamento
+    """
+
+    if not os.path.exists(input_video):
+        raise FileNotFoundError(f"ERRO: Vídeo de entrada não encontrado: {input_video}")
+
+    comando = ["ffmpeg", "-y"]
+
+    # Uma entrada por corte, com seek rápido (-ss/-t antes do -i)
+    for inicio, fim, _ in cortes:
+        duracao = fim - inicio
+        if duracao <= 0:
+            raise ValueError("ERRO: O valor de fim deve ser maior que o início.")
+        comando.extend(["-ss", str(inicio), "-t", str(duracao), "-i", input_video])
 
-        # Garante que start/end existam
-        if start is None or end is None:
-            raise ValueError("ERRO: JSON de highlight não contém campos de início/fim válidos")
+    # Saída N lê apenas da entrada N; opções antes de cada arquivo valem só para ele
+    for n, (_, _, output_video) in enumerate(cortes):
+        os.makedirs(os.path.dirname(output_video), exist_ok=True)
+        comando.extend([
+            "-map", f"{n}:v:0", "-map", f"{n}:a:0?",
+            "-c:v", "libx264",
+            "-preset", "veryfast",
+            "-crf", "23",
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            output_video,
+        ])
 
-        return [{
-            "start": float(start),
-            "end": float(end),
-            "summary": dados.get("summary") or dados.get("resumo") or dados.get("resposta_bruta", ""),
-            "score": dados.get("score") or dados.get("pontuacao", 0),
-        }]
+    log.debug("Executando FFmpeg (lote de %d cortes): %s", len(cortes), comando)
+
+    resultado = subprocess.run(comando, capture_output=True, text=True)
+
+    if resultado.returncode != 0:
+        log.error("Saída do FFmpeg: %s", resultado.stderr)
+        raise RuntimeError("Erro ao cortar vídeo com FFmpeg.")
 
-    raise ValueError("ERRO: Formato do JSON inválido. Esperado lista ou chave 'highlights'.")
+    return [output_video for _, _, output_video in cortes]
 
+# --------------------------------------------------------------------------------------------------------------------------------------
 
 def executar_agente_editor(
     highlight_json="data/highlight.json",
@@ -150,6 +228,7 @@ def executar_agente_editor(
     output_video=None,
     transcription_path=None,
     include_subtitles=True,
+    highlight=None,
 ):
     """
     Orquestra o processo completo de edição: lê os highlights do JSON e gera múltiplos clips.
@@ -164,6 +243,7 @@ def executar_agente_editor(
         output_video (str | None) - Caminho explícito para o output quando há apenas 1 highlight (compatibilidade)
         transcription_path (str | None) - Caminho para o arquivo de transcrição (necessário para legendas)
         include_subtitles (bool) - Se True, adiciona legendas burned-in nos clips (default: True)
+        highlight (dict | list | None) - Highlights já carregados em memória; se informado, `highlight_json` não é lido
 
     Returns:
         list[str] ou str - Lista com os caminhos de todos os clips gerados
@@ -174,13 +254,17 @@ def executar_agente_editor(
         ValueError - Se os campos necessários não estiverem no JSON ou forem inválidos
     """
 
-    # Valida se o arquivo JSON com os timestamps existe
-    if not os.path.exists(highlight_json):
-        raise FileNotFoundError(f"Arquivo não encontrado: {highlight_json}")
+    if highlight is not None:
+        # Highlights recebidos diretamente (ex.: estado do grafo), sem passar pelo disco
+        dados = highlight
+    else:
+        # Valida se o arquivo JSON com os timestamps existe
+        if not os.path.exists(highlight_json):
+            raise FileNotFoundError(f"Arquivo não encontrado: {highlight_json}")
 
-    # Carrega e parseia o arquivo JSON com os dados dos highlights
-    with open(highlight_json, "r", encoding="utf-8") as f:
-        dados = json.load(f)
+        # Carrega e parseia o arquivo JSON com os dados dos highlights
+        with open(highlight_json, "rb") as f:
+            dados = orjson.loads(f.read())
 
     # Extrai a lista de highlights
     # Suporta tanto o novo formato {"highlights": [...]} quanto formato direto [...]
@@ -196,14 +280,14 @@ def executar_agente_editor(
     if single_output_path:
         os.makedirs(os.path.dirname(single_output_path), exist_ok=True)
 
-    print("")
-    print("-"*50)
-    print(f"Processando {len(highlights)} highlight(s)...")
-    print("-"*50)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("\n%s\nProcessando %d highlight(s)...\n%s", _BANNER, len(highlights), _BANNER)
 
     generated_clips = []
+    sem_legenda = []  # (idx, inicio, fim, output_path) dos clips cortados em lote
 
-    # Processa cada highlight individualmente
+    # Valida os timestamps e define a saída de cada highlight
+    clips = []  # (idx, inicio, fim, output_path, output_filename)
     for idx, highlight in enumerate(highlights, 1):
         try:
             # Extrai timestamps (suporta ambos os formatos)
@@ -216,7 +300,10 @@ def executar_agente_editor(
                 # Aplica fallback seguro: define fim = inicio + DEFAULT_FALLBACK_SECONDS
                 old_inicio, old_fim = inicio, fim
                 fim = inicio + DEFAULT_FALLBACK_SECONDS
-                print(f"  [AVISO] Highlight {idx} com timestamps inválidos ({old_inicio}s >= {old_fim}s). Aplicando fallback: fim={fim}s (+{DEFAULT_FALLBACK_SECONDS}s).")
+                log.warning(
+                    "Highlight %d com timestamps inválidos (%ss >= %ss). Aplicando fallback: fim=%ss (+%ss).",
+                    idx, old_inicio, old_fim, fim, DEFAULT_FALLBACK_SECONDS,
+                )
 
             # Gera nome do arquivo de saída
             duracao = fim - inicio
@@ -224,36 +311,50 @@ def executar_agente_editor(
             output_filename = f"clip_{idx:02d}_inicio_{int(inicio)}s_duracao_{int(duracao)}s{suffix}.mp4"
             output_path = single_output_path or os.path.join(output_dir, output_filename)
 
-            print(f"\n  Highlight {idx}/{len(highlights)}:")
-            print(f"    Início: {inicio:.1f}s | Fim: {fim:.1f}s | Duração: {duracao:.1f}s")
-            if score:
-                print(f"    Score: {score}")
-            if summary:
-                print(f"    Resumo: {summary[:80]}{'...' if len(summary) > 80 else ''}")
+            log.info(
+                "Highlight %d/%d: Início: %.1fs | Fim: %.1fs | Duração: %.1fs | Score: %s | Resumo: %.80s",
+                idx, len(highlights), inicio, fim, duracao, score, summary,
+            )
+            clips.append((idx, inicio, fim, output_path, output_filename))
+
+        except Exception as e:
+            log.error("Falha ao processar highlight %d: %s", idx, e)
+            continue
 
+    # Recorta a transcrição para todos os highlights de uma vez (uma leitura + busca binária por janela)
+    clipped_transcriptions = [None] * len(clips)
+    if include_subtitles and transcription_path and os.path.exists(transcription_path):
+        try:
+            clipped_transcriptions = build_clipped_transcriptions(
+                transcription_path,
+                [{"start": inicio, "end": fim} for _, inicio, fim, _, _ in clips]
+            )
+        except Exception as e:
+            log.warning("Não foi possível recortar a transcrição para as legendas: %s", e)
+
+    # Processa cada highlight individualmente
+    for (idx, inicio, fim, output_path, output_filename), clipped_transcription in zip(clips, clipped_transcriptions):
+        try:
             # Gera legendas temporárias se necessário
             subtitle_file = None
-            if include_subtitles and transcription_path and os.path.exists(transcription_path):
+            if clipped_transcription is not None:
                 try:
                     from src.agents.screenwriter import make_srt
-                    from src.core.graph import build_clipped_transcription
-
-                    # Cria transcrição ajustada para este clip
-                    clipped_transcription = build_clipped_transcription(
-                        transcription_path,
-                        start=inicio,
-                        end=fim
-                    )
 
                     # Gera arquivo SRT temporário
                     temp_srt_path = os.path.join(output_dir, f"temp_clip_{idx:02d}.srt")
                     make_srt(clipped_transcription, temp_srt_path)
                     subtitle_file = temp_srt_path
-                    print(f"    ℹ Legendas geradas: {os.path.basename(temp_srt_path)}")
+                    log.debug("Legendas geradas: %s", temp_srt_path)
                 except Exception as e:
-                    print(f"    [AVISO] Não foi possível gerar legendas: {e}")
+                    log.warning("Não foi possível gerar legendas: %s", e)
+
+            # Clips sem legenda são cortados juntos em uma única chamada ao FFmpeg
+            if not subtitle_file:
+                sem_legenda.append((idx, inicio, fim, output_path))
+                continue
 
-            # Corta o vídeo (com ou sem legendas)
+            # Corta o vídeo com legendas (filtro específico por clip)
             clip_path = cortar_video_ffmpeg(
                 input_video=input_video,
                 inicio=inicio,
@@ -270,22 +371,42 @@ def executar_agente_editor(
                 except Exception:
                     pass
 
-            generated_clips.append(clip_path)
+            generated_clips.append((idx, clip_path))
             status_msg = "COM legendas" if include_subtitles else "SEM legendas"
-            print(f"    ✓ Clip gerado {status_msg}: {output_filename}")
+            log.info("Clip gerado %s: %s", status_msg, output_filename)
 
         except Exception as e:
-            print(f"  [ERRO] Falha ao processar highlight {idx}: {str(e)}")
+            log.error("Falha ao processar highlight %d: %s", idx, e)
             continue
 
-    print("")
-    print("-"*50)
-    print(f"✓ Edição concluída: {len(generated_clips)}/{len(highlights)} clips gerados")
-    print("-"*50)
+    if sem_legenda:
+        try:
+            paths = cortar_videos_ffmpeg_lote(input_video, [corte[1:] for corte in sem_legenda])
+            generated_clips.extend(zip((corte[0] for corte in sem_legenda), paths))
+            log.info("%d clip(s) gerado(s) SEM legendas em lote", len(sem_legenda))
+        except Exception as e:
+            # Se o lote falhar, tenta cada corte isoladamente para não perder os demais
+            log.warning("Corte em lote falhou (%s); cortando clips individualmente.", e)
+            for idx, inicio, fim, output_path in sem_legenda:
+                try:
+                    generated_clips.append((idx, cortar_video_ffmpeg(
+                        input_video=input_video,
+                        inicio=inicio,
+                        fim=fim,
+                        output_video=output_path,
+                        remover_original=False,
+                    )))
+                except Exception as e:
+                    log.error("Falha ao cortar %s: %s", os.path.basename(output_path), e)
+
+    log.info("Edição concluída: %d/%d clips gerados", len(generated_clips), len(highlights))
 
     if not generated_clips:
         raise RuntimeError("ERRO: Nenhum clip foi gerado com sucesso")
 
+    # Mantém a ordem original dos highlights (clips em lote são gerados por último)
+    generated_clips = [path for _, path in sorted(generated_clips)]
+
     # Retorna lista de caminhos (ou único caminho para compatibilidade)
     if len(generated_clips) == 1:
         return generated_clips[0]
@@ -301,5 +422,5 @@ if __name__ == "__main__":
     # Exibe o resultado final para confirmação visual
     print("")
     print(f"Pipeline de edição concluído: {caminho_highlight}")
-    print("-"*50)
+    print(_BANNER)
 
@@ -1,10 +1,14 @@
 import os # Interage com o Sistema Operacional
-import json # Usada para salvar o dicionário da transcrição em formato JSON
-from typing import Dict, Any, Optional # Usada para tipar as funções
+import json # Usada para gravar os segments em NDJSON
+import threading # Protege o carregamento do modelo quando chamado por várias threads
+from typing import Callable, Dict, Any, Optional # Usada para tipar as funções
 from faster_whisper import WhisperModel  # faster-whisper (4-5x mais rápido)
+from src.utils.codec import artifact_suffix, dump_artifact # Formato dos artefatos entre workers (JSON/MessagePack)
+from src.utils.transcript_clip import segments_ndjson_path # NDJSON de segments lido pelos recortes de legenda
 
 # Variável global para armazenar o modelo carregado (Singleton)
 _whisper_model = None
+_whisper_model_lock = threading.Lock()
 
 def get_model():
     """
@@ -12,19 +16,27 @@ def get_model():
     Usa faster-whisper para performance 4-5x melhor em CPU.
     """
     global _whisper_model
-    if _whisper_model is None:
-        print("Carregando modelo faster-whisper (base)... isso pode demorar um pouco.")
-        # faster-whisper usa device="cpu" ou "cuda"
-        # compute_type: "int8" para CPU (mais rápido), "float16" para GPU
-        device = "cpu"  # AMD GPU (ROCm) não é suportado diretamente, usando CPU otimizado
-        compute_type = "int8"  # Quantização para CPU (4x mais rápido com pouca perda)
+    if _whisper_model is not None:
+        return _whisper_model
 
+    with _whisper_model_lock:
+        if _whisper_model is not None:
+            return _whisper_model
+
+        # Modelo, dispositivo e quantização vêm do .env (WHISPER_MODEL/WHISPER_DEVICE/WHISPER_COMPUTE_TYPE).
+        # O decoder do CTranslate2 já reaproveita o cache K/V entre tokens; compute_type define
+        # a quantização dos pesos: "int8" para CPU (padrão), "float16"/"int8_float16" para GPU
+        model_name = os.getenv("WHISPER_MODEL", "base")
+        device = os.getenv("WHISPER_DEVICE", "cpu")  # AMD GPU (ROCm) não é suportado diretamente, usando CPU otimizado
+        compute_type = os.getenv("WHISPER_COMPUTE_TYPE") or ("float16" if device == "cuda" else "int8")
+
+        print(f"Carregando modelo faster-whisper ({model_name})... isso pode demorar um pouco.")
         print(f"Usando dispositivo: {device} com compute_type: {compute_type}")
         print("ℹ️ faster-whisper é 4-5x mais rápido que openai-whisper em CPU!")
 
         # Cria modelo com otimizações
         _whisper_model = WhisperModel(
-            "base",  # Modelo base (boa qualidade/velocidade)
+            model_name,
             device=device,
             compute_type=compute_type,
             num_workers=4,  # Usa 4 threads para CPU
@@ -34,6 +46,64 @@ def get_model():
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
+def _coletar_segments(segments, info, output_json_path: Optional[str] = None,
+                      on_progress: Optional[Callable[[float], None]] = None):
+    """
+    Consome o gerador de segments do faster-whisper à medida que o áudio é decodificado.
+
+    Cada segment é gravado imediatamente no NDJSON (arquivo parcial, renomeado
+    por `finalizar_segments_ndjson`) e o progresso (0..1) é reportado em passos de 5%.
+
+    Returns:
+        tuple[list, str] - Lista de segments e texto completo
+    """
+    segments_list = []
+    full_text = []
+    duration = getattr(info, "duration", None) or 0
+    last_step = -1
+
+    ndjson = None
+    if output_json_path:
+        os.makedirs(os.path.dirname(output_json_path) or ".", exist_ok=True)
+        ndjson = open(segments_ndjson_path(output_json_path) + ".partial", "w", encoding="utf-8")
+
+    try:
+        for segment in segments:
+            full_text.append(segment.text)
+            seg = {
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text.strip()
+            }
+            segments_list.append(seg)
+
+            # Linhas começam por "start"/"end" para o filtro de intervalo do grafo
+            if ndjson:
+                ndjson.write(json.dumps(seg, ensure_ascii=False))
+                ndjson.write("\n")
+
+            if on_progress and duration:
+                step = int(min(segment.end / duration, 1.0) * 20)
+                if step != last_step:
+                    last_step = step
+                    on_progress(step / 20)
+    finally:
+        if ndjson:
+            ndjson.close()
+
+    return segments_list, " ".join(full_text).strip()
+
+
+def finalizar_segments_ndjson(output_json_path: str) -> None:
+    """Publica o NDJSON parcial depois que o JSON da transcrição foi salvo."""
+    partial = segments_ndjson_path(output_json_path) + ".partial"
+    if os.path.exists(partial):
+        os.replace(partial, segments_ndjson_path(output_json_path))
+        # os.replace preserva o mtime do parcial; leitores comparam com o mtime do JSON
+        os.utime(segments_ndjson_path(output_json_path))
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
 def executar_transcricao_segmento(segment_path: str) -> Optional[Dict[str, Any]]:
     """
     Agente Transcritor adaptado para processar um único segmento de áudio/vídeo usando Whisper.
@@ -84,12 +154,11 @@ def executar_transcricao_segmento(segment_path: str) -> Optional[Dict[str, Any]]
         
         print(f"Texto transcrito ({len(text)} chars): {text[:100]}...") 
         
-        # Salva a transcrição em um arquivo JSON temporário para persistência
-        output_json_path = segment_path.replace(".mp4", ".json")
+        # Salva a transcrição para a etapa de análise (JSON ou MessagePack, ver CORTAI_ARTIFACT_FORMAT)
+        output_json_path = segment_path.replace(".mp4", artifact_suffix())
         
-        # Salva o dicionário em um arquivo JSON
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            json.dump(transcricao_result, f, indent=4, ensure_ascii=False)
+        # Salva o dicionário no arquivo
+        dump_artifact(transcricao_result, output_json_path)
             
         print(f"Transcrição concluída e salva em: {output_json_path}")
         
@@ -107,7 +176,8 @@ def executar_transcricao_segmento(segment_path: str) -> Optional[Dict[str, Any]]
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def transcricao_youtube_video(url: str, temp_video_path: str, model_size: str = "base", output_json_path: str = None) -> Optional[Dict[str, Any]]:
+def transcricao_youtube_video(url: str, temp_video_path: str, model_size: str = "base", output_json_path: str = None,
+                              on_progress: Optional[Callable[[float], None]] = None) -> Optional[Dict[str, Any]]:
     """
     Baixa um vídeo do YouTube e realiza a transcrição usando Whisper.
     Esta função é usada pelo transcriber_worker.py para processar vídeos completos do YouTube.
@@ -117,6 +187,7 @@ def transcricao_youtube_video(url: str, temp_video_path: str, model_size: str =
         temp_video_path (str): Caminho onde o vídeo será salvo temporariamente
         model_size (str): Tamanho do modelo Whisper (tiny, base, small, medium, large)
         output_json_path (str): Caminho onde a transcrição será salva em JSON
+        on_progress (callable): Recebe a fração transcrita (0..1) durante a transcrição
         
     Returns:
         Optional[Dict[str, Any]]: Dicionário com a transcrição e metadados, ou None em caso de falha
@@ -165,19 +236,8 @@ def transcricao_youtube_video(url: str, temp_video_path: str, model_size: str =
             vad_parameters=dict(min_silence_duration_ms=500)
         )
 
-        # Converte generator para lista e extrai dados
-        segments_list = []
-        full_text = []
-
-        for segment in segments:
-            full_text.append(segment.text)
-            segments_list.append({
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text.strip()
-            })
-
-        text = " ".join(full_text).strip()
+        # Consome o generator conforme a transcrição avança
+        segments_list, text = _coletar_segments(segments, info, output_json_path, on_progress)
 
         # Cria o dicionário de resultado (compatível com formato antigo)
         transcricao_result = {
@@ -194,8 +254,8 @@ def transcricao_youtube_video(url: str, temp_video_path: str, model_size: str =
         # Salva em JSON se o caminho foi fornecido
         if output_json_path:
             os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
-            with open(output_json_path, "w", encoding="utf-8") as f:
-                json.dump(transcricao_result, f, indent=4, ensure_ascii=False)
+            dump_artifact(transcricao_result, output_json_path)  # Serializa tudo (orjson) e grava de uma vez
+            finalizar_segments_ndjson(output_json_path)
             print(f"Transcrição salva em: {output_json_path}")
 
         return transcricao_result
@@ -208,7 +268,8 @@ def transcricao_youtube_video(url: str, temp_video_path: str, model_size: str =
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def transcrever_video_local(video_path: str, output_json_path: str, model_size: str = "base") -> Optional[Dict[str, Any]]:
+def transcrever_video_local(video_path: str, output_json_path: str, model_size: str = "base",
+                            on_progress: Optional[Callable[[float], None]] = None) -> Optional[Dict[str, Any]]:
     """
     Transcreve um arquivo de vídeo local com Whisper (sem download).
 
@@ -216,6 +277,7 @@ def transcrever_video_local(video_path: str, output_json_path: str, model_size:
         video_path (str): Caminho do arquivo de vídeo já disponível localmente
         output_json_path (str): Caminho onde a transcrição será salva
         model_size (str): Tamanho do modelo Whisper
+        on_progress (callable): Recebe a fração transcrita (0..1) durante a transcrição
     """
 
     if not os.path.exists(video_path):
@@ -235,19 +297,8 @@ def transcrever_video_local(video_path: str, output_json_path: str, model_size:
             vad_parameters=dict(min_silence_duration_ms=500)
         )
 
-        # Converte segments para formato compatível
-        segments_list = []
-        full_text = []
-
-        for segment in segments:
-            full_text.append(segment.text)
-            segments_list.append({
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text.strip()
-            })
-
-        text = " ".join(full_text).strip()
+        # Consome o generator conforme a transcrição avança
+        segments_list, text = _coletar_segments(segments, info, output_json_path, on_progress)
 
         transcricao_result = {
             "text": text,
@@ -262,8 +313,8 @@ def transcrever_video_local(video_path: str, output_json_path: str, model_size:
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
 
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            json.dump(transcricao_result, f, indent=4, ensure_ascii=False)
+        dump_artifact(transcricao_result, output_json_path)  # Serializa tudo (orjson) e grava de uma vez
+        finalizar_segments_ndjson(output_json_path)
 
         print(f"Transcrição concluída e salva em: {output_json_path}")
         return transcricao_result
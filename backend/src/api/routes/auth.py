@@ -3,6 +3,7 @@ Authentication routes for user registration, login, and profile
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import timedelta
@@ -10,7 +11,7 @@ from datetime import timedelta
 from src.database import get_db
 from src.models.user import User
 from src.schemas.auth import UserCreate, Token, UserResponse
-from src.utils.security import verify_password, get_password_hash, create_access_token
+from src.utils.security import verify_password, get_password_hash, password_needs_rehash, create_access_token
 from src.api.dependencies.auth import get_current_active_user
 from src.core.config import ACCESS_TOKEN_EXPIRE_MINUTES
 
@@ -48,7 +49,7 @@ async def register(
     # Create new user
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await run_in_threadpool(get_password_hash, user_data.password),
         name=user_data.name
     )
 
@@ -101,14 +102,19 @@ async def login(
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
 
-    # Verify user exists and password is correct
-    if not user or not verify_password(password, user.hashed_password):
+    # Verify user exists and password is correct (hashing runs off the event loop)
+    if not user or not await run_in_threadpool(verify_password, password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Upgrade hashes made with an older scheme/cost now that we know the password
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await run_in_threadpool(get_password_hash, password)
+        await db.commit()
+
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -6,6 +6,7 @@ from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from celery.result import AsyncResult
@@ -56,7 +57,9 @@ async def process_video(
     stream_segment_duration = request.stream_segment_duration or 60
     stream_max_duration = request.stream_max_duration or 300
 
-    task = process_video_task.delay(
+    # Publishing to the broker is blocking I/O; keep it off the event loop
+    task = await run_in_threadpool(
+        process_video_task.delay,
         request.url,
         video.id,
         max_highlights,
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init
 import os
 
 # Configurações do Redis (usando env vars ou default localhost)
@@ -23,3 +24,14 @@ celery_app.conf.update(
 # Importa as tasks para garantir que sejam registradas
 from src.core import tasks  # noqa
 
+
+@worker_process_init.connect
+def _warm_graph(**kwargs):
+    """
+    Toca o grafo compilado em cada processo filho logo após o fork, para que o
+    estado preguiçoso do LangGraph seja materializado antes da primeira task.
+    """
+    from src.core.graph import app as graph_app
+
+    graph_app.get_graph()
+
@@ -17,6 +17,7 @@ from src.core.progress import update_progress
 
 # Importa configurações centralizadas
 from src.core.config import DATA_DIR
+from src.utils.url_classifier import is_stream_url
 
 # Importa funções de chunking
 from src.utils.chunking import should_use_chunking
@@ -25,19 +26,10 @@ from src.utils.chunking import should_use_chunking
 from langgraph.graph import StateGraph, END
 
 # Importa tipos para tipagem estática
-STREAM_PREFIXES = ("rtmp://", "rtsp://")
-STREAM_SUFFIXES = (".m3u8",)
 
 
 def should_collect_stream(url: str) -> bool:
-    lu = url.lower()
-    if lu.startswith(STREAM_PREFIXES):
-        return True
-    if lu.endswith(STREAM_SUFFIXES):
-        return True
-    if "live" in lu and ("youtube.com/" in lu or "twitch.tv" in lu or "facebook.com" in lu):
-        return True
-    return False
+    return is_stream_url(url)
 
 
 def concat_segments_ffmpeg(segment_paths: list[str], output_path: str) -> str:
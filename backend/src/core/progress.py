@@ -1,6 +1,8 @@
 """
 Progress tracking helper for video processing
 """
+from sqlalchemy import update
+
 from src.database import get_sync_db
 from src.models.video import Video
 
@@ -20,17 +22,17 @@ def update_progress(
         percentage: Progress percentage (0-100)
         message: Descriptive message for the current operation
     """
-    db_gen = get_sync_db()
-    db_session = next(db_gen)
     try:
-        video = db_session.query(Video).filter(Video.id == video_id).first()
-        if video:
-            video.progress_stage = stage
-            video.progress_percentage = percentage
-            video.progress_message = message
-            db_session.commit()
+        with get_sync_db() as db_session:
+            db_session.execute(
+                update(Video)
+                .where(Video.id == video_id)
+                .values(
+                    progress_stage=stage,
+                    progress_percentage=percentage,
+                    progress_message=message,
+                )
+                .execution_options(synchronize_session=False)
+            )
     except Exception as e:
         print(f"Error updating progress for video {video_id}: {e}")
-        db_session.rollback()
-    finally:
-        db_session.close()
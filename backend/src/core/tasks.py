@@ -1,10 +1,29 @@
+from sqlalchemy import select
+
 from .celery_app import celery_app
-from src.core.graph import app as graph_app
+from src.core.graph import app as graph_app, should_collect_stream
 from src.database import get_sync_db
 from src.models.video import Video, VideoStatus
-import time
+import asyncio
+import hashlib
+import json
+import os
 import re
 
+
+def compute_cache_key(url: str, max_highlights: int, include_subtitles: bool, subtitle_style: str) -> str:
+    """
+    Chave determinística do resultado de um processamento (mesma URL + mesmos parâmetros).
+    """
+    raw = f"{url}|{max_highlights}|{include_subtitles}|{subtitle_style}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+async def _run_graph(graph, initial_state: dict) -> dict:
+    """Executa o grafo no runner assíncrono do LangGraph."""
+    return await graph.ainvoke(initial_state)
+
+
 @celery_app.task(bind=True)
 def process_video_task(
     self,
@@ -16,6 +35,7 @@ def process_video_task(
     use_stream_collector: bool = False,
     stream_segment_duration: int = 60,
     stream_max_duration: int = 300,
+    force: bool = False,
 ):
     """
     Task do Celery que executa o pipeline completo do LangGraph.
@@ -29,52 +49,112 @@ def process_video_task(
         use_stream_collector: Força pipeline de captura de stream (FFmpeg + yt-dlp) para lives
         stream_segment_duration: Duração de cada segmento ao capturar live (segundos)
         stream_max_duration: Duração total da captura da live (segundos)
+        force: Se True, ignora resultados anteriores com os mesmos parâmetros e reprocessa
     """
-    try:
-        # Atualiza estado inicial
-        self.update_state(state='PROCESSING', meta={'status': 'Iniciando processamento...'})
+    return _run_pipeline(
+        self,
+        url,
+        video_id,
+        max_highlights=max_highlights,
+        include_subtitles=include_subtitles,
+        subtitle_style=subtitle_style,
+        use_stream_collector=use_stream_collector,
+        stream_segment_duration=stream_segment_duration,
+        stream_max_duration=stream_max_duration,
+        force=force,
+    )
 
-        print(f"Iniciando processamento para video_id={video_id}, url={url}, max_highlights={max_highlights}")
 
-        # Atualiza vídeo no banco
-        with next(get_sync_db()) as db:
-            video = db.query(Video).filter(Video.id == video_id).first()
-            if video:
-                video.progress_stage = "Iniciando"
-                video.progress_percentage = 10
-                video.progress_message = "Preparando processamento..."
-                db.commit()
+def _run_pipeline(
+    task,
+    url: str,
+    video_id: int,
+    *,
+    graph=graph_app,
+    max_highlights: int = 5,
+    include_subtitles: bool = True,
+    subtitle_style: str = "youtube",
+    use_stream_collector: bool = False,
+    stream_segment_duration: int = 60,
+    stream_max_duration: int = 300,
+    force: bool = False,
+):
+    """
+    Implementação única do processamento de um vídeo.
 
-        # Estado inicial para o grafo
-        initial_state = {
-            "url": url,
-            "max_highlights": max_highlights,
-            "video_id": video_id,
-            "include_subtitles": include_subtitles,
-            "subtitle_style": subtitle_style,
-            "use_stream_collector": use_stream_collector,
-            "stream_segment_duration": stream_segment_duration,
-            "stream_max_duration": stream_max_duration,
-        }
-
-        # Executa o grafo
-        result = graph_app.invoke(initial_state)
-
-        # Verifica erro no estado final
-        if result.get("error"):
-            # Atualiza vídeo como falha
-            with next(get_sync_db()) as db:
-                video = db.query(Video).filter(Video.id == video_id).first()
-                if video:
-                    video.status = VideoStatus.FAILED
-                    video.progress_message = f"Erro: {result['error']}"
+    Qualquer task que precise rodar o pipeline deve chamar esta função,
+    passando outro grafo compilado em `graph` se necessário.
+    """
+    # Lives mudam a cada captura, então só vídeos gravados podem reaproveitar resultados
+    cache_key = None
+    if not (use_stream_collector or should_collect_stream(url)):
+        cache_key = compute_cache_key(url, max_highlights, include_subtitles, subtitle_style)
+
+    # Uma única sessão para toda a task: o vídeo é lido uma vez e só há commit
+    # nos estados terminais (COMPLETED/FAILED). O progresso intermediário é
+    # reportado pelos nós do grafo (update_progress) e pelo próprio Celery.
+    with get_sync_db() as db:
+        video = db.get(Video, video_id)
+        # Encerra a transação de leitura para não segurar conexão durante o grafo
+        db.commit()
+
+        try:
+            # Atualiza estado inicial
+            task.update_state(state='PROCESSING', meta={'status': 'Iniciando processamento...'})
+
+            print(f"Iniciando processamento para video_id={video_id}, url={url}, max_highlights={max_highlights}")
+
+            # Reaproveita um processamento já concluído com os mesmos parâmetros
+            if cache_key and not force and video:
+                existing = db.scalars(
+                    select(Video).where(
+                        Video.cache_key == cache_key,
+                        Video.status == VideoStatus.COMPLETED,
+                        Video.id != video_id,
+                    )
+                ).first()
+                if existing:
+                    video.status = VideoStatus.COMPLETED
+                    video.progress_stage = "Concluído"
+                    video.progress_percentage = 100
+                    video.progress_message = "Processamento finalizado!"
+                    video.output_path = existing.output_path
+                    video.thumbnail_path = existing.thumbnail_path
+                    video.title = video.title or existing.title
+                    video.cache_key = cache_key
                     db.commit()
-            raise Exception(result["error"])
+                    print(f"Reaproveitando resultado do video_id={existing.id} para video_id={video_id}")
+                    return {
+                        "status": "completed",
+                        "video_id": video_id,
+                        "video_path": existing.output_path,
+                    }
+                db.commit()
+
+            # Estado inicial para o grafo
+            initial_state = {
+                "url": url,
+                "max_highlights": max_highlights,
+                "video_id": video_id,
+                "include_subtitles": include_subtitles,
+                "subtitle_style": subtitle_style,
+                "use_stream_collector": use_stream_collector,
+                "stream_segment_duration": stream_segment_duration,
+                "stream_max_duration": stream_max_duration,
+            }
 
-        # Atualiza vídeo como completo
-        with next(get_sync_db()) as db:
-            video = db.query(Video).filter(Video.id == video_id).first()
+            # Executa o grafo
+            result = asyncio.run(_run_graph(graph, initial_state))
+
+            # Verifica erro no estado final (o except abaixo marca o vídeo como falha)
+            if result.get("error"):
+                raise Exception(result["error"])
+
+            # Atualiza vídeo como completo
             if video:
+                # Recarrega para não sobrescrever o progresso gravado pelos nós do grafo
+                db.refresh(video)
+
                 # Deriva título a partir do primeiro highlight se não houver
                 title = video.title
                 highlight_data = result.get("highlight") or {}
@@ -107,7 +187,6 @@ def process_video_task(
                     # fallback: tenta ler do arquivo highlight.json salvo
                     try:
                         if not title and video.output_path:
-                            import os, json
                             # o highlight json fica paralelo ao temp_video em data/highlight.json no grafo simples
                             path_json = "backend/data/highlight.json"
                             if os.path.exists(path_json):
@@ -150,31 +229,31 @@ def process_video_task(
                 video.progress_percentage = 100
                 video.progress_message = "Processamento finalizado!"
                 video.output_path = result.get("highlight_path", "")
+                video.cache_key = cache_key
                 if title:
                     video.title = title
                 if thumb:
                     video.thumbnail_path = thumb
                 db.commit()
 
-        return {
-            "status": "completed",
-            "video_id": video_id,
-            "video_path": result.get("highlight_path"),
-        }
+            return {
+                "status": "completed",
+                "video_id": video_id,
+                "video_path": result.get("highlight_path"),
+            }
 
-    except Exception as e:
-        print(f"Erro no processamento do video_id={video_id}: {str(e)}")
+        except Exception as e:
+            print(f"Erro no processamento do video_id={video_id}: {str(e)}")
 
-        # Marca vídeo como falha
-        try:
-            with next(get_sync_db()) as db:
-                video = db.query(Video).filter(Video.id == video_id).first()
+            # Marca vídeo como falha
+            try:
+                db.rollback()
                 if video:
                     video.status = VideoStatus.FAILED
                     video.progress_message = f"Erro: {str(e)}"
                     db.commit()
-        except:
-            pass
+            except:
+                pass
 
-        # Relança para o Celery marcar como falha
-        raise e
+            # Relança para o Celery marcar como falha
+            raise e
@@ -1,6 +1,8 @@
 """
 Database configuration with async SQLAlchemy
 """
+import os
+from contextlib import contextmanager
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker, Session
@@ -10,6 +12,9 @@ from src.core.config import DATABASE_URL
 class Base(DeclarativeBase):
     pass
 
+# SQL logging is opt-in (SQL_ECHO=1); every echoed statement goes through logging
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
 # Lazy engine creation
 _engine = None
 _async_session_maker = None
@@ -20,7 +25,8 @@ def get_engine():
     if _engine is None:
         _engine = create_async_engine(
             DATABASE_URL,
-            echo=True,  # Log SQL queries (set to False in production)
+            echo=SQL_ECHO,
+            echo_pool=False,
             future=True
         )
     return _engine
@@ -64,7 +70,8 @@ def get_sync_engine():
         sync_url = DATABASE_URL.replace("+asyncpg", "").replace("postgresql://", "postgresql+psycopg2://")
         _sync_engine = create_engine(
             sync_url,
-            echo=True,
+            echo=SQL_ECHO,
+            echo_pool=False,
             future=True
         )
     return _sync_engine
@@ -82,10 +89,13 @@ def get_sync_session_maker():
         )
     return _sync_session_maker
 
+@contextmanager
 def get_sync_db():
     """
     Context manager for sync database session (for Celery tasks)
     Usage: with get_sync_db() as db: ...
+
+    Commits on normal exit, rolls back on exception and always closes.
     """
     session_maker = get_sync_session_maker()
     session = session_maker()
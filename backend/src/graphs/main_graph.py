@@ -1,8 +1,22 @@
 # Importa os agentes especializados para cada etapa do processo
+import asyncio
+import logging
 import os
 import subprocess
+import tempfile
+import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+try:
+    import av  # PyAV (já instalado como dependência do faster-whisper)
+except ImportError:  # Sem PyAV: concat via ffmpeg em subprocess
+    av = None
+
+try:
+    import ijson  # Parse incremental de JSON (backend C yajl2 quando disponível)
+except ImportError:  # Sem ijson: json.load do arquivo inteiro
+    ijson = None
 
 from src.agents.transcriber import transcricao_youtube_video, transcrever_video_local
 from src.agents.analyst import executar_agente_analista
@@ -10,6 +24,11 @@ from src.agents.editor import executar_agente_editor, _normalize_highlights
 from src.agents.collector_streams import executar_agente_coletor
 from src.agents.screenwriter import make_srt, make_vtt, choose_thumbnail
 from src.core.progress import update_progress
+from src.utils.url_classifier import is_stream_url
+from src.services.crewai_client import plan_job_async
+from src.services.result_cache import file_digest, get_cached, set_cached
+from src.services.whisper_pool import transcribe_async
+from src.utils.transcript_clip import build_clipped_transcription
 
 # Importa a estrutura principal do grafo (StateGraph) e o marcador de fim de fluxo (END)
 from langgraph.graph import StateGraph, END 
@@ -17,76 +36,212 @@ from langgraph.graph import StateGraph, END
 # Importa tipos para tipagem estática 
 from typing import TypedDict, Optional 
 
-# Necessário para salvar o arquivo de cortes
+# Necessário para ler/salvar os arquivos de transcrição e de cortes
 import json 
+import orjson
+
+# JSON indentado com 4 espaços (stdlib) só para depuração manual dos arquivos gerados
+JSON_PRETTY = os.getenv("CORTAI_JSON_PRETTY", "0") == "1"
+
+
+log = logging.getLogger("graphs.main")
+
+# Caminhos de trabalho do grafo, calculados uma única vez (str() só na chamada aos agentes)
+DATA_DIR = Path("backend/data")
+TEMP_VIDEO = DATA_DIR / "temp_video.mp4"
+TEMP_TRANSCRIPTION = DATA_DIR / "transcricao_temp.json"
+CLIPS_DIR = DATA_DIR / "clips"
+STREAM_SEGMENTS_DIR = DATA_DIR / "stream_segments"
+JOBS_DIR = DATA_DIR / "jobs"
+
+# Arquivo de highlights compartilhado entre analista, planner e editor
+HIGHLIGHT_JSON_PATH = str(DATA_DIR / "highlight.json")
 
-STREAM_PREFIXES = ("rtmp://", "rtsp://")
-STREAM_SUFFIXES = (".m3u8",)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+# Grava highlight.json mesmo quando os highlights já trafegam pelo estado (depuração)
+DEBUG_HIGHLIGHTS = bool(os.getenv("CORTAI_DEBUG_HIGHLIGHTS"))
+
+# Diretórios já criados neste processo (evita os.makedirs repetido)
+_CREATED_DIRS = set()
+
+# Intervalo mínimo entre atualizações de progresso do ffmpeg (segundos)
+PROGRESS_THROTTLE_SECONDS = 0.5
 
 
 def should_collect_stream(url: str) -> bool:
-    lu = url.lower()
-    if lu.startswith(STREAM_PREFIXES):
-        return True
-    if lu.endswith(STREAM_SUFFIXES):
-        return True
-    if "live" in lu and ("youtube.com/" in lu or "twitch.tv" in lu or "facebook.com" in lu):
-        return True
-    return False
+    return is_stream_url(url)
 
 
-def concat_segments_ffmpeg(segment_paths: List[str], output_path: str) -> str:
+def _add_output_stream(container, template):
+    # PyAV >= 13 expõe add_stream_from_template; versões antigas aceitam template=
+    if hasattr(container, "add_stream_from_template"):
+        return container.add_stream_from_template(template)
+    return container.add_stream(template=template)
+
+
+def _concat_segments_pyav(segment_paths: List[str], output_path: str) -> str:
     """
-    Concatena segmentos em um único mp4 usando ffmpeg concat demuxer.
+    Concatena segmentos em processo com PyAV, copiando pacotes sem reencode.
+    Levanta ValueError se os segmentos não tiverem os mesmos codecs.
     """
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with av.open(segment_paths[0]) as first:
+        codecs = [(st.type, st.codec_context.name) for st in first.streams if st.type in ("video", "audio")]
+
+    with av.open(output_path, mode="w") as out:
+        out_streams = None
+        offset = 0.0  # Duração acumulada (segundos) dos segmentos já copiados
+        for seg in segment_paths:
+            with av.open(seg) as inp:
+                in_streams = [st for st in inp.streams if st.type in ("video", "audio")]
+                if [(st.type, st.codec_context.name) for st in in_streams] != codecs:
+                    raise ValueError(f"Codecs diferentes no segmento {seg}")
+                if out_streams is None:
+                    out_streams = [_add_output_stream(out, st) for st in in_streams]
+
+                position = {st.index: i for i, st in enumerate(in_streams)}
+                base = {}
+                seg_duration = 0.0
+                for pkt in inp.demux(*in_streams):
+                    if pkt.dts is None:
+                        continue
+                    i = position[pkt.stream.index]
+                    tb = pkt.time_base
+                    # Rebaseia timestamps: cada segmento começa onde o anterior terminou
+                    first_dts = base.setdefault(i, pkt.dts)
+                    shift = int(round(offset / tb)) - first_dts
+                    pkt.dts += shift
+                    if pkt.pts is not None:
+                        pkt.pts += shift
+                    seg_duration = max(seg_duration, float((pkt.dts - shift - first_dts + (pkt.duration or 0)) * tb))
+                    pkt.stream = out_streams[i]
+                    out.mux(pkt)
+                offset += seg_duration
+    return output_path
+
+
+def _concat_segments_subprocess(segment_paths: List[str], output_path: str, video_id: Optional[int] = None) -> str:
     list_file = output_path + ".concat.txt"
     with open(list_file, "w", encoding="utf-8") as f:
         for p in segment_paths:
             f.write(f"file '{p}'\n")
-    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", output_path]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print("Saída do ffmpeg concat:", result.stderr)
+    cmd = [
+        "ffmpeg", "-y", "-threads", "0",
+        "-f", "concat", "-safe", "0", "-i", list_file,
+        "-c", "copy", "-fflags", "+genpts", "-avoid_negative_ts", "make_zero",
+        "-progress", "pipe:1", "-nostats",
+        output_path,
+    ]
+    # Lê o progresso do ffmpeg linha a linha em vez de bufferizar toda a saída
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    log_lines = []
+    last_report = 0.0
+    for line in proc.stdout:
+        if line.startswith("out_time_ms="):
+            now = time.monotonic()
+            if video_id and now - last_report >= PROGRESS_THROTTLE_SECONDS:
+                last_report = now
+                try:
+                    seconds = int(line.split("=", 1)[1]) / 1_000_000
+                except ValueError:
+                    continue
+                update_progress(video_id, "transcribing", 10, f"Concatenando segmentos... {seconds:.0f}s")
+        elif "=" not in line:
+            log_lines.append(line)
+    if proc.wait() != 0:
+        log.error("Saída do ffmpeg concat: %s", "".join(log_lines[-50:]))
         raise RuntimeError("Erro ao concatenar segmentos com ffmpeg")
     return output_path
 
 
+def concat_segments_ffmpeg(segment_paths: List[str], output_path: str, video_id: Optional[int] = None) -> str:
+    """
+    Concatena segmentos em um único mp4 sem reencode.
+
+    Usa PyAV em processo quando disponível; se os codecs divergirem (ou o PyAV
+    falhar), cai para o concat demuxer do ffmpeg via subprocess.
+    """
+    _ensure_dir(os.path.dirname(output_path))
+    if av is not None:
+        try:
+            return _concat_segments_pyav(segment_paths, output_path)
+        except Exception as e:
+            log.warning("Concat via PyAV falhou (%s); usando ffmpeg.", e)
+    return _concat_segments_subprocess(segment_paths, output_path, video_id)
+
+
+def _first_streamed_highlight(highlight_json_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Lê só o primeiro item de {"highlights": [...]} sem carregar o arquivo inteiro.
+    Retorna None se o arquivo estiver em outro formato (lista ou dict simples).
+    """
+    if ijson is None:
+        return None
+    with open(highlight_json_path, "rb") as f:
+        return next(ijson.items(f, "highlights.item", use_float=True), None)
+
+
 def first_highlight_range(highlight_json_path: str) -> Optional[Dict[str, float]]:
     try:
-        with open(highlight_json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        highlights = _normalize_highlights(data)
-        if not highlights:
-            return None
-        h = highlights[0]
-        return {"start": float(h.get("start", h.get("inicio", 0))), "end": float(h.get("end", h.get("fim", 0)))}
+        h = _first_streamed_highlight(highlight_json_path)
+        if h is None:
+            # Formatos legados (lista direta ou highlight único) exigem o parse completo
+            with open(highlight_json_path, "rb") as f:
+                data = orjson.loads(f.read())
+            highlights = _normalize_highlights(data)
+            if not highlights:
+                return None
+            h = highlights[0]
+        return _highlight_range(h)
     except Exception as e:
-        print(f"[warn] Não foi possível ler highlights para subtítulos/thumbnail: {e}")
+        log.warning("Não foi possível ler highlights para subtítulos/thumbnail: %s", e)
         return None
 
 
-def build_clipped_transcription(transcription_path: str, start: float, end: float) -> Dict[str, Any]:
+def _highlight_range(h: Dict[str, Any]) -> Dict[str, float]:
+    return {"start": float(h.get("start", h.get("inicio", 0))), "end": float(h.get("end", h.get("fim", 0)))}
+
+
+def state_highlight_range(state: "CortAIState") -> Optional[Dict[str, float]]:
     """
-    Filtra e normaliza segments para o intervalo do highlight, deslocando timestamps para começar em 0.
+    Intervalo do primeiro highlight a partir do estado do grafo (sem reler highlight.json).
     """
-    with open(transcription_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    segments = data.get("segments", [])
-    clipped = []
-    for seg in segments:
-        seg_start = float(seg.get("start", 0))
-        seg_end = float(seg.get("end", seg_start))
-        if seg_end < start or seg_start > end:
-            continue
-        new_start = max(seg_start, start) - start
-        new_end = min(seg_end, end) - start
-        clipped.append({
-            "start": new_start,
-            "end": new_end if new_end > new_start else new_start + 0.5,
-            "text": str(seg.get("text", "")).strip()
-        })
-    return {"segments": clipped}
+    highlight = state.get("highlight")
+    if not highlight:
+        return first_highlight_range(HIGHLIGHT_JSON_PATH)
+    try:
+        highlights = _normalize_highlights(highlight)
+        return _highlight_range(highlights[0]) if highlights else None
+    except Exception as e:
+        log.warning("Não foi possível ler highlights para subtítulos/thumbnail: %s", e)
+        return None
+
+
+def _ensure_dir(path: str) -> None:
+    """Cria o diretório apenas na primeira vez que ele é usado neste processo."""
+    if path not in _CREATED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _CREATED_DIRS.add(path)
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """
+    Grava JSON em um arquivo temporário no mesmo diretório e troca com os.replace,
+    para que leitores concorrentes (editor/workers) nunca vejam um arquivo parcial.
+    """
+    if JSON_PRETTY:
+        payload = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+    else:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
 
 # --------------------------------------------------------------------------------------------------------------------------------------
@@ -106,31 +261,37 @@ class CortAIState(TypedDict, total=False):
 # Definindo os nós (estações de trabalho) - O nó recebe algo -> processa -> retorna o estado atualizado
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def node_transcrever(state: CortAIState) -> CortAIState: 
+async def node_transcrever(state: CortAIState) -> CortAIState: 
     """
     Primeiro nó: responsável por baixar o vídeo e gerar a transcrição (Whisper)
     """
-    print("\n -> [1/3] Transcrevendo vídeo...\n")
+    log.debug("[1/3] Transcrevendo vídeo...")
 
     # Extrai a URL do estado atual 
     url = state["url"]
     video_id = state.get("video_id")
 
     # Define os caminhos temporários para os arquivos 
-    video_path = "backend/data/temp_video.mp4"
-    transcription_path = "backend/data/transcricao_temp.json"
+    video_path = str(TEMP_VIDEO)
+    transcription_path = str(TEMP_TRANSCRIPTION)
 
     if video_id:
         update_progress(video_id, "transcribing", 10, "Baixando vídeo...")
 
+    # Progresso da transcrição (10% -> 35%) reportado conforme os segments saem do Whisper
+    def on_progress(fraction: float) -> None:
+        if video_id:
+            update_progress(video_id, "transcribing", 10 + int(25 * fraction), f"Transcrevendo... {fraction:.0%}")
+
     # Decide se deve capturar stream antes de transcrever
     use_collector = should_collect_stream(url)
 
     if use_collector:
-        segments_dir = "backend/data/stream_segments"
-        os.makedirs(segments_dir, exist_ok=True)
-        print(f"Detectado stream. Coletando segmentos em {segments_dir}...")
-        collect_result = executar_agente_coletor(
+        segments_dir = str(STREAM_SEGMENTS_DIR)
+        _ensure_dir(segments_dir)
+        log.debug("Detectado stream. Coletando segmentos em %s...", segments_dir)
+        collect_result = await asyncio.to_thread(
+            executar_agente_coletor,
             stream_url=url,
             output_dir=segments_dir,
             segment_duration=60,
@@ -142,18 +303,23 @@ def node_transcrever(state: CortAIState) -> CortAIState:
 
         segment_paths = collect_result["segment_paths"]
         try:
-            video_path = concat_segments_ffmpeg(segment_paths, video_path)
+            video_path = await asyncio.to_thread(concat_segments_ffmpeg, segment_paths, video_path, video_id)
         except Exception as e:
             state["error"] = f"Erro ao concatenar segmentos: {e}"
             return state
 
-        transcription = transcrever_video_local(
+        transcription = await transcribe_async(
+            transcrever_video_local,
             video_path=video_path,
-            output_json_path=transcription_path
+            output_json_path=transcription_path,
+            on_progress=on_progress
         )
     else:
         # Chama o agente transcritor 
-        transcription = transcricao_youtube_video(url=url, temp_video_path=video_path, output_json_path=transcription_path)
+        transcription = await transcribe_async(
+            transcricao_youtube_video, url=url, temp_video_path=video_path, output_json_path=transcription_path,
+            on_progress=on_progress
+        )
 
     # Atualiza o estado com as novas informações obtidas
     state["video_path"] = video_path                      # Onde o mp4 está
@@ -161,11 +327,11 @@ def node_transcrever(state: CortAIState) -> CortAIState:
     state["transcription"] = transcription                # O conteúdo do texto
 
     if transcription:
-        print("\n ✔ Transcrição concluída!")
+        log.debug("Transcrição concluída!")
         if video_id:
             update_progress(video_id, "transcribing", 35, "Transcrição concluída")
     else:
-        print("\n ❌ Transcrição falhou. Interrompendo o fluxo.")
+        log.error("Transcrição falhou. Interrompendo o fluxo.")
         state["error"] = "Falha na transcrição ou download do vídeo."
         if video_id:
             update_progress(video_id, "transcribing", 0, "Falha na transcrição ou download do vídeo.")
@@ -174,11 +340,11 @@ def node_transcrever(state: CortAIState) -> CortAIState:
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def node_analisar(state: CortAIState) -> CortAIState:
+async def node_analisar(state: CortAIState) -> CortAIState:
     """
     Segundo nó: o 'cérebro'. Lê a transcrição e decide o que é importante
     """
-    print("\n -> [2/3] Analisando transcrição...")
+    log.debug("[2/3] Analisando transcrição...")
     video_id = state.get("video_id")
 
     if video_id:
@@ -188,16 +354,26 @@ def node_analisar(state: CortAIState) -> CortAIState:
     transcription_path = state["transcription_path"]
 
     # Define o caminho de saída para o arquivo de highlights
-    output_path = "backend/data/highlight.json"
+    output_path = HIGHLIGHT_JSON_PATH
+
+    # Transcrições idênticas reaproveitam a análise anterior (evita nova chamada à LLM)
+    cache_key = await asyncio.to_thread(file_digest, transcription_path)
+    highlight = await asyncio.to_thread(get_cached, "analysis", cache_key)
 
-    # Chama o agente analista com ambos os parâmetros
-    highlight = executar_agente_analista(input_json=transcription_path, output_json=output_path)
+    if highlight is not None:
+        log.debug("Análise encontrada em cache.")
+        # O editor recebe os highlights pelo estado; o arquivo só é útil para depuração
+        if DEBUG_HIGHLIGHTS:
+            write_json_atomic(output_path, highlight)
+    else:
+        # Chama o agente analista com ambos os parâmetros
+        highlight = await asyncio.to_thread(executar_agente_analista, input_json=transcription_path, output_json=output_path)
+        await asyncio.to_thread(set_cached, "analysis", cache_key, highlight)
 
     # Guarda a decisão da LLM de corte no estado
     state["highlight"] = highlight
 
-    print(f"\nArquivo de corte salvo em: {output_path}")
-    print("\n ✔ Análise concluída!")
+    log.debug("Análise concluída! Arquivo de corte: %s", output_path)
     if video_id:
         update_progress(video_id, "analyzing", 70, "Análise concluída")
 
@@ -205,24 +381,26 @@ def node_analisar(state: CortAIState) -> CortAIState:
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def node_editar(state: CortAIState) -> CortAIState: 
+async def node_editar(state: CortAIState) -> CortAIState: 
     """
     Terceiro nó: o editor, corta o vídeo original baseado na análise
     """
-    print("\n -> [3/3] Editando o vídeo...")
+    log.debug("[3/3] Editando o vídeo...")
     video_id = state.get("video_id")
 
     if video_id:
         update_progress(video_id, "editing", 80, "Cortando vídeo...")
 
     # Define onde os vídeos finais serão salvos 
-    clips_dir = "backend/data/clips"
+    clips_dir = str(CLIPS_DIR)
 
-    # Chama o agente editor
-    result_path = executar_agente_editor(
+    # Chama o agente editor com os highlights do estado (highlight.json só como fallback)
+    result_path = await asyncio.to_thread(
+        executar_agente_editor,
         input_video=state["video_path"],
-        highlight_json="backend/data/highlight.json",
-        output_dir=clips_dir
+        highlight_json=HIGHLIGHT_JSON_PATH,
+        output_dir=clips_dir,
+        highlight=state.get("highlight") or None
     )
 
     # Atualiza o estado com o caminho do produto final
@@ -238,7 +416,7 @@ def node_editar(state: CortAIState) -> CortAIState:
 
     # Gera legendas/thumbnail do primeiro highlight para o primeiro clip
     try:
-        range_info = first_highlight_range("backend/data/highlight.json")
+        range_info = state_highlight_range(state)
         if range_info and state.get("transcription_path") and state.get("clips_paths"):
             clipped_transcription = build_clipped_transcription(
                 state["transcription_path"],
@@ -251,37 +429,50 @@ def node_editar(state: CortAIState) -> CortAIState:
             vtt_path = str(base.with_suffix(".vtt"))
             thumb_path = str(base.with_name(base.stem + "_thumb.jpg"))
 
-            make_srt(clipped_transcription, srt_path)
-            make_vtt(clipped_transcription, vtt_path)
-            choose_thumbnail(
-                source_path=state["video_path"],
-                start_time=range_info["start"],
-                end_time=range_info["end"],
-                output_path=thumb_path,
-                strategy="middle"
+            # Legendas e thumbnail são independentes: roda os três em paralelo
+            await asyncio.gather(
+                asyncio.to_thread(make_srt, clipped_transcription, srt_path),
+                asyncio.to_thread(make_vtt, clipped_transcription, vtt_path),
+                asyncio.to_thread(
+                    choose_thumbnail,
+                    source_path=state["video_path"],
+                    start_time=range_info["start"],
+                    end_time=range_info["end"],
+                    output_path=thumb_path,
+                    strategy="middle"
+                ),
             )
 
             state["subtitle_srt_path"] = srt_path
             state["subtitle_vtt_path"] = vtt_path
             state["thumbnail_path"] = thumb_path
     except Exception as e:
-        print(f"[warn] Falha ao gerar legendas/thumbnail: {e}")
+        log.warning("Falha ao gerar legendas/thumbnail: %s", e)
 
-    print("\n ✔ Highlight gerado!")
+    log.debug("Highlight gerado!")
 
     return state
 
 
 # --------------------------------------------------------------------------------------------------------------------------------------
-def node_planner(state: CortAIState) -> CortAIState:
+async def node_planner(state: CortAIState) -> CortAIState:
     """
     Nó planner: chama o CrewAI para obter um plano (highlights + editor_params), valida
     e injeta os highlights no estado. Também persiste um `highlight.json` compatível
     com o agente editor para que o fluxo existente não precise mudar.
     """
-    print("\n -> [PLANNER] Gerando plano via CrewAI (se habilitado)...")
+    log.debug("[PLANNER] Gerando plano via CrewAI (se habilitado)...")
+
+    # Plano em cache pelo hash da transcrição (mesma entrada -> mesmo plano)
+    cache_key = None
+    if state.get("transcription_path") and os.path.exists(state["transcription_path"]):
+        cache_key = await asyncio.to_thread(file_digest, state["transcription_path"])
 
-    plan = plan_job(state)
+    plan = await asyncio.to_thread(get_cached, "plan", cache_key) if cache_key else None
+    if plan is None:
+        plan = await plan_job_async(state)
+        if cache_key and isinstance(plan, dict):
+            await asyncio.to_thread(set_cached, "plan", cache_key, plan)
 
     highlights = plan.get("highlights") if isinstance(plan, dict) else None
     if not highlights:
@@ -316,19 +507,17 @@ def node_planner(state: CortAIState) -> CortAIState:
 
     # Grava o arquivo highlight.json na pasta padrão para o editor ler
     try:
-        job_id = state.get("job_id") or state.get("url", "no_job")
         # Prefer job-specific path quando disponível
         if "job_id" in state and state.get("job_id"):
-            out_dir = f"backend/data/jobs/{state.get('job_id')}/highlights"
-            os.makedirs(out_dir, exist_ok=True)
-            out_path = os.path.join(out_dir, "highlight.json")
+            out_dir = JOBS_DIR / str(state["job_id"]) / "highlights"
+            _ensure_dir(str(out_dir))
+            out_path = str(out_dir / "highlight.json")
         else:
-            out_path = "backend/data/highlight.json"
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump({"highlights": sanitized}, f, ensure_ascii=False, indent=4)
-        print(f"\n[PLANNER] highlight.json salvo em: {out_path}")
+            out_path = HIGHLIGHT_JSON_PATH
+        await asyncio.to_thread(write_json_atomic, out_path, {"highlights": sanitized})
+        log.debug("[PLANNER] highlight.json salvo em: %s", out_path)
     except Exception as e:
-        print(f"[PLANNER] Aviso: não foi possível salvar highlight.json: {e}")
+        log.warning("[PLANNER] Não foi possível salvar highlight.json: %s", e)
 
     return state
 
@@ -338,6 +527,10 @@ def node_planner(state: CortAIState) -> CortAIState:
 def build_graph(): 
     """
     Função que cria e compila o grafo do fluxo de execução
+
+    Os nós são assíncronos: as chamadas bloqueantes (download, Whisper, LLM,
+    ffmpeg) rodam em threads via asyncio.to_thread, então o grafo deve ser
+    executado com `await app.ainvoke(state)`.
     """
 
     # Inicializa o grafo passando a definição de tipagem do estado 
@@ -2,15 +2,19 @@
 CortAI - FastAPI Application
 Main entry point for the REST API
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from src.api.routes import auth, videos
 from src.core.config import CORS_ORIGINS
+import hashlib
+import json
 import logging
+import os
 
 # Configure logging
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOGLEVEL", "INFO").upper(),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
@@ -21,7 +25,8 @@ app = FastAPI(
     description="API para processamento inteligente de vídeos com IA",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -38,24 +43,43 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(videos.router, prefix="/api/v1/videos", tags=["videos"])
 
 
+def _static_json(payload: dict) -> tuple[bytes, dict]:
+    """Serialize a constant payload once and derive its ETag."""
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    return body, {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+# Constant bodies: probes hit these endpoints constantly, so skip per-request serialization
+_HEALTH_BODY, _HEALTH_HEADERS = _static_json({"status": "healthy", "service": "cortai-api"})
+_ROOT_BODY, _ROOT_HEADERS = _static_json({"message": "CortAI API", "version": "1.0.0", "docs": "/docs"})
+
+
+def _static_response(request: Request, body: bytes, headers: dict) -> Response:
+    """Returns 304 Not Modified when the client already has this ETag, else the full body."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or headers["ETag"] in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint
     """
-    return {"status": "healthy", "service": "cortai-api"}
+    return _static_response(request, _HEALTH_BODY, _HEALTH_HEADERS)
 
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """
     Root endpoint
     """
-    return {
-        "message": "CortAI API",
-        "version": "1.0.0",
-        "docs": "/docs"
-    }
+    return _static_response(request, _ROOT_BODY, _ROOT_HEADERS)
 
 
 if __name__ == "__main__":
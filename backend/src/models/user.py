@@ -3,6 +3,7 @@ User model for authentication
 """
 from sqlalchemy import String, Boolean, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
 from datetime import datetime
 from typing import List, TYPE_CHECKING
 from src.database import Base
@@ -36,16 +37,18 @@ class User(Base):
         nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime,
-        default=datetime.utcnow,
+        DateTime(timezone=True),
+        server_default=func.now(),
         nullable=False
     )
 
     # Relationships
+    # Lazy loads raise instead of emitting one query per user; load explicitly
+    # with select(User).options(selectinload(User.videos)) when needed
     videos: Mapped[List["Video"]] = relationship(
         "Video",
         back_populates="user",
-        lazy="select"
+        lazy="raise_on_sql"
     )
 
     def __repr__(self):
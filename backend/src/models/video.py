@@ -1,8 +1,9 @@
 """
 Video model for storing processed videos
 """
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql import func
 from datetime import datetime
 import enum
 from typing import Optional
@@ -20,6 +21,15 @@ class VideoStatus(str, enum.Enum):
 class Video(Base):
     """Video model for storing user videos and their processing status"""
     __tablename__ = "videos"
+    __table_args__ = (
+        # Serves the per-user list ordered by newest first without a sort step
+        Index(
+            "ix_videos_user_created",
+            "user_id",
+            "created_at",
+            postgresql_ops={"created_at": "DESC"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -35,8 +45,14 @@ class Video(Base):
         String(255),
         nullable=True
     )
+    # Stored as the enum value in a short VARCHAR (no Postgres enum type to ALTER)
     status: Mapped[VideoStatus] = mapped_column(
-        SQLEnum(VideoStatus),
+        SQLEnum(
+            VideoStatus,
+            values_callable=lambda e: [m.value for m in e],
+            native_enum=False,
+            length=16,
+        ),
         default=VideoStatus.PROCESSING,
         nullable=False
     )
@@ -53,9 +69,15 @@ class Video(Base):
         String(500),
         nullable=True
     )
+    # Hash de URL + parâmetros; permite reaproveitar processamentos concluídos
+    cache_key: Mapped[Optional[str]] = mapped_column(
+        String(32),
+        nullable=True,
+        index=True
+    )
     created_at: Mapped[datetime] = mapped_column(
-        DateTime,
-        default=datetime.utcnow,
+        DateTime(timezone=True),
+        server_default=func.now(),
         nullable=False
     )
 
@@ -73,8 +95,8 @@ class Video(Base):
         nullable=True
     )
 
-    # Relationship to User
-    user: Mapped["User"] = relationship("User", back_populates="videos")
+    # Relationship to User (use selectinload(Video.user) when the owner is needed)
+    user: Mapped["User"] = relationship("User", back_populates="videos", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Video(id={self.id}, user_id={self.user_id}, status={self.status})>"
@@ -1,20 +1,35 @@
 """
 Authentication schemas for request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, Field, StringConstraints
 from datetime import datetime
+from typing import Annotated
+
+
+def _normalize_email_domain(value: str) -> str:
+    """Lowercase the domain part, as EmailStr did, so lookups stay consistent"""
+    local, _, domain = value.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+# Lightweight email check (no email-validator/DNS stack on the import path)
+Email = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, max_length=254, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$"),
+    AfterValidator(_normalize_email_domain),
+]
 
 
 class UserCreate(BaseModel):
     """Schema for user registration"""
-    email: EmailStr
+    email: Email
     password: str = Field(min_length=6, description="Password must be at least 6 characters")
     name: str = Field(min_length=2, max_length=100, description="User's full name")
 
 
 class UserLogin(BaseModel):
     """Schema for user login"""
-    email: EmailStr
+    email: Email
     password: str
 
 
@@ -1,7 +1,7 @@
 """
 Video schemas for request/response validation
 """
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional
 from src.models.video import VideoStatus
@@ -46,6 +46,8 @@ class VideoCreate(BaseModel):
 
 class VideoResponse(BaseModel):
     """Schema for video response"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     user_id: int
     url: str
@@ -61,9 +63,6 @@ class VideoResponse(BaseModel):
     progress_percentage: Optional[int] = None
     progress_message: Optional[str] = None
 
-    class Config:
-        from_attributes = True
-
 
 class VideoListResponse(BaseModel):
     """Schema for list of videos"""
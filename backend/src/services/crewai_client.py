@@ -1,9 +1,13 @@
 import os
 import json
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 log = logging.getLogger("crewai_client")
 
@@ -15,6 +19,24 @@ CREWAI_TIMEOUT = float(os.getenv("CREWAI_TIMEOUT_SECONDS", "5"))
 CREWAI_MIN_HIGHLIGHT_SECONDS = float(os.getenv("CREWAI_MIN_HIGHLIGHT_SECONDS", "5"))
 
 
+# Shared session: keep-alive connection pool instead of a new TCP/TLS handshake per call.
+# Transient gateway errors are retried (the CrewAI endpoints don't mutate state).
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    ),
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+
 def _headers() -> Dict[str, str]:
     headers = {"Content-Type": "application/json"}
     if CREWAI_API_KEY:
@@ -22,6 +44,14 @@ def _headers() -> Dict[str, str]:
     return headers
 
 
+def _fallback_plan(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Plan built from the analyst output already in the state (may be empty)."""
+    existing = state.get("highlight") or state.get("highlights")
+    if isinstance(existing, dict) and "highlights" in existing:
+        return {"highlights": existing.get("highlights", []), "editor_params": {}}
+    return {"highlights": [], "editor_params": {}}
+
+
 def plan_job(state: Dict[str, Any]) -> Dict[str, Any]:
     """Request a plan from CrewAI.
 
@@ -29,15 +59,6 @@ def plan_job(state: Dict[str, Any]) -> Dict[str, Any]:
     The returned dict should contain keys: `highlights` (list) and `editor_params` (dict).
     """
 
-    # If disabled or no URL configured, return fallback using existing analyst output
-    if not CREWAI_ENABLED or not CREWAI_API_URL:
-        log.info("CrewAI disabled or not configured — returning fallback plan.")
-        # Try to reuse analyst output if available
-        existing = state.get("highlight") or state.get("highlights")
-        if isinstance(existing, dict) and "highlights" in existing:
-            return {"highlights": existing.get("highlights", []), "editor_params": {}}
-        return {"highlights": [], "editor_params": {}}
-
     payload = {
         "transcription": state.get("transcription", {}),
         "metadata": {
@@ -47,7 +68,7 @@ def plan_job(state: Dict[str, Any]) -> Dict[str, Any]:
     }
 
     try:
-        resp = requests.post(
+        resp = _session.post(
             f"{CREWAI_API_URL.rstrip('/')}/plan",
             json=payload,
             headers=_headers(),
@@ -63,19 +84,13 @@ def plan_job(state: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as exc:  # network, timeout, JSON decode, etc.
         log.exception(f"CrewAI plan_job failed: {exc}")
         # Fallback: reuse existing highlights if present
-        existing = state.get("highlight") or state.get("highlights")
-        if isinstance(existing, dict) and "highlights" in existing:
-            return {"highlights": existing.get("highlights", []), "editor_params": {}}
-        return {"highlights": [], "editor_params": {}}
+        return _fallback_plan(state)
 
 
 def summarize(text: str, max_chars: int = 512) -> str:
     """Simple wrapper for summarization — stub uses naive truncate when CrewAI disabled."""
-    if not CREWAI_ENABLED or not CREWAI_API_URL:
-        return (text or "")[:max_chars]
-
     try:
-        resp = requests.post(
+        resp = _session.post(
             f"{CREWAI_API_URL.rstrip('/')}/summarize",
             json={"text": text, "max_chars": max_chars},
             headers=_headers(),
@@ -94,12 +109,8 @@ def extract_highlights(text: str, max_items: int = 5) -> list:
 
     Returns a list of dicts with start,end,summary,score keys when possible.
     """
-    if not CREWAI_ENABLED or not CREWAI_API_URL:
-        # Fallback stub: return empty list — analyst/local heuristics should handle
-        return []
-
     try:
-        resp = requests.post(
+        resp = _session.post(
             f"{CREWAI_API_URL.rstrip('/')}/extract_highlights",
             json={"text": text, "max_items": max_items},
             headers=_headers(),
@@ -111,3 +122,111 @@ def extract_highlights(text: str, max_items: int = 5) -> list:
     except Exception:
         log.exception("CrewAI extract_highlights failed")
         return []
+
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+# Async API (httpx). Clients are scoped to the call (or to summarize_and_extract) and
+# closed with `async with`: Celery runs each task in its own asyncio.run(), so a
+# cached client could neither be reused across tasks nor outlive its event loop.
+def _async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=CREWAI_API_URL.rstrip("/"),
+        headers=_headers(),
+        timeout=CREWAI_TIMEOUT,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=10),
+    )
+
+
+async def _apost(path: str, payload: Dict[str, Any], client: Optional[httpx.AsyncClient] = None) -> Any:
+    if client is None:
+        async with _async_client() as client:
+            return await _apost(path, payload, client)
+    resp = await client.post(path, json=payload)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def plan_job_async(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Async version of `plan_job` (same payload, same fallbacks)."""
+    payload = {
+        "transcription": state.get("transcription", {}),
+        "metadata": {
+            "url": state.get("url"),
+            "video_path": state.get("video_path"),
+        },
+    }
+    try:
+        plan = await _apost("/plan", payload)
+        if not isinstance(plan, dict):
+            log.warning("CrewAI returned non-dict plan; using fallback")
+            return {"highlights": [], "editor_params": {}}
+        return plan
+    except Exception as exc:
+        log.exception(f"CrewAI plan_job failed: {exc}")
+        return _fallback_plan(state)
+
+
+async def summarize_async(text: str, max_chars: int = 512, client: Optional[httpx.AsyncClient] = None) -> str:
+    """Async version of `summarize` (uses `client` if given, else a client for this call)."""
+    try:
+        data = await _apost("/summarize", {"text": text, "max_chars": max_chars}, client)
+        return data.get("summary") or (text or "")[:max_chars]
+    except Exception:
+        log.exception("CrewAI summarize failed, falling back to truncate")
+        return (text or "")[:max_chars]
+
+
+async def extract_highlights_async(text: str, max_items: int = 5, client: Optional[httpx.AsyncClient] = None) -> list:
+    """Async version of `extract_highlights` (uses `client` if given, else a client for this call)."""
+    try:
+        data = await _apost("/extract_highlights", {"text": text, "max_items": max_items}, client)
+        return data.get("highlights", [])
+    except Exception:
+        log.exception("CrewAI extract_highlights failed")
+        return []
+
+
+async def summarize_and_extract(text: str, max_chars: int = 512, max_items: int = 5) -> Tuple[str, list]:
+    """Runs summarize and extract_highlights concurrently (one round-trip of latency)."""
+    async with _async_client() as client:
+        summary, highlights = await asyncio.gather(
+            summarize_async(text, max_chars, client), extract_highlights_async(text, max_items, client)
+        )
+    return summary, highlights
+
+
+# Stubs used when CrewAI is disabled or not configured. The env is fixed at
+# startup, so the public names are bound once here instead of checked per call.
+def _plan_job_disabled(state: Dict[str, Any]) -> Dict[str, Any]:
+    log.info("CrewAI disabled or not configured — returning fallback plan.")
+    return _fallback_plan(state)
+
+
+def _summarize_disabled(text: str, max_chars: int = 512) -> str:
+    return (text or "")[:max_chars]
+
+
+def _extract_highlights_disabled(text: str, max_items: int = 5) -> list:
+    # Empty list — analyst/local heuristics should handle
+    return []
+
+
+async def _plan_job_async_disabled(state: Dict[str, Any]) -> Dict[str, Any]:
+    return _plan_job_disabled(state)
+
+
+async def _summarize_async_disabled(text: str, max_chars: int = 512, client: Optional[httpx.AsyncClient] = None) -> str:
+    return _summarize_disabled(text, max_chars)
+
+
+async def _extract_highlights_async_disabled(text: str, max_items: int = 5, client: Optional[httpx.AsyncClient] = None) -> list:
+    return []
+
+
+if not CREWAI_ENABLED or not CREWAI_API_URL:
+    plan_job = _plan_job_disabled
+    summarize = _summarize_disabled
+    extract_highlights = _extract_highlights_disabled
+    plan_job_async = _plan_job_async_disabled
+    summarize_async = _summarize_async_disabled
+    extract_highlights_async = _extract_highlights_async_disabled
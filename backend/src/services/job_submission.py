@@ -0,0 +1,80 @@
+import asyncio  # Aguarda o Future do publicador em lote
+from typing import Dict, Any  # Tipagem
+
+import anyio  # Executa chamadas bloqueantes fora do event loop
+
+from src.services.messaging_rabbit import (
+    new_job,
+    publish,
+    publish_async,
+    TRANSCRIBE_QUEUE,
+    COLLECT_QUEUE,
+)
+from src.services.state_manager import initialize_job
+
+"""
+Submissão de jobs ao pipeline de filas (Redis + RabbitMQ).
+
+As versões síncronas são usadas pelo CLI. As versões assíncronas podem ser
+chamadas de handlers FastAPI sem bloquear o event loop: a escrita no Redis roda
+em uma thread e a publicação vai para o publicador em lote.
+"""
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def _video_job(url: str, job_id: str) -> Dict[str, Any]:
+    return new_job(step="transcribe", job_id=job_id, payload={"url": url})
+
+
+def _stream_job(url: str, job_id: str, segment_duration: int, max_duration: int) -> Dict[str, Any]:
+    return new_job(
+        step="collect",
+        job_id=job_id,
+        payload={
+            "stream_url": url,
+            "segment_duration": segment_duration,
+            "max_duration": max_duration
+        }
+    )
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def submit_video_job(url: str, job_id: str) -> Dict[str, Any]:
+    """
+    Inicializa o job no Redis e publica na fila de transcrição.
+    """
+    initialize_job(job_id, url)
+    msg = _video_job(url, job_id)
+    publish(TRANSCRIBE_QUEUE, msg)
+    return msg
+
+
+def submit_stream_job(url: str, job_id: str, segment_duration: int, max_duration: int) -> Dict[str, Any]:
+    """
+    Inicializa o job no Redis e publica na fila de coleta do stream.
+    """
+    initialize_job(job_id, url)
+    msg = _stream_job(url, job_id, segment_duration, max_duration)
+    publish(COLLECT_QUEUE, msg)
+    return msg
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+async def submit_video_job_async(url: str, job_id: str) -> Dict[str, Any]:
+    """
+    Versão assíncrona de submit_video_job (retorna após a confirmação do broker).
+    """
+    await anyio.to_thread.run_sync(initialize_job, job_id, url)
+    msg = _video_job(url, job_id)
+    await asyncio.wrap_future(publish_async(TRANSCRIBE_QUEUE, msg))
+    return msg
+
+
+async def submit_stream_job_async(url: str, job_id: str, segment_duration: int, max_duration: int) -> Dict[str, Any]:
+    """
+    Versão assíncrona de submit_stream_job (retorna após a confirmação do broker).
+    """
+    await anyio.to_thread.run_sync(initialize_job, job_id, url)
+    msg = _stream_job(url, job_id, segment_duration, max_duration)
+    await asyncio.wrap_future(publish_async(COLLECT_QUEUE, msg))
+    return msg
@@ -1,10 +1,17 @@
 import os  # Acessa variáveis e recursos do Sistema Operacional 
 import json  # Permite ler/escrever objetos no formato JSON
-import uuid  # Usado para gerar identificadores únicos para cada job
+from secrets import token_hex  # Gera identificadores únicos para cada job
 import logging  # Exibe logs estruturados no terminal (INFO, WARNING, ERROR)
+import functools  # Cache da declaração de infraestrutura por processo
+import time  # Espera entre tentativas de conexão e janela dos lotes
+import random  # Jitter do backoff de reconexão
+import threading  # Conexão de publicação reaproveitada por thread
+import atexit  # Fecha as conexões persistentes ao encerrar o processo
+import queue as queue_lib  # Fila thread-safe do publicador em lote
+from concurrent.futures import Future, ThreadPoolExecutor  # Resultado das publicações em lote / handlers do lote
 
 # Tipagem estática para maior clareza e ajuda do editor
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, List
 
 # Carrega variáveis do arquivo .env
 from dotenv import load_dotenv
@@ -12,6 +19,28 @@ from dotenv import load_dotenv
 # Cliente oficial do RabbitMQ para Python
 import pika
 
+from src.utils.logging_setup import configure_logging # Configuração única dos logs (stdout)
+
+# Serialização das mensagens: orjson (bytes direto, em C) quando disponível
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads  # Aceita bytes; orjson.JSONDecodeError herda de json.JSONDecodeError
+except ImportError:
+    # Opções fixadas uma vez: JSON compacto e sem escapar acentos (mesma saída do orjson)
+    _json_dumps = functools.partial(json.dumps, ensure_ascii=False, separators=(",", ":"))
+
+    def _dumps(obj) -> bytes:
+        return _json_dumps(obj).encode()
+
+    _loads = json.loads
+
+try:
+    import msgpack
+except ImportError:  # Opcional: JSON está sempre disponível
+    msgpack = None
+
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
@@ -36,10 +65,50 @@ ANALYSE_QUEUE = "analyse_queue"          # Análise semântica (LLM)
 EDIT_QUEUE = "edit_queue"                # Edição (FFmpeg / MoviePy)
 COMPLETED_QUEUE = "completed_queue"      # Conclusão do processo
 
+# Tipos/limites de fila por etapa (opt-in). Os argumentos de uma fila não podem ser
+# alterados depois de criada: em um broker com as filas antigas, o queue_declare
+# falha com PRECONDITION_FAILED. Para ativar, remova as filas e defina =1.
+QUEUE_TUNING = os.getenv("RABBITMQ_QUEUE_TUNING", "0") == "1"
+QUEUE_MAX_LENGTH = int(os.getenv("RABBITMQ_QUEUE_MAX_LENGTH", "100000"))
+QUEUE_MAX_LENGTH_BYTES = int(os.getenv("RABBITMQ_QUEUE_MAX_LENGTH_BYTES", str(256 * 1024 * 1024)))
+
 # Configuração global dos logs
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+configure_logging()
 log = logging.getLogger("messaging")
 
+# Formato do corpo das mensagens publicadas: "json" (padrão) ou "msgpack" (menor e mais
+# rápido de decodificar). O consumidor decide pelo content_type de cada mensagem, então
+# produtores podem mudar de formato sem coordenar com os consumidores já em execução
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+MESSAGE_FORMAT = os.getenv("RABBITMQ_MESSAGE_FORMAT", "json").lower()
+if MESSAGE_FORMAT == "msgpack" and msgpack is None:
+    log.warning("RABBITMQ_MESSAGE_FORMAT=msgpack mas msgpack não está instalado; usando JSON")
+    MESSAGE_FORMAT = "json"
+
+if MESSAGE_FORMAT == "msgpack":
+    _encode = functools.partial(msgpack.packb, use_bin_type=True)
+    _CONTENT_TYPE = MSGPACK_CONTENT_TYPE
+else:
+    _encode = _dumps
+    _CONTENT_TYPE = JSON_CONTENT_TYPE
+
+# Propriedades de toda publicação: persistente (delivery_mode=2) e com o formato do corpo
+_PROPERTIES = pika.BasicProperties(delivery_mode=2, content_type=_CONTENT_TYPE)
+
+
+def _decode(body: bytes, props) -> Dict[str, Any]:
+    """
+    Desserializa o corpo de acordo com o content_type (sem content_type = JSON).
+    Levanta ValueError se o corpo for inválido.
+    """
+    if props.content_type == MSGPACK_CONTENT_TYPE:
+        if msgpack is None:
+            raise ValueError("mensagem em msgpack, mas msgpack não está instalado")
+        return msgpack.unpackb(body, raw=False)
+    return _loads(body)
+
 # --------------------------------------------------------------------------------------------------------------------------------------
 
 def get_connection():
@@ -47,7 +116,7 @@ def get_connection():
     Estabelece uma conexão com o servidor RabbitMQ.
     Usa BlockingConnection (síncrona), que é simples e adequada para workers.
 
-    Implementa um sistema de retry com tentativas e tempo de espera.
+    Implementa um sistema de retry com backoff exponencial (0.5s, 1s, 2s... até 30s) e jitter.
 
     Returns:
         pika.BlockingConnection: Conexão ativa com RabbitMQ
@@ -58,13 +127,14 @@ def get_connection():
 
     # Configuração de retry
     max_retries = 10
-    retry_delay = 5  # segundos
+    base_delay = 0.5  # segundos
+    max_delay = 30
 
     # Tenta estabelecer conexão com RabbitMQ
     for attempt in range(max_retries):
         try:
             # Tenta estabelecer conexão
-            log.info(f"Tentando conectar ao RabbitMQ (Tentativa {attempt + 1}/{max_retries})...")
+            log.info("Tentando conectar ao RabbitMQ (Tentativa %d/%d)...", attempt + 1, max_retries)
             connection = pika.BlockingConnection(params)
 
             # Conexão estabelecida
@@ -73,11 +143,11 @@ def get_connection():
 
         # Caso de falha
         except pika.exceptions.AMQPConnectionError as e:
-            log.warning(f"Falha na conexão: {e}. Aguardando {retry_delay}s para tentar novamente.")
+            retry_delay = min(max_delay, base_delay * (2 ** attempt)) + random.random() * 0.3
+            log.warning("Falha na conexão: %s. Aguardando %.1fs para tentar novamente.", e, retry_delay)
 
             # Verifica se ainda há tentativas restantes
             if attempt < max_retries - 1:
-                import time
                 time.sleep(retry_delay)
             else:
                 log.error("Falha ao conectar ao RabbitMQ após várias tentativas.")
@@ -85,22 +155,11 @@ def get_connection():
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def declare_infraestructure():
+def _declare_on_channel(ch):
     """
-    Cria todas as filas necessárias no RabbitMQ, incluindo:
-    - Filas principais
-    - DLQ (Dead Letter Queue)
-    - Dead Letter Exchange
-
-    A operação é idempotente — executar várias vezes não causa erros.
+    Declara exchange, DLQ e filas do pipeline no canal informado.
     """
 
-    # Estabelece conexão
-    conn = get_connection()
-
-    # Cria canal
-    ch = conn.channel()
-
     # Declara exchange de Dead Letter
     ch.exchange_declare(exchange=DEAD_LETTER_EXCHANGE, exchange_type='fanout', durable=True)
 
@@ -116,17 +175,78 @@ def declare_infraestructure():
         "x-dead-letter-routing-key": ""
     }
 
+    # Argumentos por etapa
+    stage_args, edit_args, completed_args = dlq_args, dlq_args, None
+    if QUEUE_TUNING:
+        # Envelopes JSON pequenos: classic (maior vazão), limitada; ao lotar, o
+        # publish é rejeitado (nack no publisher confirm) e o excedente vai à DLQ.
+        # "lazy" mantém as rajadas de segmentos em disco em brokers < 3.12 (ignorado nos mais novos)
+        stage_args = {
+            **dlq_args,
+            "x-queue-type": "classic",
+            "x-queue-mode": "lazy",
+            "x-max-length": QUEUE_MAX_LENGTH,
+            "x-max-length-bytes": QUEUE_MAX_LENGTH_BYTES,
+            "x-overflow": "reject-publish-dlx",
+        }
+        # Fim do pipeline (clipes já gerados): quorum, replicada — at-least-once
+        edit_args = {**dlq_args, "x-queue-type": "quorum"}
+        completed_args = {"x-queue-type": "quorum"}
+
     # Declara filas principais com DLQ configurada
-    ch.queue_declare(queue=COLLECT_QUEUE, durable=True, arguments=dlq_args) # durable=True garante que a fila persista mesmo se o RabbitMQ reiniciar
-    ch.queue_declare(queue=TRANSCRIBE_QUEUE, durable=True, arguments=dlq_args)
-    ch.queue_declare(queue=ANALYSE_QUEUE, durable=True, arguments=dlq_args)
-    ch.queue_declare(queue=EDIT_QUEUE, durable=True, arguments=dlq_args)
+    ch.queue_declare(queue=COLLECT_QUEUE, durable=True, arguments=stage_args) # durable=True garante que a fila persista mesmo se o RabbitMQ reiniciar
+    ch.queue_declare(queue=TRANSCRIBE_QUEUE, durable=True, arguments=stage_args)
+    ch.queue_declare(queue=ANALYSE_QUEUE, durable=True, arguments=stage_args)
+    ch.queue_declare(queue=EDIT_QUEUE, durable=True, arguments=edit_args)
 
     # Essa não precisa de DLQ — é uma fila terminal
-    ch.queue_declare(queue=COMPLETED_QUEUE, durable=True)
+    ch.queue_declare(queue=COMPLETED_QUEUE, durable=True, arguments=completed_args)
+
+
+# Conexões (id) em que a infraestrutura já foi declarada.
+# Removidas ao descartar/reconectar a conexão.
+_infra_done: set[int] = set()
+
+
+def _ensure_infra(conn, ch):
+    """
+    Declara a infraestrutura uma única vez por conexão (no-op se já feito).
+    """
+    if id(conn) in _infra_done:
+        return
+    _declare_on_channel(ch)
+    _infra_done.add(id(conn))
+
+
+def declare_infraestructure():
+    """
+    Cria todas as filas necessárias no RabbitMQ, incluindo:
+    - Filas principais
+    - DLQ (Dead Letter Queue)
+    - Dead Letter Exchange
+
+    Usa a conexão de publicação da thread atual (reaproveitada pelos publish
+    seguintes), em vez de abrir e fechar uma conexão só para as declarações.
+
+    A operação é idempotente — executar várias vezes não causa erros.
+    """
+
+    # Canal persistente da thread; _get_channel já declara ao abrir uma conexão nova
+    ch = _get_channel()
+    _ensure_infra(_local.connection, ch)
 
     log.info("Infraestrutura de filas verificada e pronta (incluindo DLQ).")
-    conn.close()
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def ensure_infraestructure() -> bool:
+    """
+    Declara a infraestrutura apenas uma vez por processo.
+    Chamadas seguintes retornam imediatamente, sem abrir conexão com o RabbitMQ.
+    """
+    declare_infraestructure()
+    return True
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
@@ -144,7 +264,7 @@ def new_job(step: str, payload: Dict[str, Any], job_id: str | None = None) -> Di
     """
 
     # Gera um ID único para o job 
-    unique_job_id = job_id or uuid.uuid4().hex[:12]
+    unique_job_id = job_id or token_hex(6)
 
     # Retorna o job normalizado
     return {
@@ -155,66 +275,352 @@ def new_job(step: str, payload: Dict[str, Any], job_id: str | None = None) -> Di
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
+# Conexão/canal de publicação por thread (BlockingConnection não é thread-safe)
+_local = threading.local()
+
+# Todas as conexões abertas por publish, para fechamento no encerramento
+_publish_connections = set()
+_publish_connections_lock = threading.Lock()
+
+# Erros que indicam conexão/canal perdido: reconecta e tenta publicar de novo
+_RECONNECT_ERRORS = (
+    pika.exceptions.AMQPConnectionError,
+    pika.exceptions.ChannelClosed,
+    pika.exceptions.ChannelWrongStateError,
+    pika.exceptions.StreamLostError,
+)
+
+
+def _reset_channel():
+    """
+    Descarta a conexão de publicação da thread atual (após erro ou fechamento).
+    """
+    conn = getattr(_local, "connection", None)
+    _local.connection = None
+    _local.channel = None
+    if conn is None:
+        return
+    _infra_done.discard(id(conn))
+    with _publish_connections_lock:
+        _publish_connections.discard(conn)
+    try:
+        if conn.is_open:
+            conn.close()
+    except Exception:
+        pass
+
+
+def _get_channel():
+    """
+    Retorna o canal de publicação da thread atual, criando a conexão sob demanda.
+    O canal usa publisher confirms: basic_publish só retorna após o broker confirmar.
+    """
+    ch = getattr(_local, "channel", None)
+    if ch is not None and ch.is_open and _local.connection.is_open:
+        return ch
+
+    _reset_channel()
+    conn = get_connection()
+    ch = conn.channel()
+    ch.confirm_delivery()
+    _ensure_infra(conn, ch)
+
+    _local.connection = conn
+    _local.channel = ch
+    with _publish_connections_lock:
+        _publish_connections.add(conn)
+    return ch
+
+
+def close_all():
+    """
+    Fecha todas as conexões de publicação abertas por este processo
+    (incluindo o publicador em lote, após publicar o que estiver pendente).
+    Registrada no atexit; pode ser chamada manualmente em hooks de shutdown.
+    """
+    global _batched_publisher
+    if _batched_publisher is not None:
+        _batched_publisher.close()
+        _batched_publisher = None
+
+    with _publish_connections_lock:
+        conns = list(_publish_connections)
+        _publish_connections.clear()
+    for conn in conns:
+        _infra_done.discard(id(conn))
+        try:
+            if conn.is_open:
+                conn.close()
+        except Exception:
+            pass
+    _local.connection = None
+    _local.channel = None
+
+
+atexit.register(close_all)
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+# Limites de um lote: publica ao atingir MAX_BATCH mensagens ou após MAX_WAIT_MS
+MAX_BATCH = 64
+MAX_WAIT_MS = 20
+
+
+class BatchedPublisher:
+    """
+    Publicador em lote executado em uma thread dedicada.
+
+    `submit()` apenas enfileira a mensagem e devolve um Future. A thread de fundo
+    agrupa até MAX_BATCH mensagens (ou espera no máximo MAX_WAIT_MS), publica
+    todas e confirma o lote inteiro com um único tx_commit — um round-trip ao
+    broker por lote, em vez de um por mensagem.
+    """
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_wait_ms: int = MAX_WAIT_MS):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue_lib.Queue()
+        self._conn = None
+        self._ch = None
+        self._thread = threading.Thread(target=self._run, name="rabbit-batch-publisher", daemon=True)
+        self._thread.start()
+
+    def submit(self, queue: str, message: Dict[str, Any]) -> Future:
+        """
+        Enfileira a mensagem. O Future é concluído quando o broker confirma o lote.
+        """
+        fut = Future()
+        self._queue.put((queue, _encode(message), fut))
+        return fut
+
+    def close(self, timeout: float | None = 5):
+        """
+        Publica o que estiver pendente e encerra a thread.
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _reset(self):
+        """
+        Descarta a conexão/canal do publicador, fechando a conexão anterior
+        (após erro de canal ela pode continuar aberta).
+        """
+        conn = self._conn
+        self._conn = None
+        self._ch = None
+        if conn is None:
+            return
+        _infra_done.discard(id(conn))
+        try:
+            if conn.is_open:
+                conn.close()
+        except Exception:
+            pass
+
+    def _channel(self):
+        if self._ch is None or not self._ch.is_open or not self._conn.is_open:
+            self._reset()
+            self._conn = get_connection()
+            self._ch = self._conn.channel()
+            _ensure_infra(self._conn, self._ch)
+            # Modo transacional: o tx_commit confirma todas as publicações do lote
+            self._ch.tx_select()
+        return self._ch
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue_lib.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _publish_batch(self, batch):
+        ch = self._channel()
+        for queue, body, _ in batch:
+            ch.basic_publish(
+                exchange="",
+                routing_key=queue,
+                body=body,
+                properties=_PROPERTIES
+            )
+        ch.tx_commit()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if not batch:
+                continue
+            try:
+                try:
+                    self._publish_batch(batch)
+                except _RECONNECT_ERRORS as e:
+                    # Nada foi confirmado: reconecta e reenvia o lote inteiro uma vez
+                    log.warning("Conexão do publicador em lote perdida (%s); reconectando...", e)
+                    self._reset()
+                    self._publish_batch(batch)
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for _, _, fut in batch:
+                fut.set_result(None)
+            log.info("📤 [PUBLISH] Lote de %d mensagem(ns) confirmado", len(batch))
+
+        self._reset()
+
+
+_batched_publisher: BatchedPublisher | None = None
+_batched_publisher_lock = threading.Lock()
+
+
+def publish_async(queue: str, message: Dict[str, Any]) -> Future:
+    """
+    Publica via BatchedPublisher (compartilhado pelo processo) e retorna um Future.
+
+    Use `.result()` para esperar a confirmação do broker ou ignore o retorno
+    (fire-and-forget). Mensagens pendentes são publicadas no encerramento do processo.
+    """
+    global _batched_publisher
+    if _batched_publisher is None:
+        with _batched_publisher_lock:
+            if _batched_publisher is None:
+                _batched_publisher = BatchedPublisher()
+    return _batched_publisher.submit(queue, message)
+
+
+def publish_batch(queue: str, messages: List[Dict[str, Any]], timeout: float | None = 30):
+    """
+    Publica várias mensagens e espera a confirmação de todas.
+
+    As mensagens vão para o BatchedPublisher e são confirmadas em lotes (um
+    tx_commit por até MAX_BATCH mensagens), em vez de um round-trip por mensagem.
+    Levanta a exceção da primeira publicação que falhar.
+    """
+    futures = [publish_async(queue, message) for message in messages]
+    for fut in futures:
+        fut.result(timeout)
+    log.info("📤 [PUBLISH] %d mensagem(ns) confirmada(s) em -> %s", len(messages), queue)
+
+
 def publish(queue: str, message: Dict[str, Any]):
     """
     Publica uma mensagem em uma fila RabbitMQ.
 
-    - Conecta
-    - Serializa o JSON
-    - Publica com persistência (delivery_mode=2)
-    - Fecha a conexão
+    - Reaproveita a conexão/canal persistente da thread (sem handshake por mensagem)
+    - Serializa a mensagem (JSON ou msgpack, ver MESSAGE_FORMAT)
+    - Publica com persistência (delivery_mode=2) e confirmação do broker
+    - Reconecta uma vez se a conexão tiver caído
 
     Args:
         queue: Fila destino
         message: Dicionário padronizado do job
     """
 
-    conn = get_connection()
+    # Serializa a mensagem (já em bytes, no formato de MESSAGE_FORMAT)
+    body = _encode(message)
 
-    # Abre um canal
-    ch = conn.channel()
+    for attempt in range(2):
+        ch = _get_channel()
+        try:
+            # Publica a mensagem
+            ch.basic_publish(
+                exchange="",              # Roteamento direto para a fila
+                routing_key=queue,        # Fila de destino
+                body=body,                # Corpo da mensagem
+                properties=_PROPERTIES    # Persistência da mensagem (salva em disco) e formato
+            )
+            break
+        except _RECONNECT_ERRORS as e:
+            _reset_channel()
+            if attempt == 1:
+                raise
+            log.warning("Conexão de publicação perdida (%s); reconectando...", e)
 
-    # Serializa o JSON 
-    body_json = json.dumps(message)
+    log.info("📤 [PUBLISH] Job %s enviado para -> %s", message["job_id"], queue)
 
-    # Publica a mensagem
-    ch.basic_publish(
-        exchange="",              # Roteamento direto para a fila
-        routing_key=queue,        # Fila de destino
-        body=body_json,           # Corpo da mensagem
-        properties=pika.BasicProperties(
-            delivery_mode=2      # Persistência da mensagem (salva em disco)
-        )
-    )
+# --------------------------------------------------------------------------------------------------------------------------------------
 
-    log.info(f"📤 [PUBLISH] Job {message['job_id']} enviado para -> {queue}")
-    conn.close()
+class DeadLetter(Exception):
+    """
+    Levantada por um handler para enviar a mensagem à DLQ.
+
+    Use quando o handler já registrou a falha (log/estado do job): consume() apenas
+    rejeita a mensagem (NACK sem requeue), sem registrar o traceback de novo.
+    """
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def consume(queue: str, handler: Callable[[Dict[str, Any]], None]):
+# Tempo máximo que ACKs acumulados esperam antes de serem enviados (segundos)
+ACK_FLUSH_SECONDS = 0.5
+
+
+def consume(
+    queue: str,
+    handler: Callable[[Dict[str, Any]], None],
+    prefetch_count: int = 1,
+    ack_every: int | None = None,
+):
     """
     Inicia um consumidor que escuta uma fila específica.
 
     - Recebe mensagens
-    - Desserializa JSON
+    - Desserializa a mensagem (JSON ou msgpack, pelo content_type)
     - Executa o handler fornecido
-    - Dá ACK se sucesso
+    - Dá ACK se sucesso (em lote: um basic_ack multiple=True a cada `ack_every`)
     - Dá NACK com requeue=False se erro → mensagem vai para DLQ
 
     Args:
         queue: Nome da fila a escutar
         handler: Função que processará cada mensagem
+        prefetch_count: Mensagens em voo por consumidor. 1 para etapas pesadas
+            (transcrição, edição); 32+ para etapas leves
+        ack_every: Confirma a cada N mensagens (padrão: prefetch_count).
+            ACKs pendentes são enviados após ACK_FLUSH_SECONDS se a fila esvaziar
     """
 
+    # Nunca acumula mais ACKs do que mensagens em voo (senão o consumidor trava)
+    ack_every = max(1, min(ack_every or prefetch_count, prefetch_count))
+
     # Conecta ao RabbitMQ
     conn = get_connection()
 
     # Abre um canal
     ch = conn.channel()
 
-    # Worker processa apenas uma mensagem por vez
-    ch.basic_qos(prefetch_count=1)
+    # Só declara as filas se nenhuma conexão do processo já o fez (ex.: no startup do worker)
+    if not _infra_done:
+        _ensure_infra(conn, ch)
+
+    # Limita as mensagens em voo (1 = worker processa uma mensagem por vez).
+    # Limite por consumidor (global_qos=False), só por quantidade (prefetch_size=0)
+    ch.basic_qos(prefetch_size=0, prefetch_count=prefetch_count, global_qos=False)
+
+    # ACKs acumulados: quantidade, último delivery_tag e se há flush agendado
+    pending = {"count": 0, "tag": None, "timer": False}
+
+    def _flush_acks():
+        """
+        Confirma de uma vez todas as mensagens processadas até o último delivery_tag.
+        """
+        pending["timer"] = False
+        if pending["tag"] is None:
+            return
+        ch.basic_ack(delivery_tag=pending["tag"], multiple=True)
+        pending["count"] = 0
+        pending["tag"] = None
 
     # Define a função de callback
     def _callback(ch, method, props, body):
@@ -223,23 +629,34 @@ def consume(queue: str, handler: Callable[[Dict[str, Any]], None]):
         """
         try:
             try:
-                # Desserializa o JSON
-                msg = json.loads(body.decode())
-            except json.JSONDecodeError:
+                # Desserializa a mensagem (JSON ou msgpack, pelo content_type)
+                msg = _decode(body, props)
+            except ValueError:
                 # Se a mensagem for inválida, envia para DLQ
-                log.error(f"Mensagem inválida recebida na fila {queue} — enviando para DLQ")
+                log.error("Mensagem inválida recebida na fila %s — enviando para DLQ", queue)
                 ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
                 return
 
             # Executa o handler
             handler(msg)
             
-            # Envia ACK
-            ch.basic_ack(delivery_tag=method.delivery_tag)
+            # Envia ACK (em lote quando ack_every > 1)
+            pending["count"] += 1
+            pending["tag"] = method.delivery_tag
+            if pending["count"] >= ack_every:
+                _flush_acks()
+            elif not pending["timer"]:
+                pending["timer"] = True
+                conn.call_later(ACK_FLUSH_SECONDS, _flush_acks)
+
+        except DeadLetter as e:
+            # Falha já registrada pelo handler: só rejeita, sem repetir o traceback
+            log.warning("Mensagem rejeitada na fila %s — enviando para DLQ (%s)", queue, e)
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
 
         except Exception as e:
-            log.exception(f"Erro crítico ao processar mensagem na fila {queue}:")
-            # Se houver erro, envia para DLQ
+            log.exception("Erro crítico ao processar mensagem na fila %s:", queue)
+            # Se houver erro, envia para DLQ (NACK sempre individual)
             ch.basic_nack(
                 delivery_tag=method.delivery_tag,
                 requeue=False  # Não volta para a fila principal → vai para DLQ
@@ -248,8 +665,106 @@ def consume(queue: str, handler: Callable[[Dict[str, Any]], None]):
     # Registra o consumidor
     ch.basic_consume(queue=queue, on_message_callback=_callback)
 
-    log.info(f"[CONSUMER] Aguardando mensagens na fila: {queue}...")
+    log.info("[CONSUMER] Aguardando mensagens na fila: %s...", queue)
 
     # Loop infinito ouvindo mensagens
     ch.start_consuming()
 
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def consume_batch(
+    queue: str,
+    handler: Callable[[Dict[str, Any]], None],
+    batch_size: int,
+    max_wait: float = 2.0,
+):
+    """
+    Consumidor em lote: junta até `batch_size` mensagens (ou o que chegar em
+    `max_wait` segundos) e executa o handler de todas ao mesmo tempo, em threads.
+
+    Útil quando o handler libera o GIL e o recurso atende chamadas concorrentes
+    (ex.: Whisper/CTranslate2 com num_workers > 1). O handler deve ser thread-safe:
+    publish() e o state_manager já são. Cada mensagem recebe seu próprio ACK/NACK
+    depois que o lote inteiro termina (DeadLetter/erro → DLQ, como em consume()).
+
+    Args:
+        queue: Nome da fila a escutar
+        handler: Função que processará cada mensagem
+        batch_size: Mensagens por lote (também usado como prefetch_count)
+        max_wait: Tempo máximo que um lote incompleto espera por mais mensagens
+    """
+
+    batch_size = max(1, batch_size)
+
+    conn = get_connection()
+    ch = conn.channel()
+
+    if not _infra_done:
+        _ensure_infra(conn, ch)
+
+    # O broker entrega no máximo um lote por vez
+    ch.basic_qos(prefetch_size=0, prefetch_count=batch_size, global_qos=False)
+
+    executor = ThreadPoolExecutor(max_workers=batch_size, thread_name_prefix=f"{queue}-batch")
+
+    # Mensagens aguardando o lote: (delivery_tag, mensagem) e o flush agendado (id do timer)
+    buffer: List[tuple] = []
+    state = {"timer": None}
+
+    def _run(msg: Dict[str, Any]) -> bool:
+        """
+        Executa o handler em uma thread do pool. Retorna True se a mensagem deve receber ACK.
+        """
+        try:
+            handler(msg)
+            return True
+        except DeadLetter as e:
+            log.warning("Mensagem rejeitada na fila %s — enviando para DLQ (%s)", queue, e)
+        except Exception:
+            log.exception("Erro crítico ao processar mensagem na fila %s:", queue)
+        return False
+
+    def _flush():
+        """
+        Processa o lote atual e confirma/rejeita cada mensagem individualmente.
+        """
+        if state["timer"] is not None:
+            conn.remove_timeout(state["timer"])
+            state["timer"] = None
+        if not buffer:
+            return
+
+        batch = buffer[:]
+        buffer.clear()
+        log.info("[CONSUMER] Processando lote de %d mensagem(ns) da fila %s", len(batch), queue)
+
+        # ACK/NACK só na thread da conexão (BlockingConnection não é thread-safe)
+        results = list(executor.map(_run, [msg for _, msg in batch]))
+        for (tag, _), ok in zip(batch, results):
+            if ok:
+                ch.basic_ack(delivery_tag=tag)
+            else:
+                ch.basic_nack(delivery_tag=tag, requeue=False)
+
+    def _callback(ch, method, props, body):
+        try:
+            msg = _decode(body, props)
+        except ValueError:
+            log.error("Mensagem inválida recebida na fila %s — enviando para DLQ", queue)
+            ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+            return
+
+        buffer.append((method.delivery_tag, msg))
+        if len(buffer) >= batch_size:
+            _flush()
+        elif state["timer"] is None:
+            state["timer"] = conn.call_later(max_wait, _flush)
+
+    ch.basic_consume(queue=queue, on_message_callback=_callback)
+
+    log.info("[CONSUMER] Aguardando mensagens na fila: %s (lotes de até %d)...", queue, batch_size)
+
+    try:
+        ch.start_consuming()
+    finally:
+        executor.shutdown(wait=True)
@@ -0,0 +1,91 @@
+import os  # Permite acessar variáveis de ambiente
+import orjson  # Serializa os resultados armazenados no Redis (UTF-8 direto, sem escapes)
+import hashlib  # Hash do conteúdo da transcrição (chave do cache)
+import logging  # Biblioteca padrão para registro de logs
+from typing import Any, Dict, List, Optional  # Tipagem
+
+from src.services.state_manager import get_redis_client
+
+log = logging.getLogger("result_cache")
+
+# Tempo de vida das entradas do cache (segundos). Padrão: 24h
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Tamanho do bloco lido ao calcular o hash de arquivos grandes
+_HASH_CHUNK_SIZE = 1 << 20
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def file_digest(path: str) -> str:
+    """
+    Calcula o hash (blake2b) do conteúdo de um arquivo, lendo em blocos.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def get_cached(kind: str, key: str) -> Optional[Any]:
+    """
+    Busca um resultado em cache (ex.: kind="analysis" ou "plan").
+    Retorna None em caso de miss ou se o Redis estiver indisponível.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        raw = client.get(f"{kind}:{key}")
+    except Exception as exc:
+        log.warning("Falha ao ler cache %s:%s (%s)", kind, key, exc)
+        return None
+    return orjson.loads(raw) if raw else None
+
+def get_cached_many(kind: str, keys: List[str]) -> List[Optional[Any]]:
+    """
+    Versão em lote de get_cached: um único MGET para todas as chaves.
+    Retorna um valor (ou None em caso de miss) por chave, na mesma ordem.
+    """
+    client = get_redis_client()
+    if client is None or not keys:
+        return [None] * len(keys)
+    try:
+        raws = client.mget([f"{kind}:{key}" for key in keys])
+    except Exception as exc:
+        log.warning("Falha ao ler cache %s (%d chaves) (%s)", kind, len(keys), exc)
+        return [None] * len(keys)
+    return [orjson.loads(raw) if raw else None for raw in raws]
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def set_cached(kind: str, key: str, value: Any, ttl: int = RESULT_CACHE_TTL) -> None:
+    """
+    Armazena um resultado em cache com expiração. Falhas são apenas registradas.
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        client.set(f"{kind}:{key}", orjson.dumps(value), ex=ttl)
+    except Exception as exc:
+        log.warning("Falha ao gravar cache %s:%s (%s)", kind, key, exc)
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def set_cached_many(kind: str, items: Dict[str, Any], ttl: int = RESULT_CACHE_TTL) -> None:
+    """
+    Versão em lote de set_cached: todos os SET (com expiração) em um único pipeline.
+    Falhas são apenas registradas.
+    """
+    client = get_redis_client()
+    if client is None or not items:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(f"{kind}:{key}", orjson.dumps(value), ex=ttl)
+        pipe.execute()
+    except Exception as exc:
+        log.warning("Falha ao gravar cache %s (%d chaves) (%s)", kind, len(items), exc)
@@ -1,10 +1,16 @@
 import os  # Permite acessar variáveis de ambiente e interagir com o SO
-import json  # Usado para serializar e desserializar dados em formato JSON
+import orjson  # Serialização rápida dos campos do estado
 import logging  # Biblioteca padrão para registro de logs
-import time # Permite adicionar delay entre tentativas
-from typing import Dict, Any  # Tipagem
+import threading  # Lock do cache local de estados
+import time  # Relógio monotônico para a expiração do cache
+from collections import OrderedDict  # Cache LRU de estados
+from contextlib import contextmanager  # Pipeline de escritas em lote
+from typing import Dict, Any, Iterator, List, Tuple  # Tipagem
 from dotenv import load_dotenv # Carrega variáveis de ambiente do arquivo .env
 import redis # Cliente oficial do Redis para Python
+from redis.backoff import ExponentialBackoff # Backoff entre tentativas de reconexão
+from redis.retry import Retry # Política de retry das conexões do pool
+from src.utils.logging_setup import configure_logging # Configuração única dos logs (stdout)
 
 load_dotenv()
 
@@ -12,48 +18,39 @@ load_dotenv()
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 # Configuração global dos logs
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+configure_logging()
 log = logging.getLogger("state_manager")
 
-# Cliente Redis global, reutilizável
+# Pool de conexões compartilhado pelo processo (thread-safe): keepalive, health check
+# periódico e retry com backoff exponencial em falhas de conexão/timeout
+_pool = redis.ConnectionPool.from_url(
+    REDIS_URL,
+    decode_responses=True,
+    max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "32")),
+    socket_keepalive=True,
+    socket_timeout=2,
+    health_check_interval=30,
+    retry=Retry(ExponentialBackoff(), 5),
+    retry_on_error=[redis.exceptions.ConnectionError, redis.exceptions.TimeoutError],
+)
+
+# Cliente Redis global, reutilizável (usa o pool acima)
 _redis_client: redis.Redis | None = None
 
-# --------------------------------------------------------------------------------------------------------------------------------------
-
-def _connect_redis(retries: int = 5, delay: int = 2) -> redis.Redis | None:
-    """
-    Realiza tentativas de conexão com o Redis e retorna o cliente válido.
-    """
-
-    # Tenta conectar ao Redis com retries tentativas e delay entre tentativas
-    for attempt in range(1, retries + 1):
-        try:
-            # Tenta conectar ao Redis
-            client = redis.from_url(REDIS_URL, decode_responses=True)
-
-            # Verifica se a conexão foi estabelecida
-            client.ping()
-
-            # Registra a conexão
-            log.info(f"Conexão com Redis estabelecida em: {REDIS_URL}")
-            return client
-
-        except redis.exceptions.ConnectionError as exc:
-            # Registra a falha
-            log.warning(f"Tentativa {attempt}/{retries} falhou ao conectar no Redis ({exc}).")
-
-            # Verifica se ainda há tentativas restantes
-            if attempt < retries:
-                time.sleep(delay)
-
-    log.error(f"Não foi possível conectar ao Redis em {REDIS_URL} após {retries} tentativas.")
-    return None # Retorna None se não foi possível conectar
+# Cache local (LRU com TTL curto) na frente de get_job_state: consultas repetidas de
+# status do mesmo job dentro do TTL não vão ao Redis. Atualizações feitas neste
+# processo invalidam a entrada; as feitas por outros processos aparecem após o TTL.
+STATE_CACHE_TTL = float(os.getenv("STATE_CACHE_TTL", "1.0"))
+STATE_CACHE_MAXSIZE = 10_000
+_state_cache: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+_state_cache_lock = threading.Lock()
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
 def get_redis_client() -> redis.Redis | None:
     """
     Retorna o cliente Redis reutilizável, conectando sob demanda.
+    Retorna None se o Redis estiver indisponível (após as tentativas do pool).
     """
 
     # Verifica se o cliente já foi conectado
@@ -61,7 +58,16 @@ def get_redis_client() -> redis.Redis | None:
     if _redis_client is not None:
         return _redis_client # Retorna o cliente se já foi conectado
 
-    _redis_client = _connect_redis() # Conecta ao Redis
+    client = redis.Redis(connection_pool=_pool)
+    try:
+        # Verifica se a conexão foi estabelecida
+        client.ping()
+    except redis.exceptions.RedisError as exc:
+        log.error(f"Não foi possível conectar ao Redis em {REDIS_URL} ({exc}).")
+        return None # Retorna None se não foi possível conectar
+
+    log.info(f"Conexão com Redis estabelecida em: {REDIS_URL}")
+    _redis_client = client
     return _redis_client # Retorna o cliente
 
 # --------------------------------------------------------------------------------------------------------------------------------------
@@ -83,11 +89,88 @@ def get_job_key(job_id: str) -> str:
     """
     return f"job:{job_id}"
 
+
+def get_job_events_channel(job_id: str) -> str:
+    """
+    Gera o canal pub/sub onde as mudanças de estado do job são anunciadas.
+    """
+    return f"job-events:{job_id}"
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def _encode_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Serializa cada campo individualmente (o hash guarda strings; JSON preserva tipos).
+    """
+    return {k: orjson.dumps(v).decode() for k, v in fields.items()}
+
+
+def _decode_fields(raw: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Desserializa os campos lidos com HGETALL.
+    """
+    return {k: orjson.loads(v) for k, v in raw.items()}
+
+
+# HSET apenas se o job já existir (e for um hash) e PUBLISH do evento no canal do job:
+# um único round-trip, atômico, sem recriar jobs desconhecidos.
+# ARGV = [canal, evento, campo1, valor1, campo2, valor2, ...]
+_HSET_IF_EXISTS_LUA = """
+if redis.call('TYPE', KEYS[1])['ok'] ~= 'hash' then
+    return -1
+end
+local updated = redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('PUBLISH', ARGV[1], ARGV[2])
+return updated
+"""
+
+# Script registrado (EVALSHA: o corpo do script não é reenviado a cada atualização)
+_hset_if_exists = None
+
+
+def _get_hset_script(client: redis.Redis):
+    global _hset_if_exists
+    if _hset_if_exists is None:
+        _hset_if_exists = client.register_script(_HSET_IF_EXISTS_LUA)
+    return _hset_if_exists
+
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def initialize_job(job_id: str, url: str):
+@contextmanager
+def pipeline() -> Iterator[redis.client.Pipeline | None]:
     """
-    Inicializa um job no Redis.
+    Agrupa várias escritas de estado em um único round-trip ao Redis.
+
+    Passe o pipeline como `pipe=` para initialize_job/update_job_state; os comandos
+    são enviados juntos ao sair do bloco (e descartados se o bloco levantar exceção).
+    Gera None se o Redis estiver indisponível (as funções apenas registram o aviso).
+    """
+    client = get_redis_client()
+    if client is None:
+        yield None
+        return
+
+    pipe = client.pipeline(transaction=False)
+    try:
+        yield pipe
+    except BaseException:
+        pipe.reset()
+        raise
+    pipe.execute()
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def initialize_job(
+    job_id: str,
+    url: str,
+    pipe: redis.client.Pipeline | None = None,
+    data: Dict[str, Any] | None = None,
+):
+    """
+    Inicializa um job no Redis (hash com um campo por atributo do estado).
+
+    `data` acrescenta (ou substitui, ex.: current_step) campos do estado inicial,
+    gravados no mesmo HSET. Com `pipe` (ver pipeline()), os comandos são apenas enfileirados.
     """
 
     # Conecta ao Redis 
@@ -105,16 +188,47 @@ def initialize_job(job_id: str, url: str):
         "progress": 0, # Progresso do job
         "created_at": os.getenv("CURRENT_TIME") or "unknown" # Data de criação do job
     }
+    if data:
+        initial_state.update(data)
+
+    # Salva o job no Redis (substitui um estado anterior com o mesmo ID)
+    key = get_job_key(job_id)
+    target = pipe if pipe is not None else client.pipeline()
+    target.delete(key)
+    target.hset(key, mapping=_encode_fields(initial_state))
+    if pipe is None:
+        target.execute()
+    _invalidate_cached_state(job_id)
+    log.info("Job %s inicializado no Redis com status: %s", job_id, initial_state["status"])
 
-    # Salva o job no Redis
-    client.set(get_job_key(job_id), json.dumps(initial_state))
-    log.info(f"Job {job_id} inicializado no Redis com status: {JobStatus.PENDING}")
+
+def initialize_many(jobs: List[Tuple[str, str, Dict[str, Any] | None]]):
+    """
+    Inicializa vários jobs (job_id, url, data) em um único round-trip ao Redis.
+
+    Cada job é gravado com um único HSET (estado inicial + `data`).
+    """
+    with pipeline() as pipe:
+        if pipe is None:
+            log.warning("Redis não conectado. Estado não será persistido.")
+            return
+        for job_id, url, data in jobs:
+            initialize_job(job_id, url, pipe=pipe, data=data)
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
-def update_job_state(job_id: str, status: str, current_step: str, data: Dict[str, Any] = None):
+def update_job_state(
+    job_id: str,
+    status: str,
+    current_step: str,
+    data: Dict[str, Any] = None,
+    pipe: redis.client.Pipeline | None = None,
+):
     """
     Atualiza o estado de um job no Redis.
+
+    Grava apenas os campos alterados (HSET), sem ler nem reserializar o estado inteiro.
+    Com `pipe` (ver pipeline()), o comando é apenas enfileirado.
     """
 
     # Conecta ao Redis
@@ -123,32 +237,73 @@ def update_job_state(job_id: str, status: str, current_step: str, data: Dict[str
         log.warning("Redis não conectado. Estado não será atualizado.")
         return
 
+    # Campos alterados
+    fields = {"status": status, "current_step": current_step}
+    if data:
+        fields.update(data)
+
+    # Evento anunciado aos assinantes (UI, outros workers) no lugar de polling
+    event = orjson.dumps({"job_id": job_id, "status": status, "step": current_step}).decode()
+
+    args = [get_job_events_channel(job_id), event]
+    for name, value in _encode_fields(fields).items():
+        args.extend((name, value))
+
     # Atualiza o job no Redis
-    key = get_job_key(job_id) 
-    current_state_json = client.get(key) # 
-    if not current_state_json:
-        log.warning(f"Tentativa de atualizar job {job_id}, mas não encontrado no Redis.")
+    script = _get_hset_script(client)
+    if pipe is not None:
+        script(keys=[get_job_key(job_id)], args=args, client=pipe)
+        _invalidate_cached_state(job_id)
         return
 
-    # Atualiza o job no Redis
-    current_state = json.loads(current_state_json)
-    current_state["status"] = status
-    current_state["current_step"] = current_step
+    updated = script(keys=[get_job_key(job_id)], args=args, client=client)
+    _invalidate_cached_state(job_id)
+    if updated == -1:
+        log.warning("Tentativa de atualizar job %s, mas não encontrado no Redis.", job_id)
+        return
+
+    log.info("Job %s atualizado. Status: %s, Passo: %s", job_id, status, current_step)
+
+# --------------------------------------------------------------------------------------------------------------------------------------
 
-    if data: 
-        current_state.update(data) 
+def _get_cached_state(job_id: str) -> Dict[str, Any] | None:
+    with _state_cache_lock:
+        entry = _state_cache.get(job_id)
+        if entry is None:
+            return None
+        expires_at, state = entry
+        if expires_at < time.monotonic():
+            del _state_cache[job_id]
+            return None
+        _state_cache.move_to_end(job_id)
+    return dict(state) # Cópia: quem chama pode alterar o dicionário
 
-    # Salva o job no Redis
-    client.set(key, json.dumps(current_state)) 
-    log.info(f"Job {job_id} atualizado. Status: {status}, Passo: {current_step}")
+
+def _set_cached_state(job_id: str, state: Dict[str, Any]):
+    with _state_cache_lock:
+        _state_cache[job_id] = (time.monotonic() + STATE_CACHE_TTL, dict(state))
+        _state_cache.move_to_end(job_id)
+        if len(_state_cache) > STATE_CACHE_MAXSIZE:
+            _state_cache.popitem(last=False) # Remove o menos usado
+
+
+def _invalidate_cached_state(job_id: str):
+    with _state_cache_lock:
+        _state_cache.pop(job_id, None)
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
 def get_job_state(job_id: str) -> Dict[str, Any] | None:
     """
     Recupera o estado de um job no Redis.
+
+    Leituras repetidas dentro de STATE_CACHE_TTL segundos são servidas do cache local.
     """
 
+    cached = _get_cached_state(job_id)
+    if cached is not None:
+        return cached
+
     # Conecta ao Redis
     client = get_redis_client()
     if client is None:
@@ -156,7 +311,54 @@ def get_job_state(job_id: str) -> Dict[str, Any] | None:
         return None
 
     # Recupera o job no Redis
-    state_json = client.get(get_job_key(job_id))
-    if state_json:
-        return json.loads(state_json)
-    return None # Retorna None se não encontrado
\ No newline at end of file
+    key = get_job_key(job_id)
+    try:
+        raw = client.hgetall(key)
+    except redis.exceptions.ResponseError:
+        # Job gravado no formato antigo (string JSON)
+        state_json = client.get(key)
+        state = orjson.loads(state_json) if state_json else None
+    else:
+        state = _decode_fields(raw) if raw else None
+
+    if state is not None:
+        _set_cached_state(job_id, state)
+        return dict(state)
+    return None # Retorna None se não encontrado
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+def listen_job_events(job_id: str, timeout: float | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Gera os eventos de estado de um job à medida que são publicados por update_job_state.
+
+    Termina quando o job chega a COMPLETED/FAILED ou quando nenhum evento chega em
+    `timeout` segundos (None = espera indefinidamente).
+    """
+
+    # Conecta ao Redis
+    client = get_redis_client()
+    if client is None:
+        log.warning("Redis não conectado. Não é possível acompanhar o job.")
+        return
+
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(get_job_events_channel(job_id))
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        while True:
+            # socket_timeout do pool é curto: espera em fatias de até 1s e controla o prazo aqui
+            message = pubsub.get_message(timeout=1.0)
+            if message is None:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return
+                continue
+
+            event = orjson.loads(message["data"])
+            yield event
+            if event.get("status") in (JobStatus.COMPLETED, JobStatus.FAILED):
+                return
+            if deadline is not None:
+                deadline = time.monotonic() + timeout
+    finally:
+        pubsub.close()
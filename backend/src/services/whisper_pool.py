@@ -0,0 +1,25 @@
+import asyncio  # Ponte entre o grafo assíncrono e o Whisper (bloqueante)
+import functools  # Empacota argumentos nomeados para o executor
+from concurrent.futures import ThreadPoolExecutor  # Pool de threads compartilhado
+from typing import Any, Callable
+
+# Número de transcrições simultâneas. Deve acompanhar o `num_workers` do WhisperModel
+# (ver transcriber.get_model): cada worker do CTranslate2 atende uma chamada por vez.
+WHISPER_NUM_WORKERS = 4
+
+# Pool único por processo, compartilhado por todos os nós/execuções do grafo
+_executor = ThreadPoolExecutor(max_workers=WHISPER_NUM_WORKERS, thread_name_prefix="whisper")
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+async def transcribe_async(func: Callable[..., Any], **kwargs) -> Any:
+    """
+    Executa uma função de transcrição (ex.: transcrever_video_local) no pool do Whisper.
+
+    O modelo é carregado uma única vez (transcriber.get_model); execuções
+    concorrentes do grafo compartilham o mesmo modelo e ficam limitadas a
+    WHISPER_NUM_WORKERS transcrições simultâneas, sem bloquear o event loop.
+    """
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(_executor, functools.partial(func, **kwargs))
@@ -5,11 +5,20 @@ This module provides functions to divide long transcriptions into smaller chunks
 that fit within token limits while preserving context through overlapping segments.
 """
 
-from typing import List, Dict, Any
+from dataclasses import dataclass
+import functools
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple
 import logging
+import warnings
+
+import numpy as np
 
 log = logging.getLogger("chunking")
 
+# C-level field access for the common case where every segment has "text"
+_get_text = itemgetter("text")
+
 
 def create_chunks_from_segments(
     segments: List[Dict[str, Any]],
@@ -49,55 +58,116 @@ def create_chunks_from_segments(
         log.warning("create_chunks_from_segments called with empty segments list")
         return []
 
+    log.info("Creating chunks with duration=%ss, overlap=%ss", chunk_duration_seconds, overlap_seconds)
+
+    debug = log.isEnabledFor(logging.DEBUG)
     chunks = []
-    current_chunk = []
-    chunk_start_time = 0.0
-    chunk_end_time = chunk_duration_seconds
+    for lo, hi in chunk_ranges(Segments.from_list(segments), chunk_duration_seconds, overlap_seconds):
+        chunk = segments[lo:hi]
+        chunks.append(chunk)
+        if debug:
+            log.debug(
+                "Chunk %d created: %d segments, duration: %.1fs - %.1fs",
+                len(chunks), len(chunk), chunk[0].get("start", 0.0), chunk[-1].get("end", 0.0),
+            )
+
+    log.info("Created %d chunks from %d segments", len(chunks), len(segments))
+    return chunks
 
-    log.info(
-        f"Creating chunks with duration={chunk_duration_seconds}s, overlap={overlap_seconds}s"
-    )
 
-    for segment in segments:
-        segment_start = segment.get("start", 0.0)
-        segment_end = segment.get("end", 0.0)
-
-        # Add segment to current chunk if it starts before chunk end time
-        if segment_start < chunk_end_time:
-            current_chunk.append(segment)
-        else:
-            # Save current chunk and start new one
-            if current_chunk:
-                chunks.append(current_chunk)
-                log.debug(
-                    f"Chunk {len(chunks)} created: {len(current_chunk)} segments, "
-                    f"duration: {current_chunk[0]['start']:.1f}s - {current_chunk[-1]['end']:.1f}s"
-                )
-
-            # Calculate new chunk boundaries with overlap
-            chunk_start_time = chunk_end_time - overlap_seconds
-            chunk_end_time = chunk_start_time + chunk_duration_seconds
-
-            # Start new chunk with overlapping segments
-            current_chunk = []
-            # Add segments from overlap period
-            for prev_seg in chunks[-1] if chunks else []:
-                if prev_seg.get("start", 0.0) >= chunk_start_time:
-                    current_chunk.append(prev_seg)
-
-            # Add current segment
-            current_chunk.append(segment)
-
-    # Don't forget the last chunk
-    if current_chunk:
-        chunks.append(current_chunk)
-        log.debug(
-            f"Chunk {len(chunks)} (final) created: {len(current_chunk)} segments, "
-            f"duration: {current_chunk[0]['start']:.1f}s - {current_chunk[-1]['end']:.1f}s"
+@dataclass
+class Segments:
+    """
+    Column-oriented view of transcription segments.
+
+    Built once per transcription so chunking works on contiguous arrays and
+    index ranges instead of re-reading every segment dict.
+    """
+    starts: np.ndarray
+    ends: np.ndarray
+    texts: List[str]
+
+    @classmethod
+    def from_list(cls, segments: List[Dict[str, Any]]) -> "Segments":
+        """Builds the columns from a list of Whisper segment dicts (ordered by start)."""
+        return cls(
+            starts=np.fromiter((s.get("start", 0.0) for s in segments), dtype=np.float64, count=len(segments)),
+            ends=np.fromiter((s.get("end", 0.0) for s in segments), dtype=np.float64, count=len(segments)),
+            texts=[s.get("text", "") for s in segments],
         )
 
-    log.info(f"Created {len(chunks)} chunks from {len(segments)} segments")
-    return chunks
+    def __len__(self) -> int:
+        return len(self.texts)
+
+
+def chunk_ranges(
+    segments: Segments,
+    chunk_duration_seconds: int = 360,
+    overlap_seconds: int = 30
+) -> List[Tuple[int, int]]:
+    """
+    Computes chunk boundaries as (lo, hi) index ranges over ``segments``.
+
+    Same windows as :func:`create_chunks_from_segments`: each chunk covers
+    ``chunk_duration_seconds`` and starts with the segments of the previous
+    chunk's last ``overlap_seconds``.
+
+    Args:
+        segments: Column view of the transcription segments
+        chunk_duration_seconds: Target duration for each chunk in seconds
+        overlap_seconds: Overlap duration between consecutive chunks
+
+    Returns:
+        List of (lo, hi) ranges; chunk i is ``segments[lo:hi]``
+    """
+    total = len(segments)
+    if total == 0:
+        return []
+
+    starts = segments.starts
+    ranges = []
+    begin = 0       # First segment of the current chunk (including overlap)
+    first_new = 0   # First segment not already emitted in a previous chunk
+    chunk_end_time = chunk_duration_seconds
+
+    # Same re-anchoring as for gaps: a transcription whose first segment starts
+    # after the first window anchors that window at the first segment
+    if float(starts[0]) >= chunk_duration_seconds:
+        chunk_end_time = float(starts[0]) + chunk_duration_seconds
+
+    while True:
+        # Segments starting before the chunk end (always at least one new segment)
+        cut = max(int(np.searchsorted(starts, chunk_end_time)), first_new + 1)
+        ranges.append((begin, cut))
+        if cut >= total:
+            break
+
+        # The next window normally starts where this one ends; if the next segment
+        # would not even fit in it (a gap longer than a chunk), it follows the segment
+        boundary = chunk_end_time
+        next_start = float(starts[cut])
+        if next_start >= boundary - overlap_seconds + chunk_duration_seconds:
+            boundary = next_start
+
+        # Next chunk starts with the segments of the overlap window
+        overlap_idx = int(np.searchsorted(starts, boundary - overlap_seconds))
+        begin = min(max(overlap_idx, begin), cut)
+        chunk_end_time = boundary - overlap_seconds + chunk_duration_seconds
+        first_new = cut
+
+    return ranges
+
+
+def chunk_text(segments: Segments, lo: int, hi: int) -> str:
+    """Text of the chunk ``segments[lo:hi]``, space-separated."""
+    return " ".join(segments.texts[lo:hi]).strip()
+
+
+def chunk_time_range(segments: Segments, lo: int, hi: int) -> tuple[float, float]:
+    """Time range (start, end) of the chunk ``segments[lo:hi]``."""
+    if hi <= lo:
+        return (0.0, 0.0)
+    return (float(segments.starts[lo]), float(segments.ends[hi - 1]))
 
 
 def get_chunk_text(chunk: List[Dict[str, Any]]) -> str:
@@ -110,7 +180,10 @@ def get_chunk_text(chunk: List[Dict[str, Any]]) -> str:
     Returns:
         Concatenated text from all segments, space-separated
     """
-    return " ".join(segment.get("text", "") for segment in chunk).strip()
+    try:
+        return " ".join(map(_get_text, chunk)).strip()
+    except KeyError:
+        return " ".join(segment.get("text", "") for segment in chunk).strip()
 
 
 def get_chunk_time_range(chunk: List[Dict[str, Any]]) -> tuple[float, float]:
@@ -133,12 +206,34 @@ def get_chunk_time_range(chunk: List[Dict[str, Any]]) -> tuple[float, float]:
     return (start_time, end_time)
 
 
+@functools.lru_cache(maxsize=1)
+def _encoder():
+    """
+    Returns the tiktoken encoder, or None to use the ~4 chars/token heuristic.
+
+    Loaded on first use, not at import: on a cold cache tiktoken downloads the
+    BPE file, which must not block (or fail) importing this module. Any failure
+    (tiktoken missing, no network) falls back to the heuristic for the process.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        log.debug("tiktoken not installed; token counts use the ~4 chars/token heuristic")
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:
+        log.warning("Could not load tiktoken encoding (%s); token counts use the ~4 chars/token heuristic", exc)
+        return None
+
+
 def estimate_tokens(text: str) -> int:
     """
     Estimates the number of tokens in a text string.
 
-    Uses a simple heuristic: ~4 characters per token (common for English/Portuguese).
-    This is a rough estimate; actual token count depends on the tokenizer.
+    Uses tiktoken's cl100k_base encoding when installed. Gemini uses its own
+    tokenizer, so this is still an estimate, but much closer than the
+    fallback heuristic of ~4 characters per token.
 
     Args:
         text: Input text string
@@ -146,27 +241,59 @@ def estimate_tokens(text: str) -> int:
     Returns:
         Estimated token count
     """
-    return len(text) // 4
+    encoder = _encoder()
+    if encoder is None:
+        return len(text) // 4
+    return len(encoder.encode_ordinary(text))
+
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    """
+    Estimates token counts for several texts in one call (encoded in parallel by tiktoken).
+
+    Args:
+        texts: List of text strings (e.g. the texts of all chunks)
+
+    Returns:
+        List of token counts, in the same order as ``texts``
+    """
+    encoder = _encoder()
+    if encoder is None:
+        return [len(text) // 4 for text in texts]
+    return [len(tokens) for tokens in encoder.encode_ordinary_batch(texts)]
 
 
-def should_use_chunking(transcription_text: str, threshold_chars: int = 20000) -> bool:
+def should_use_chunking(
+    transcription_text: str,
+    threshold_tokens: int = 6000,
+    threshold_chars: Optional[int] = None,
+) -> bool:
     """
     Determines if a transcription should be processed using chunking.
 
     Args:
         transcription_text: Full transcription text
-        threshold_chars: Character count threshold for using chunking (default: 20000)
+        threshold_tokens: Token count threshold for using chunking (default: 6000)
+        threshold_chars: Deprecated character threshold; converted to tokens
+            (~4 chars/token) and used instead of ``threshold_tokens`` when given
 
     Returns:
         True if transcription should be chunked, False otherwise
     """
-    text_length = len(transcription_text)
-    use_chunking = text_length > threshold_chars
+    if threshold_chars is not None:
+        warnings.warn(
+            "should_use_chunking(threshold_chars=...) is deprecated; use threshold_tokens",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        threshold_tokens = threshold_chars // 4
+
+    token_count = estimate_tokens(transcription_text)
+    use_chunking = token_count > threshold_tokens
 
     log.info(
-        f"Transcription length: {text_length} chars, "
-        f"threshold: {threshold_chars} chars, "
-        f"use_chunking: {use_chunking}"
+        "Transcription size: %d tokens, threshold: %d tokens, use_chunking: %s",
+        token_count, threshold_tokens, use_chunking,
     )
 
     return use_chunking
@@ -0,0 +1,65 @@
+"""
+Serialization of pipeline artifacts (transcriptions passed between workers).
+
+The format is chosen by file suffix: ``.msgpack`` files use MessagePack,
+anything else is JSON. Readers accept both, so producers can switch formats
+without coordinating with consumers.
+"""
+
+import logging
+import mmap
+import os
+from typing import Any
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON is always available
+    msgpack = None
+
+log = logging.getLogger("codec")
+
+MSGPACK_SUFFIX = ".msgpack"
+
+# Format used by producers for new artifacts: "json" (default) or "msgpack"
+ARTIFACT_FORMAT = os.getenv("CORTAI_ARTIFACT_FORMAT", "json").lower()
+
+
+def artifact_suffix() -> str:
+    """Returns the suffix for new artifacts, falling back to JSON if msgpack is missing."""
+    if ARTIFACT_FORMAT == "msgpack":
+        if msgpack is not None:
+            return MSGPACK_SUFFIX
+        log.warning("CORTAI_ARTIFACT_FORMAT=msgpack but msgpack is not installed; using JSON")
+    return ".json"
+
+
+def dump_artifact(obj: Any, path: str) -> None:
+    """Writes ``obj`` to ``path`` in the format implied by its suffix."""
+    if path.endswith(MSGPACK_SUFFIX):
+        payload = msgpack.packb(obj, use_bin_type=True)
+    else:
+        payload = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    with open(path, "wb") as f:
+        f.write(payload)
+
+
+def load_artifact(path: str) -> Any:
+    """
+    Reads an artifact written by :func:`dump_artifact` (or any JSON file).
+
+    The file is memory-mapped and parsed straight from the mapping, so large
+    transcriptions are not first copied into a Python bytes object.
+    """
+    decode = _unpack if path.endswith(MSGPACK_SUFFIX) else orjson.loads
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return decode(b"")  # mmap can't map empty files; let the decoder raise
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return decode(view)
+
+
+def _unpack(buf) -> Any:
+    return msgpack.unpackb(buf, raw=False)
@@ -0,0 +1,76 @@
+"""
+Filesystem helpers for the queue workers.
+
+``wait_for_file`` waits for files written by another worker (transcriptions,
+segments). On Linux with ``inotify_simple`` installed the wait blocks on an
+inotify watch of the parent directory and wakes as soon as the writer closes
+the file. Elsewhere it falls back to polling ``os.path.exists``.
+"""
+
+import functools
+import logging
+import os
+import time
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # Optional: polling is always available
+    INotify = None
+
+log = logging.getLogger("fswait")
+
+
+@functools.lru_cache(maxsize=1024)
+def ensure_dir(path: str) -> None:
+    """
+    ``os.makedirs(path, exist_ok=True)``, done once per path per process.
+
+    Workers write many files into a few job directories; repeated calls for
+    the same directory skip the stat walk. Directories removed while the
+    worker runs are not recreated.
+    """
+    os.makedirs(path, exist_ok=True)
+
+
+def wait_for_file(path: str, timeout: float, poll_interval: float = 0.5) -> bool:
+    """
+    Waits up to ``timeout`` seconds for ``path`` to exist.
+
+    Returns True as soon as the file is present, False on timeout.
+    """
+    if INotify is not None:
+        try:
+            return _wait_inotify(path, timeout)
+        except OSError as exc:  # Missing directory, watch limit reached, ...
+            log.debug("inotify wait unavailable for %s (%s); polling", path, exc)
+    return _wait_poll(path, timeout, poll_interval)
+
+
+def _wait_inotify(path: str, timeout: float) -> bool:
+    directory = os.path.dirname(path) or "."
+    name = os.path.basename(path)
+    deadline = time.monotonic() + timeout
+
+    with INotify() as inotify:
+        # Watch first, then check: a file created in between is not missed
+        inotify.add_watch(directory, flags.CLOSE_WRITE | flags.MOVED_TO)
+        if os.path.exists(path):
+            return True
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return os.path.exists(path)
+            events = inotify.read(timeout=int(remaining * 1000))
+            if any(event.name == name for event in events):
+                return True
+
+
+def _wait_poll(path: str, timeout: float, poll_interval: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(poll_interval, remaining))
+    return True
@@ -0,0 +1,28 @@
+"""
+Logging configuration shared by the queue workers.
+"""
+
+import logging
+import os
+import sys
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def configure_logging(level: str | int | None = None) -> None:
+    """
+    Installs a single stdout handler on the root logger.
+
+    Does nothing if the root logger already has handlers, so importing several
+    modules that call it (or running under a host that configured logging)
+    never stacks handlers. The level defaults to the LOGLEVEL env var (INFO),
+    the same variable the API reads in src/main.py.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(level or os.getenv("LOGLEVEL", "INFO").upper())
@@ -3,107 +3,195 @@ Centraliza chamadas seguras a APIs externas (Gemini, YouTube, etc.)
 Garantindo que qualquer exceção seja capturada e nunca quebre o fluxo do LangGraph.
 """
 
+import asyncio
+import hashlib
 import logging
+import os
+
+from src.services.result_cache import get_cached, set_cached
 
 # Configuração básica do logger
 log = logging.getLogger("safe_api")
 
-# Mapeamento de finish_reason do Gemini API
-FINISH_REASONS = {
-    0: "UNSPECIFIED",
-    1: "STOP",
-    2: "MAX_TOKENS",
-    3: "SAFETY",
-    4: "RECITATION",
-    5: "OTHER"
+# Tempo de vida (segundos) das respostas do LLM memorizadas no Redis. 0 desativa o cache
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+
+# Nomes de finish_reason do Gemini API, indexados pelo código (0-5)
+FINISH_REASONS = ("UNSPECIFIED", "STOP", "MAX_TOKENS", "SAFETY", "RECITATION", "OTHER")
+
+
+def _finish_reason_name(code) -> str:
+    if code is None:
+        return "UNKNOWN"
+    return FINISH_REASONS[code] if 0 <= code < len(FINISH_REASONS) else f"UNKNOWN({code})"
+
+
+# Mensagens de erro dos finish_reason que interrompem a resposta (código -> handler(safety_ratings))
+def _max_tokens_error(safety_ratings) -> str:
+    return (
+        "Limite de tokens atingido (finish_reason=MAX_TOKENS). "
+        "O prompt ou a resposta esperada é muito longa. "
+        "Considere aumentar max_output_tokens ou dividir a transcrição em chunks menores."
+    )
+
+
+def _safety_error(safety_ratings) -> str:
+    error_msg = "Conteúdo bloqueado por filtros de segurança (finish_reason=SAFETY)."
+    if safety_ratings:
+        error_msg += f" Safety ratings: {safety_ratings}"
+    return error_msg
+
+
+def _recitation_error(safety_ratings) -> str:
+    return "Conteúdo bloqueado por detecção de recitação (finish_reason=RECITATION)."
+
+
+FINISH_REASON_ERRORS = {
+    2: _max_tokens_error,  # MAX_TOKENS
+    3: _safety_error,  # SAFETY
+    4: _recitation_error,  # RECITATION
 }
 
 
+def _prompt_key(model, prompt: str) -> str:
+    """
+    Chave de cache de um prompt: hash (blake2b) do nome do modelo + prompt.
+    """
+    name = getattr(model, "model_name", "")
+    return hashlib.blake2b(f"{name}|{prompt}".encode(), digest_size=16).hexdigest()
+
+
 # CHAMADA SEGURA A MODELOS LLM (GEMINI)
-def safe_llm_call(model, prompt: str):
+def safe_llm_call(model, prompt: str, cache_ttl: int = LLM_CACHE_TTL):
     """
     Executa uma chamada segura ao modelo Gemini.
 
+    Respostas bem-sucedidas ficam em cache no Redis por `cache_ttl` segundos: prompts
+    idênticos (reexecuções, retries) não chamam o Gemini de novo.
+
     Args:
         model: instância de google.generativeai.GenerativeModel
         prompt (str): texto enviado ao LLM
+        cache_ttl (int): validade do cache em segundos (0 desativa)
 
     Returns:
         tuple:
             (response_text | None, error_message | None)
     """
+    key = _prompt_key(model, prompt) if cache_ttl else None
+    if key:
+        cached = get_cached("llm", key)
+        if cached is not None:
+            log.info("Resposta do LLM obtida do cache (%s)", key)
+            return cached, None
+
     try:
         # Log do tamanho do prompt para debugging
-        prompt_size = len(prompt)
-        log.info(f"Enviando prompt ao Gemini (tamanho: {prompt_size} caracteres)")
+        log.info("Enviando prompt ao Gemini (tamanho: %d caracteres)", len(prompt))
 
         response = model.generate_content(prompt)
+        text, error = _interpret_response(response)
+
+    except Exception as e:
+        log.exception(f"Erro durante chamada ao LLM: {e}")
+        return None, str(e)
+
+    if key and text is not None:
+        set_cached("llm", key, text, ttl=cache_ttl)
+    return text, error
+
+
+async def safe_llm_call_async(model, prompt: str, cache_ttl: int = LLM_CACHE_TTL):
+    """
+    Versão assíncrona de safe_llm_call (usa model.generate_content_async).
+
+    Returns:
+        tuple:
+            (response_text | None, error_message | None)
+    """
+    key = _prompt_key(model, prompt) if cache_ttl else None
+    if key:
+        cached = await asyncio.to_thread(get_cached, "llm", key)
+        if cached is not None:
+            log.info("Resposta do LLM obtida do cache (%s)", key)
+            return cached, None
+
+    try:
+        log.info("Enviando prompt ao Gemini (tamanho: %d caracteres)", len(prompt))
+
+        response = await model.generate_content_async(prompt)
+        text, error = _interpret_response(response)
+
+    except Exception as e:
+        log.exception(f"Erro durante chamada ao LLM: {e}")
+        return None, str(e)
+
+    if key and text is not None:
+        await asyncio.to_thread(set_cached, "llm", key, text, cache_ttl)
+    return text, error
+
+
+async def safe_llm_call_batch(model, prompts, concurrency: int = 8, cache_ttl: int = LLM_CACHE_TTL):
+    """
+    Envia vários prompts em paralelo (no máximo `concurrency` simultâneos).
+
+    Returns:
+        list[tuple]: um (response_text | None, error_message | None) por prompt, na mesma ordem
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(prompt: str):
+        async with semaphore:
+            return await safe_llm_call_async(model, prompt, cache_ttl)
+
+    return await asyncio.gather(*(_one(p) for p in prompts))
+
+
+def _interpret_response(response):
+    """
+    Extrai o texto de uma resposta do Gemini, tratando finish_reason e bloqueios.
+
+    Returns:
+        tuple:
+            (response_text | None, error_message | None)
+    """
+    try:
+        # Primeiro candidato (None se a resposta não tiver candidatos)
+        candidates = getattr(response, "candidates", None) if response else None
+        cand = candidates[0] if candidates else None
 
         # Captura finish_reason e decodifica
-        finish_reason_code = None
-        finish_reason_name = "UNKNOWN"
-        if response and response.candidates:
-            try:
-                finish_reason_code = response.candidates[0].finish_reason
-                finish_reason_name = FINISH_REASONS.get(finish_reason_code, f"UNKNOWN({finish_reason_code})")
-            except Exception:
-                pass
+        finish_reason_code = getattr(cand, "finish_reason", None)
+        finish_reason_name = _finish_reason_name(finish_reason_code)
 
         # Captura prompt_feedback (bloqueios antes da geração)
-        prompt_feedback = None
-        if response:
-            try:
-                prompt_feedback = response.prompt_feedback
-            except Exception:
-                pass
+        prompt_feedback = getattr(response, "prompt_feedback", None) if response else None
 
         # Captura safety_ratings
-        safety_ratings = None
-        if response and response.candidates:
-            try:
-                safety_ratings = response.candidates[0].safety_ratings
-            except Exception:
-                pass
+        safety_ratings = getattr(cand, "safety_ratings", None)
 
         # Log detalhado do finish_reason
-        log.info(f"Resposta recebida - finish_reason: {finish_reason_name} (code={finish_reason_code})")
+        log.info("Resposta recebida - finish_reason: %s (code=%s)", finish_reason_name, finish_reason_code)
 
         # Tratamento específico por finish_reason
-        if finish_reason_code == 2:  # MAX_TOKENS
-            error_msg = (
-                f"Limite de tokens atingido (finish_reason=MAX_TOKENS). "
-                f"O prompt ou a resposta esperada é muito longa. "
-                f"Considere aumentar max_output_tokens ou dividir a transcrição em chunks menores."
-            )
-            log.warning(error_msg)
-            return None, error_msg
-
-        elif finish_reason_code == 3:  # SAFETY
-            error_msg = f"Conteúdo bloqueado por filtros de segurança (finish_reason=SAFETY)."
-            if safety_ratings:
-                error_msg += f" Safety ratings: {safety_ratings}"
+        error_handler = FINISH_REASON_ERRORS.get(finish_reason_code)
+        if error_handler is not None:
+            error_msg = error_handler(safety_ratings)
             log.warning(error_msg)
             return None, error_msg
 
-        elif finish_reason_code == 4:  # RECITATION
-            error_msg = "Conteúdo bloqueado por detecção de recitação (finish_reason=RECITATION)."
-            log.warning(error_msg)
-            return None, error_msg
+        # Extrai o texto direto das partes do candidato (response.text lança exceção
+        # quando não há partes, ex.: prompt bloqueado)
+        content = getattr(cand, "content", None)
+        parts = getattr(content, "parts", None)
+        if response and not parts:
+            msg = f"LLM sem texto retornado (finish_reason={finish_reason_name})"
+            if prompt_feedback:
+                msg += f" | prompt_feedback: {prompt_feedback}"
+            log.error(msg)
+            return None, msg
 
-        # Tenta extrair o texto com segurança
-        text = None
-        if response:
-            try:
-                text = response.text.strip()
-            except Exception as inner:
-                msg = f"LLM sem texto retornado (finish_reason={finish_reason_name})"
-                inner_msg = str(inner).strip()
-                if inner_msg:
-                    msg = f"{msg}: {inner_msg}"
-                if prompt_feedback:
-                    msg += f" | prompt_feedback: {prompt_feedback}"
-                log.error(msg)
-                return None, msg
+        text = "".join(getattr(part, "text", "") or "" for part in parts).strip() if parts else None
 
         if not text:
             msg = f"LLM retornou resposta vazia (finish_reason={finish_reason_name})"
@@ -112,9 +200,9 @@ def safe_llm_call(model, prompt: str):
             log.warning(msg)
             return None, msg
 
-        log.info(f"Resposta extraída com sucesso (tamanho: {len(text)} caracteres)")
+        log.info("Resposta extraída com sucesso (tamanho: %d caracteres)", len(text))
         return text, None
 
     except Exception as e:
-        log.exception(f"Erro durante chamada ao LLM: {e}")
+        log.exception(f"Erro ao interpretar a resposta do LLM: {e}")
         return None, str(e)
@@ -2,15 +2,32 @@
 Security utilities for password hashing and JWT token handling
 """
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
+import time
 from jose import JWTError, jwt
 import bcrypt
-from src.core.config import JWT_SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from src.core.config import JWT_SECRET_KEY, JWT_ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, BCRYPT_ROUNDS
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # Optional: fall back to bcrypt for new hashes
+    PasswordHasher = None
+
+# argon2id (OWASP minimum profile: 19 MiB, 2 iterations). New hashes use it when
+# argon2-cffi is installed; existing bcrypt hashes keep verifying and are
+# upgraded on the next successful login (see password_needs_rehash).
+_password_hasher = (
+    PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+    if PasswordHasher is not None
+    else None
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verify if a plain password matches the hashed password
+    Verify if a plain password matches the hashed password (argon2id or bcrypt)
 
     Args:
         plain_password: The plain text password to verify
@@ -19,6 +36,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
+    if hashed_password.startswith("$argon2"):
+        if _password_hasher is None:
+            return False
+        try:
+            return _password_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+
     # Encode strings to bytes
     password_bytes = plain_password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
@@ -28,7 +53,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """
-    Generate a bcrypt hash of the password
+    Generate an argon2id hash of the password (bcrypt if argon2-cffi is not installed)
 
     Args:
         password: The plain text password to hash
@@ -36,16 +61,43 @@ def get_password_hash(password: str) -> str:
     Returns:
         The hashed password string
     """
+    if _password_hasher is not None:
+        return _password_hasher.hash(password)
+
     # Encode password to bytes
     password_bytes = password.encode('utf-8')
 
     # Generate salt and hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
 
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check if a stored hash uses an outdated scheme or parameters
+
+    Args:
+        hashed_password: The stored hashed password
+
+    Returns:
+        True if the hash should be replaced after a successful login
+    """
+    if _password_hasher is not None:
+        if not hashed_password.startswith("$argon2"):
+            return True
+        return _password_hasher.check_needs_rehash(hashed_password)
+
+    if hashed_password.startswith("$argon2"):
+        return False
+    # bcrypt: $2b$<rounds>$...
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -70,18 +122,35 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+@lru_cache(maxsize=4096)
+def _decode_cached(token: str, bucket: int) -> Optional[dict]:
+    """Decode a token once per minute bucket (the bucket bounds how long results live)"""
+    try:
+        return jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except JWTError:
+        return None
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT access token
 
+    Repeated tokens within the same minute are served from an in-process
+    cache; expiration is still checked on every call.
+
     Args:
         token: The JWT token string to decode
 
     Returns:
         Dictionary containing the token payload if valid, None otherwise
     """
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
-    except JWTError:
+    now = time.time()
+    payload = _decode_cached(token, int(now) // 60)
+    if payload is None:
         return None
+
+    exp = payload.get("exp")
+    if exp is not None and exp <= now:
+        return None
+
+    return dict(payload)
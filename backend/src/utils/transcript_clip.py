@@ -0,0 +1,133 @@
+"""
+Clipping of transcriptions to highlight windows (subtitles for each clip).
+
+Side-effect free: shared by the editor agent (workers/Celery) and the graph
+without pulling in either of them. Segments are read from the NDJSON sidecar
+written by the transcriber when it is up to date, otherwise from the JSON
+transcription (streamed with ``ijson`` when installed).
+"""
+
+import itertools
+import mmap
+import os
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+import orjson
+
+try:
+    import ijson  # Incremental JSON parsing (C yajl2 backend when available)
+except ImportError:  # Optional: falls back to parsing the whole file
+    ijson = None
+
+# Start of each line of the segments NDJSON: {"start": <float>, "end": <float>, ...
+SEGMENT_RANGE_RE = re.compile(rb'^\{"start": ([-0-9.eE+]+), "end": ([-0-9.eE+]+)', re.MULTILINE)
+
+
+def segments_ndjson_path(output_json_path: str) -> str:
+    """
+    Path of the NDJSON file (one segment per line) written next to the transcription,
+    so range readers can filter lines without parsing the whole JSON.
+    """
+    return output_json_path + ".segments.ndjson"
+
+
+def _iter_segments_in_range(ndjson_path: str, start: float, end: float):
+    """
+    Filters the segments NDJSON before parsing: the regex reads only start/end at
+    the beginning of each line and only lines overlapping [start, end] are decoded.
+    """
+    with open(ndjson_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for m in SEGMENT_RANGE_RE.finditer(mm):
+                if float(m.group(1)) > end:
+                    break
+                if float(m.group(2)) < start:
+                    continue
+                line_end = mm.find(b"\n", m.end())
+                yield orjson.loads(mm[m.start():line_end if line_end != -1 else len(mm)])
+
+
+def _iter_segments(transcription_path: str, start: float = 0.0, end: float = float("inf")):
+    """Iterates the transcription's segments; streamed when ijson is available."""
+    ndjson_path = segments_ndjson_path(transcription_path)
+    # Only use the NDJSON if it is not older than the JSON (legacy transcriptions have none)
+    if os.path.exists(ndjson_path) and os.path.getmtime(ndjson_path) >= os.path.getmtime(transcription_path):
+        yield from _iter_segments_in_range(ndjson_path, start, end)
+        return
+    with open(transcription_path, "rb") as f:
+        if ijson is not None:
+            yield from ijson.items(f, "segments.item", use_float=True)
+        else:
+            yield from orjson.loads(f.read()).get("segments", [])
+
+
+def _segment_arrays(segments: List[Dict[str, Any]]):
+    starts = np.fromiter((float(seg.get("start", 0)) for seg in segments), dtype=np.float64, count=len(segments))
+    ends = np.fromiter((float(seg.get("end", seg.get("start", 0))) for seg in segments), dtype=np.float64, count=len(segments))
+    return starts, ends
+
+
+def _clip_window(segments, starts, ends, offset: int, start: float, end: float) -> Dict[str, Any]:
+    """
+    Clips the candidate segments (``starts``/``ends`` begin at index ``offset`` of
+    ``segments``) to [start, end], shifting timestamps so the clip starts at 0.
+    """
+    # Vectorized time arithmetic (no Python loop per segment)
+    mask = (ends >= start) & (starts <= end)
+    new_starts = np.maximum(starts[mask], start) - start
+    new_ends = np.minimum(ends[mask], end) - start
+    new_ends = np.where(new_ends > new_starts, new_ends, new_starts + 0.5)
+
+    clipped = [
+        {"start": s, "end": e, "text": str(segments[offset + i].get("text", "")).strip()}
+        for i, s, e in zip(np.flatnonzero(mask).tolist(), new_starts.tolist(), new_ends.tolist())
+    ]
+    return {"segments": clipped}
+
+
+def build_clipped_transcription(transcription_path: str, start: float, end: float) -> Dict[str, Any]:
+    """
+    Filters and normalizes segments to the highlight window, shifting timestamps to start at 0.
+    """
+    # Whisper segments are ordered: nothing after the end of the highlight matters
+    segments = list(itertools.takewhile(
+        lambda seg: float(seg.get("start", 0)) <= end,
+        _iter_segments(transcription_path, start, end),
+    ))
+    if not segments:
+        return {"segments": []}
+
+    starts, ends = _segment_arrays(segments)
+    return _clip_window(segments, starts, ends, 0, start, end)
+
+
+def build_clipped_transcriptions(transcription_path: str, ranges: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    """
+    :func:`build_clipped_transcription` for several windows (e.g. one per highlight).
+
+    Reads the transcription once and builds a sorted index: increasing starts and
+    the running maximum of the ends. Each window is located by binary search
+    (O(log N + k)) instead of scanning every segment per highlight.
+    """
+    segments = sorted(_iter_segments(transcription_path), key=lambda seg: float(seg.get("start", 0)))
+    if not segments:
+        return [{"segments": []} for _ in ranges]
+
+    starts, ends = _segment_arrays(segments)
+    # Running max of the ends: before the first index with a value >= start nothing crosses the window
+    max_ends = np.maximum.accumulate(ends)
+
+    results = []
+    for r in ranges:
+        start, end = float(r["start"]), float(r["end"])
+        lo = int(np.searchsorted(max_ends, start, side="left"))
+        hi = int(np.searchsorted(starts, end, side="right"))
+        if lo >= hi:
+            results.append({"segments": []})
+            continue
+        results.append(_clip_window(segments, starts[lo:hi], ends[lo:hi], lo, start, end))
+    return results
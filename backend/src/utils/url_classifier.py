@@ -0,0 +1,54 @@
+"""
+URL classification shared by the CLI and the processing graphs.
+
+Both classifiers are single precompiled regexes behind an LRU cache, so the
+same URL is only scanned once per process no matter how many call sites ask.
+"""
+
+import functools
+import re
+from typing import Literal
+
+ContentType = Literal["stream", "youtube", "video"]
+
+# Live sources the graph must capture with the stream collector before transcribing:
+# rtmp/rtsp, HLS playlists (.m3u8) or "live" pages on YouTube/Twitch/Facebook
+STREAM_URL_RE = re.compile(
+    r"^(?:rtmp|rtsp)://"
+    r"|\.m3u8$"
+    r"|^(?=.*live)(?=.*(?:youtube\.com/|twitch\.tv|facebook\.com))",
+    re.IGNORECASE,
+)
+
+# CLI content type. Alternatives are tried in order at position 0, so the
+# priority is: HLS/manifest -> YouTube -> Twitch
+CONTENT_TYPE_RE = re.compile(
+    r"^(?:(?P<stream>(?=.*(?:\.m3u8|manifest)))"
+    r"|(?P<youtube>(?=.*(?:youtube\.com|youtu\.be)))"
+    r"|(?P<twitch>(?=.*twitch\.tv)))",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def is_stream_url(url: str) -> bool:
+    """
+    Returns True when the URL points to a live source that must be collected first.
+    """
+    return STREAM_URL_RE.search(url) is not None
+
+
+@functools.lru_cache(maxsize=4096)
+def classify(url: str) -> ContentType:
+    """
+    Classifies a URL for the CLI.
+
+    Returns:
+        'stream' for HLS/m3u8 manifests and Twitch
+        'youtube' for YouTube URLs (live or recorded, the user is asked)
+        'video' for recorded videos on other platforms
+    """
+    match = CONTENT_TYPE_RE.match(url)
+    if match is None:
+        return "video"
+    return "youtube" if match.lastgroup == "youtube" else "stream"
@@ -4,13 +4,15 @@ Consome jobs da fila 'analyse_queue' e publica resultados em 'edit_queue'.
 """
 
 import os # Importa o módulo os
-import json # Importa o módulo json
+import functools # Carregamento sob demanda do agente
 import logging # Importa o módulo logging
+from src.utils.logging_setup import configure_logging # Configuração única dos logs (stdout)
 from src.services.state_manager import update_job_state, JobStatus # Importa as classes update_job_state e JobStatus
 
-# Importa as funções consume, publish, new_job, ANALYSE_QUEUE e EDIT_QUEUE do módulo messaging_rabbit
+# Importa as funções consume, DeadLetter, publish, new_job, ANALYSE_QUEUE e EDIT_QUEUE do módulo messaging_rabbit
 from src.services.messaging_rabbit import (
     consume,
+    DeadLetter,
     publish,
     new_job,
     declare_infraestructure,
@@ -18,13 +20,55 @@ from src.services.messaging_rabbit import (
     EDIT_QUEUE
 )
 
-# Importa a função executar_agente_analista do módulo analyst
-from src.agents.analyst import executar_agente_analista
+from src.utils.fswait import ensure_dir, wait_for_file # Espera a transcrição (inotify) e cria diretórios uma única vez
 
 # Configuração do logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+configure_logging()
 log = logging.getLogger("analyst_worker")
 
+# Diretório dos jobs (cada job em /app/data/jobs/<job_id>/...)
+JOBS_DIR = "/app/data/jobs"
+
+# Tempo máximo de espera pela transcrição escrita pelo transcriber (segundos)
+TRANSCRIPTION_WAIT_SECONDS = 3
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def _analyst():
+    """
+    Importa o agente analista no primeiro job (Gemini, ChromaDB e pydantic não
+    ocupam memória enquanto o worker está ocioso).
+    """
+    from src.agents.analyst import executar_agente_analista
+    return executar_agente_analista
+
+
+def _find_transcription(job_dir: str, file_name: str) -> str | None:
+    """
+    Procura a transcrição apenas nos diretórios do próprio job (sem varrer todos os jobs).
+
+    Tenta o caminho exato em segments/ (streams) e transcriptions/ (vídeos) e, se não
+    existir, o mesmo nome com outra extensão (.json/.msgpack) nesses diretórios.
+    """
+    subdirs = [os.path.join(job_dir, sub) for sub in ("segments", "transcriptions")]
+
+    for subdir in subdirs:
+        candidate = os.path.join(subdir, file_name)
+        if os.path.exists(candidate):
+            return candidate
+
+    stem = os.path.splitext(file_name)[0]
+    for subdir in subdirs:
+        try:
+            with os.scandir(subdir) as entries:
+                for entry in entries:
+                    if os.path.splitext(entry.name)[0] == stem and entry.is_file():
+                        return entry.path
+        except FileNotFoundError:
+            continue
+    return None
+
 # --------------------------------------------------------------------------------------------------------------------------------------
 
 def handle_analyst(message: dict):
@@ -40,40 +84,26 @@ def handle_analyst(message: dict):
     transcription_path = payload["transcription_path"]
     video_path = payload["video_path"]
 
-    # Imprime os dados do job
-    print("\n" + "="*60)
-    print(f"[ANALYST] Processando job: {job_id}")
-    print(f"Transcrição: {transcription_path}")
-    print("="*60)
+    # Registra os dados do job
+    log.info("[ANALYST] Processando job: %s | Transcrição: %s", job_id, transcription_path)
 
     # Atualiza o estado do job
     update_job_state(job_id, JobStatus.PROCESSING, "analyse", {"transcription_path": transcription_path})
 
-    # Verifica se o arquivo de transcrição existe (com retries curtos)
-    import time as _time
-    max_attempts = 3
-    attempt = 0
-    while attempt < max_attempts and not os.path.exists(transcription_path):
-        log.warning(f"Arquivo de transcrição não encontrado: {transcription_path} (tentativa {attempt+1}/{max_attempts}). Aguardando 1s...")
-        _time.sleep(1)
-        attempt += 1
+    # Verifica se o arquivo de transcrição existe (espera até TRANSCRIPTION_WAIT_SECONDS)
+    if not wait_for_file(transcription_path, TRANSCRIPTION_WAIT_SECONDS):
+        log.warning("Arquivo de transcrição ausente após %ss: %s. Tentando localizar arquivo equivalente...", TRANSCRIPTION_WAIT_SECONDS, transcription_path)
 
-    if not os.path.exists(transcription_path):
-        log.warning(f"Arquivo de transcrição ausente após {max_attempts} tentativas: {transcription_path}. Tentando localizar arquivo equivalente...")
-
-        # Tenta localizar o arquivo de transcrição pelo nome do segmento em /app/data/jobs
+        # Tenta localizar o arquivo de transcrição no diretório do job pai (streams) ou do próprio job
         segment_name = os.path.basename(transcription_path)
-        found = None
-        for root, dirs, files in os.walk("/app/data/jobs"):
-            if segment_name in files:
-                found = os.path.join(root, segment_name)
-                log.info(f"Encontrado arquivo de transcrição alternativo em: {found}")
-                break
+        job_dir = os.path.join(JOBS_DIR, payload.get("parent_job_id") or job_id)
+        found = _find_transcription(job_dir, segment_name)
 
         if found:
+            log.info("Encontrado arquivo de transcrição alternativo em: %s", found)
             transcription_path = found
         else:
-            log.error(f"Não foi possível localizar arquivo de transcrição para: {segment_name}")
+            log.error("Não foi possível localizar arquivo de transcrição para: %s", segment_name)
             update_job_state(job_id, JobStatus.FAILED, "analyse_missing_transcription", {"error": "transcription file missing", "path": transcription_path})
             return
 
@@ -84,26 +114,26 @@ def handle_analyst(message: dict):
     highlight_path = os.path.join(highlight_dir, f"{job_id}.json")
 
     # Garante que o diretório existe
-    os.makedirs(highlight_dir, exist_ok=True)
+    ensure_dir(highlight_dir)
 
     try:
         # Executa o agente analista
-        highlight = executar_agente_analista(
+        highlight = _analyst()(
             input_json=transcription_path,
             output_json=highlight_path
         )
     except Exception as e:
         # Registra o erro
-        log.exception(f"[{job_id}] Erro crítico durante análise: {e}")
-        raise # Releva o erro para o tratamento global
+        log.exception("[%s] Erro crítico durante análise: %s", job_id, e)
+        raise DeadLetter(str(e)) from e # Envia a mensagem para a DLQ
 
     # Se a análise falhar
     if highlight is None:
-        print(f"[ERRO] Falha ao analisar a transcrição no job {job_id}.")
+        log.error("[ERRO] Falha ao analisar a transcrição no job %s.", job_id)
         update_job_state(job_id, JobStatus.FAILED, "analyse_failed") # Atualiza o estado do job
         return
 
-    print(f"[OK] Análise concluída e salva em: {highlight_path}")
+    log.info("[OK] Análise concluída e salva em: %s", highlight_path)
 
     # Cria o payload para a próxima etapa
     next_payload = {
@@ -111,16 +141,19 @@ def handle_analyst(message: dict):
         "video_path": video_path
     }
 
+    # O highlight (poucos campos) segue junto na mensagem: o editor não precisa reler o arquivo
+    next_msg_payload = {**next_payload, "highlight": highlight}
+
     # Cria a mensagem para a próxima etapa
     next_msg = new_job(
         step="edit",
-        payload=next_payload,
+        payload=next_msg_payload,
         job_id=job_id
     )
 
     # Publica a mensagem na fila
     publish(EDIT_QUEUE, next_msg)
-    print(f"[→] Job {job_id} enviado para edição.\n")
+    log.info("[→] Job %s enviado para edição.", job_id)
 
     # Atualiza o estado do job
     update_job_state(job_id, JobStatus.PROCESSING, "edit", next_payload)
@@ -129,15 +162,18 @@ def handle_analyst(message: dict):
 
 if __name__ == "__main__":
     # Inicia o worker
-    print("\n=== WORKER ANALYST INICIADO ===")
+    log.info("\n=== WORKER ANALYST INICIADO ===")
     
     # Garante que a infraestrutura de filas existe
-    print("Verificando infraestrutura de filas...")
+    log.info("Verificando infraestrutura de filas...")
     declare_infraestructure()
-    print("Infraestrutura verificada!\n")
+    log.info("Infraestrutura verificada!\n")
     
-    print(f"Escutando fila: {ANALYSE_QUEUE}")
-    print("Aguardando jobs...\n")
+    log.info("Escutando fila: %s", ANALYSE_QUEUE)
+    log.info("Aguardando jobs...\n")
+
+    # Mensagens em voo por consumidor (QoS): chamadas ao LLM: mensagens leves, latência dominada pelo Gemini
+    prefetch = int(os.getenv("WORKER_PREFETCH", "16"))
 
     # Consume a fila
-    consume(ANALYSE_QUEUE, handle_analyst)
+    consume(ANALYSE_QUEUE, handle_analyst, prefetch_count=prefetch)
@@ -4,13 +4,17 @@ Consome jobs da fila 'collect_queue' e publica segmentos em 'transcribe_queue'.
 """
 
 import os  # Importa o módulo os
+import orjson  # Serializa a mensagem recebida nos logs de erro
 import logging  # Importa o módulo logging
-from src.services.state_manager import update_job_state, initialize_job, JobStatus  # Importa as classes update_job_state, initialize_job e JobStatus
+from src.utils.logging_setup import configure_logging # Configuração única dos logs (stdout)
+from src.utils.fswait import ensure_dir # Cria cada diretório de saída uma única vez por processo
+from src.services.state_manager import update_job_state, initialize_many, JobStatus  # Importa update_job_state, initialize_many e JobStatus
 
-# Importa as funções consume, publish, new_job, COLLECT_QUEUE e TRANSCRIBE_QUEUE do módulo messaging_rabbit
+# Importa as funções consume, DeadLetter, publish_batch, new_job, COLLECT_QUEUE e TRANSCRIBE_QUEUE do módulo messaging_rabbit
 from src.services.messaging_rabbit import (
     consume,
-    publish,
+    DeadLetter,
+    publish_batch,
     new_job,
     declare_infraestructure,
     COLLECT_QUEUE,
@@ -21,9 +25,12 @@ from src.services.messaging_rabbit import (
 from src.agents.collector_streams import executar_agente_coletor
 
 # Configuração do logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+configure_logging()
 log = logging.getLogger("collector_worker")
 
+# Diretório dos jobs (cada job em /app/data/jobs/<job_id>/...)
+JOBS_DIR = "/app/data/jobs"
+
 # --------------------------------------------------------------------------------------------------------------------------------------
 
 def handle_collector(message: dict):
@@ -51,30 +58,28 @@ def handle_collector(message: dict):
 
         # Verifica se a URL do stream existe
         if not stream_url:
-            log.error(f"Job {job_id} sem URL do stream!")
+            log.error("Job %s sem URL do stream!", job_id)
             # Atualiza o estado do job
             update_job_state(job_id, JobStatus.FAILED, "collect_invalid_url", {"error": "URL do stream não fornecida"})
             return  # Retorna para o loop
 
         # Imprime os dados do job
-        log.info("\n" + "="*60)
-        log.info(f"[COLLECTOR] Processando job: {job_id}")
-        log.info(f"Stream URL: {stream_url}")
-        log.info(f"Duração do segmento: {segment_duration}s")
-        log.info(f"Duração máxima: {max_duration}s")
-        log.info("="*60)
+        log.info(
+            "[COLLECTOR] Processando job: %s | Stream URL: %s | Duração do segmento: %ss | Duração máxima: %ss",
+            job_id, stream_url, segment_duration, max_duration,
+        )
 
         # Atualiza estado para PROCESSING
         update_job_state(job_id, JobStatus.PROCESSING, "collect", {"stream_url": stream_url})
 
         # Define o diretório de saída para os segmentos (organizado por job_id)
-        output_dir = f"/app/data/jobs/{job_id}/segments"
+        output_dir = f"{JOBS_DIR}/{job_id}/segments"
 
         # Garante que o diretório existe
-        os.makedirs(output_dir, exist_ok=True)
+        ensure_dir(output_dir)
 
         # Imprime o diretório de saída
-        log.info(f"Diretório de saída: {output_dir}")
+        log.info("Diretório de saída: %s", output_dir)
         log.info("Iniciando captura e segmentação do stream...")
 
         # Executa a coleta do stream
@@ -87,7 +92,7 @@ def handle_collector(message: dict):
             )
         except Exception as e:
             # Registra o erro
-            log.exception(f"[{job_id}] Erro crítico durante coleta: {e}")
+            log.exception("[%s] Erro crítico durante coleta: %s", job_id, e)
             # Atualiza o estado do job
             update_job_state(
                 job_id,
@@ -95,23 +100,23 @@ def handle_collector(message: dict):
                 "collect_critical_error",
                 {"error": str(e)}
             )
-            raise  # Re-raise para que a mensagem vá para DLQ
+            raise DeadLetter(str(e)) from e  # Envia a mensagem para a DLQ
 
         # Verifica se a coleta foi bem-sucedida
         if result is None or result.get("status") != "sucesso":
             # Registra o erro
-            log.error(f"[{job_id}] Falha ao coletar o stream.")
+            log.error("[%s] Falha ao coletar o stream.", job_id)
             # Atualiza o estado do job
             update_job_state(job_id, JobStatus.FAILED, "collect_failed", {"error": "Coleta retornou None ou falhou"})
             return
 
-        log.info(f"[OK] Coleta concluída! Total de segmentos: {result['segment_count']}")
+        log.info("[OK] Coleta concluída! Total de segmentos: %s", result['segment_count'])
 
         # Publica cada segmento na fila de transcrição
         segment_paths = result.get("segment_paths", [])
         
         if not segment_paths:
-            log.warning(f"[{job_id}] Nenhum segmento foi gerado.")
+            log.warning("[%s] Nenhum segmento foi gerado.", job_id)
             update_job_state(job_id, JobStatus.FAILED, "collect_no_segments", {"error": "Nenhum segmento gerado"})
             return
 
@@ -123,7 +128,10 @@ def handle_collector(message: dict):
             {"segment_count": len(segment_paths)}
         )
 
-        # Publica cada segmento individualmente na fila de transcrição
+        # Prepara o estado inicial e a mensagem de cada segmento; o estado vai ao Redis
+        # em um único round-trip e as mensagens são publicadas em lote no final
+        segment_jobs = []
+        transcribe_msgs = []
         for idx, segment_path in enumerate(segment_paths):
             # Prepara payload para transcrição
             transcribe_payload = {
@@ -133,21 +141,18 @@ def handle_collector(message: dict):
                 "parent_job_id": job_id  # Mantém referência ao job original
             }
 
-            # Cria mensagem para fila de transcrição
             # Cada segmento terá seu próprio sub-job_id
             segment_job_id = f"{job_id}_seg{idx:03d}"
-            
-            # Inicializa o segmento no Redis
-            initialize_job(segment_job_id, stream_url)
-            
-            # Atualiza com metadados do segmento
-            update_job_state(segment_job_id, JobStatus.PENDING, "transcribe", {
+
+            # Estado inicial do segmento com seus metadados
+            segment_jobs.append((segment_job_id, stream_url, {
+                "current_step": "transcribe",
                 "parent_job_id": job_id,
                 "segment_index": idx,
                 "total_segments": len(segment_paths),
                 "segment_path": segment_path
-            })
-            
+            }))
+
             # Cria mensagem para fila de transcrição
             transcribe_msg = new_job(
                 step="transcribe",
@@ -155,11 +160,15 @@ def handle_collector(message: dict):
                 job_id=segment_job_id
             )
 
-            # Publica na fila de transcrição
-            publish(TRANSCRIBE_QUEUE, transcribe_msg)
-            log.info(f"[→] Segmento {idx+1}/{len(segment_paths)} enviado para transcrição (job: {segment_job_id})")
+            transcribe_msgs.append(transcribe_msg)
+
+        # Inicializa todos os segmentos no Redis (um HSET por segmento, um único round-trip)
+        initialize_many(segment_jobs)
 
-        log.info(f"[✓] Todos os {len(segment_paths)} segmentos do job {job_id} foram enviados para transcrição.")
+        # Publica todos os segmentos na fila de transcrição (confirmação em lote)
+        publish_batch(TRANSCRIBE_QUEUE, transcribe_msgs)
+
+        log.info("[✓] Todos os %s segmentos do job %s foram enviados para transcrição.", len(segment_paths), job_id)
 
         # Atualiza estado final da coleta
         update_job_state(
@@ -174,12 +183,13 @@ def handle_collector(message: dict):
 
     except KeyError as e:
         # Registra o erro
-        log.error(f"Erro ao processar mensagem: campo faltando - {e}")
-        import json
-        log.error(f"Mensagem recebida: {json.dumps(message, indent=2)}")
+        log.error("Erro ao processar mensagem: campo faltando - %s", e)
+        log.error("Mensagem recebida: %s", orjson.dumps(message, option=orjson.OPT_INDENT_2).decode())
+    except DeadLetter:
+        raise  # Falha já registrada acima
     except Exception as e:
-        log.exception(f"Erro inesperado ao processar mensagem: {e}")
-        raise  # Re-raise para que a mensagem vá para DLQ
+        log.exception("Erro inesperado ao processar mensagem: %s", e)
+        raise DeadLetter(str(e)) from e  # Envia a mensagem para a DLQ
 
 # --------------------------------------------------------------------------------------------------------------------------------------
 
@@ -192,8 +202,11 @@ if __name__ == "__main__":
     declare_infraestructure()
     log.info("Infraestrutura verificada!\n")
     
-    log.info(f"Escutando fila: {COLLECT_QUEUE}")
+    log.info("Escutando fila: %s", COLLECT_QUEUE)
     log.info("Aguardando jobs...\n")
 
+    # Mensagens em voo por consumidor (QoS): cada mensagem é uma captura de stream de minutos; não retém jobs de outros collectors
+    prefetch = int(os.getenv("WORKER_PREFETCH", "1"))
+
     # Consume a fila
-    consume(COLLECT_QUEUE, handle_collector)
+    consume(COLLECT_QUEUE, handle_collector, prefetch_count=prefetch)
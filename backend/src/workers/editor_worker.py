@@ -4,9 +4,10 @@ Consome jobs da fila 'edit_queue' e publica resultados em 'completed_queue'.
 """
 
 import os # Importa o módulo os
-import json # Importa o módulo json
 import logging # Importa o módulo logging
 import time # Usado para retry/backoff quando o arquivo de vídeo ainda não existir
+from src.utils.logging_setup import configure_logging # Configuração única dos logs (stdout)
+from src.utils.fswait import ensure_dir # Cria cada diretório de saída uma única vez por processo
 from src.services.state_manager import update_job_state, JobStatus # Importa as classes update_job_state e JobStatus
 
 # Importa as funções consume, publish, new_job, EDIT_QUEUE e COMPLETED_QUEUE do módulo messaging_rabbit
@@ -23,9 +24,12 @@ from src.services.messaging_rabbit import (
 from src.agents.editor import executar_agente_editor
 
 # Configuração do logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+configure_logging()
 log = logging.getLogger("editor_worker") # Cria o logger
 
+# Diretório dos jobs (cada job em /app/data/jobs/<job_id>/...)
+JOBS_DIR = "/app/data/jobs"
+
 # --------------------------------------------------------------------------------------------------------------------------------------
 
 def handle_editor(message: dict):
@@ -40,32 +44,31 @@ def handle_editor(message: dict):
     # Extrai os dados do payload
     highlight_path = payload["highlight_path"]
     video_path = payload["video_path"]
+    highlight = payload.get("highlight") # Highlight embutido na mensagem (mensagens antigas só têm o caminho)
 
-    # Imprime os dados do job
-    print("\n" + "="*60)
-    print(f"[EDITOR] Processando job: {job_id}")
-    print(f"Highlight: {highlight_path}")
-    print("="*60)
+    # Registra os dados do job
+    log.info("[EDITOR] Processando job: %s | Highlight: %s", job_id, highlight_path)
 
     # Atualiza o estado do job
     update_job_state(job_id, JobStatus.PROCESSING, "edit", {"highlight_path": highlight_path})
 
     # Cria o diretório para o vídeo editado (organizado por job_id)
-    output_dir = f"/app/data/jobs/{job_id}/highlights"
+    output_dir = f"{JOBS_DIR}/{job_id}/highlights"
 
     # Garante que o diretório existe
-    os.makedirs(output_dir, exist_ok=True)
+    ensure_dir(output_dir)
 
     try:
         # Executa o agente editor
         result_path = executar_agente_editor(
             highlight_json=highlight_path,
             input_video=video_path,
-            output_dir=output_dir
+            output_dir=output_dir,
+            highlight=highlight
         )
     except Exception as e:
         # Registra o erro e marca falha crítica sem levantar exceção para não interromper o loop de consumo
-        log.exception(f"[{job_id}] Erro crítico durante edição: {e}")
+        log.exception("[%s] Erro crítico durante edição: %s", job_id, e)
         update_job_state(job_id, JobStatus.FAILED, "edit_critical_error")
         return
 
@@ -79,12 +82,12 @@ def handle_editor(message: dict):
 
     # Se a edição falhar
     if not final_path:
-        print(f"[ERRO] Falha ao editar o vídeo no job {job_id}.")
+        log.error("[ERRO] Falha ao editar o vídeo no job %s.", job_id)
         # Atualiza o estado do job
         update_job_state(job_id, JobStatus.FAILED, "edit_failed")
         return # Retorna para o loop
 
-    print(f"[OK] Highlight gerado em: {final_path}")
+    log.info("[OK] Highlight gerado em: %s", final_path)
 
     # Cria o payload para a próxima etapa
     completed_payload = {
@@ -103,7 +106,7 @@ def handle_editor(message: dict):
 
     # Publica a mensagem na fila
     publish(COMPLETED_QUEUE, completed_msg)
-    print(f"[→] Job {job_id} enviado para conclusão.\n")
+    log.info("[→] Job %s enviado para conclusão.", job_id)
 
     # Atualiza o estado do job
     update_job_state(job_id, JobStatus.COMPLETED, "completed", completed_payload)
@@ -112,15 +115,18 @@ def handle_editor(message: dict):
 
 if __name__ == "__main__":
     # Inicia o worker
-    print("\n=== WORKER EDITOR INICIADO ===")
+    log.info("\n=== WORKER EDITOR INICIADO ===")
     
     # Garante que a infraestrutura de filas existe
-    print("Verificando infraestrutura de filas...")
+    log.info("Verificando infraestrutura de filas...")
     declare_infraestructure()
-    print("Infraestrutura verificada!\n")
+    log.info("Infraestrutura verificada!\n")
     
-    print(f"Escutando fila: {EDIT_QUEUE}")
-    print("Aguardando jobs...\n")
+    log.info("Escutando fila: %s", EDIT_QUEUE)
+    log.info("Aguardando jobs...\n")
+
+    # Mensagens em voo por consumidor (QoS): renderização ffmpeg de vários segundos por job
+    prefetch = int(os.getenv("WORKER_PREFETCH", "2"))
 
     # Consume a fila
-    consume(EDIT_QUEUE, handle_editor)
+    consume(EDIT_QUEUE, handle_editor, prefetch_count=prefetch)
@@ -8,13 +8,18 @@ Worker responsável pela etapa de:
 """
 
 import os # Importa o módulo os
-import json # Importa o módulo json
+import functools # Carregamento sob demanda do agente
+import orjson # Serializa a mensagem recebida nos logs de erro
 import logging # Importa o módulo logging
+from src.utils.logging_setup import configure_logging # Configuração única dos logs (stdout)
+from src.utils.fswait import ensure_dir # Cria cada diretório de saída uma única vez por processo
 from src.services.state_manager import update_job_state, JobStatus # Importa as classes update_job_state e JobStatus
 
-# Importa as funções consume, publish, new_job, TRANSCRIBE_QUEUE e ANALYSE_QUEUE do módulo messaging_rabbit
+# Importa as funções consume, DeadLetter, publish, new_job, TRANSCRIBE_QUEUE e ANALYSE_QUEUE do módulo messaging_rabbit
 from src.services.messaging_rabbit import (
     consume,
+    consume_batch,
+    DeadLetter,
     publish,
     new_job,
     declare_infraestructure,
@@ -22,13 +27,25 @@ from src.services.messaging_rabbit import (
     ANALYSE_QUEUE
 )
 
-# Importa a função transcricao_youtube_video do módulo transcriber
-from src.agents.transcriber import transcricao_youtube_video
-
 # Configuração do logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+configure_logging()
 log = logging.getLogger("transcriber_worker")
 
+# Diretórios dos jobs (cada job em /app/data/jobs/<job_id>/...) e dos vídeos baixados
+JOBS_DIR = "/app/data/jobs"
+VIDEOS_DIR = "/app/data/videos"
+
+# --------------------------------------------------------------------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def _transcriber():
+    """
+    Importa o agente transcritor no primeiro job (faster-whisper/CTranslate2 não
+    ocupam memória enquanto o worker está ocioso).
+    """
+    from src.agents import transcriber
+    return transcriber
+
 # --------------------------------------------------------------------------------------------------------------------------------------
 
 def handle_transcriber(message: dict):
@@ -52,7 +69,7 @@ def handle_transcriber(message: dict):
         # Verifica se o job_id existe
         if not job_id:
             log.error("Mensagem sem job_id!")
-            return
+            raise DeadLetter("Mensagem sem job_id")
 
         # MODO 1: Segmento de stream (novo fluxo com collector)
         if "segment_path" in payload:
@@ -62,12 +79,10 @@ def handle_transcriber(message: dict):
             parent_job_id = payload.get("parent_job_id")
             
             # Imprime os dados do job
-            log.info("\n" + "="*60)
-            log.info(f"[TRANSCRIBER] Processando segmento: {job_id}")
-            log.info(f"Segmento: {segment_index + 1}/{total_segments}")
-            log.info(f"Arquivo: {segment_path}")
-            log.info(f"Job pai: {parent_job_id}")
-            log.info("="*60)
+            log.info(
+                "[TRANSCRIBER] Processando segmento: %s | Segmento: %d/%d | Arquivo: %s | Job pai: %s",
+                job_id, segment_index + 1, total_segments, segment_path, parent_job_id,
+            )
             
             # Atualiza estado para PROCESSING
             update_job_state(job_id, JobStatus.PROCESSING, "transcribe_segment", {
@@ -77,27 +92,25 @@ def handle_transcriber(message: dict):
             
             # Executa a transcrição do segmento
             try:
-                from src.agents.transcriber import executar_transcricao_segmento
-                
-                result = executar_transcricao_segmento(segment_path)
+                result = _transcriber().executar_transcricao_segmento(segment_path)
                 
             except Exception as e:
-                log.exception(f"[{job_id}] Erro crítico durante transcrição do segmento: {e}")
+                log.exception("[%s] Erro crítico durante transcrição do segmento: %s", job_id, e)
                 update_job_state(
                     job_id,
                     JobStatus.FAILED,
                     "transcribe_segment_critical_error",
                     {"error": str(e)}
                 )
-                raise
+                raise DeadLetter(str(e)) from e  # Envia a mensagem para a DLQ
             
             # Verifica se a transcrição foi bem-sucedida
             if result is None or result.get("status") != "sucesso":
-                log.error(f"[{job_id}] Falha ao transcrever o segmento.")
+                log.error("[%s] Falha ao transcrever o segmento.", job_id)
                 update_job_state(job_id, JobStatus.FAILED, "transcribe_segment_failed", {"error": "Transcrição retornou None"})
-                return
+                raise DeadLetter("Transcrição do segmento retornou None")
             
-            log.info(f"[OK] Segmento transcrito: {result['transcription_path']}")
+            log.info("[OK] Segmento transcrito: %s", result['transcription_path'])
             
             # Prepara payload para próxima etapa (análise)
             next_payload = {
@@ -116,7 +129,7 @@ def handle_transcriber(message: dict):
             
             # Publica na fila de análise
             publish(ANALYSE_QUEUE, next_msg)
-            log.info(f"[→] Segmento {job_id} enviado para análise.")
+            log.info("[→] Segmento %s enviado para análise.", job_id)
             
             # Atualiza estado
             update_job_state(job_id, JobStatus.PROCESSING, "analyse", next_payload)
@@ -126,30 +139,27 @@ def handle_transcriber(message: dict):
             url = payload.get("url")
             
             # Imprime os dados do job
-            log.info("\n" + "="*60)
-            log.info(f"[TRANSCRIBER] Processando vídeo YouTube: {job_id}")
-            log.info(f"URL: {url}")
-            log.info("="*60)
+            log.info("[TRANSCRIBER] Processando vídeo YouTube: %s | URL: %s", job_id, url)
 
             # Atualiza estado para PROCESSING
             update_job_state(job_id, JobStatus.PROCESSING, "transcribe", {"url": url})
 
             # Define caminhos dos arquivos
-            output_path = f"/app/data/jobs/{job_id}/transcriptions/{job_id}.json"
-            temp_video_path = f"/app/data/videos/{job_id}.mp4"
+            output_path = f"{JOBS_DIR}/{job_id}/transcriptions/{job_id}.json"
+            temp_video_path = f"{VIDEOS_DIR}/{job_id}.mp4"
 
             # Garante que os diretórios existam
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            os.makedirs(os.path.dirname(temp_video_path), exist_ok=True)
+            ensure_dir(os.path.dirname(output_path))
+            ensure_dir(os.path.dirname(temp_video_path))
 
             # Imprime os caminhos dos arquivos
-            log.info(f"Arquivo de saída: {output_path}")
-            log.info(f"Vídeo temporário: {temp_video_path}")
+            log.info("Arquivo de saída: %s", output_path)
+            log.info("Vídeo temporário: %s", temp_video_path)
             log.info("Iniciando download e transcrição...")
 
             # Executa a transcrição
             try:
-                result = transcricao_youtube_video(
+                result = _transcriber().transcricao_youtube_video(
                     url=url,
                     temp_video_path=temp_video_path,
                     model_size="base",
@@ -157,7 +167,7 @@ def handle_transcriber(message: dict):
                 )
             except Exception as e:
                 # Registra o erro
-                log.exception(f"[{job_id}] Erro crítico durante transcrição: {e}")
+                log.exception("[%s] Erro crítico durante transcrição: %s", job_id, e)
                 # Atualiza o estado do job
                 update_job_state(
                     job_id,
@@ -165,17 +175,17 @@ def handle_transcriber(message: dict):
                     "transcribe_critical_error",
                     {"error": str(e)}
                 )
-                raise  # Re-raise para que a mensagem vá para DLQ
+                raise DeadLetter(str(e)) from e  # Envia a mensagem para a DLQ
 
             # Verifica se a transcrição foi bem-sucedida
             if result is None:
                 # Registra o erro
-                log.error(f"[{job_id}] Falha ao transcrever o vídeo.")
+                log.error("[%s] Falha ao transcrever o vídeo.", job_id)
                 # Atualiza o estado do job
                 update_job_state(job_id, JobStatus.FAILED, "transcribe_failed", {"error": "Transcrição retornou None"})
-                return
+                raise DeadLetter("Transcrição retornou None")
 
-            log.info(f"[OK] Transcrição concluída e salva em: {output_path}")
+            log.info("[OK] Transcrição concluída e salva em: %s", output_path)
 
             # Prepara payload para próxima etapa
             next_payload = {
@@ -192,24 +202,26 @@ def handle_transcriber(message: dict):
 
             # Publica na fila de análise
             publish(ANALYSE_QUEUE, next_msg)
-            log.info(f"[→] Job {job_id} enviado para análise.")
+            log.info("[→] Job %s enviado para análise.", job_id)
 
             # Atualiza estado
             update_job_state(job_id, JobStatus.PROCESSING, "analyse", next_payload)
         
         else:
             # Payload inválido
-            log.error(f"Job {job_id} sem 'url' ou 'segment_path' no payload!")
+            log.error("Job %s sem 'url' ou 'segment_path' no payload!", job_id)
             update_job_state(job_id, JobStatus.FAILED, "transcribe_invalid_payload", {"error": "Payload sem 'url' ou 'segment_path'"})
-            return
+            raise DeadLetter("Payload sem 'url' ou 'segment_path'")
 
     except KeyError as e:
         # Registra o erro
-        log.error(f"Erro ao processar mensagem: campo faltando - {e}")
-        log.error(f"Mensagem recebida: {json.dumps(message, indent=2)}")
+        log.error("Erro ao processar mensagem: campo faltando - %s", e)
+        log.error("Mensagem recebida: %s", orjson.dumps(message, option=orjson.OPT_INDENT_2).decode())
+    except DeadLetter:
+        raise  # Falha já registrada acima
     except Exception as e:
-        log.exception(f"Erro inesperado ao processar mensagem: {e}")
-        raise  # Re-raise para que a mensagem vá para DLQ
+        log.exception("Erro inesperado ao processar mensagem: %s", e)
+        raise DeadLetter(str(e)) from e  # Envia a mensagem para a DLQ
 
 
 # --------------------------------------------------------------------------------------------------------------------------------------
@@ -222,9 +234,25 @@ if __name__ == "__main__":
     log.info("Verificando infraestrutura de filas...")
     declare_infraestructure()
     log.info("Infraestrutura verificada!\n")
+
+    # Opcional: carrega o Whisper já no startup (o primeiro job não paga o carregamento).
+    # O modelo é único por processo (transcriber.get_model) e reaproveitado entre jobs
+    if os.getenv("WHISPER_PRELOAD", "0") == "1":
+        log.info("Pré-carregando o modelo Whisper...")
+        _transcriber().get_model()
     
-    log.info(f"Escutando fila: {TRANSCRIBE_QUEUE}")
+    log.info("Escutando fila: %s", TRANSCRIBE_QUEUE)
     log.info("Aguardando jobs...\n")
 
-    # Consume a fila
-    consume(TRANSCRIBE_QUEUE, handle_transcriber)
+    # Opcional: transcreve até N jobs ao mesmo tempo no mesmo modelo (num_workers do
+    # CTranslate2 em transcriber.get_model; acima de 4 as chamadas extras só esperam)
+    batch_size = int(os.getenv("WHISPER_BATCH_SIZE", "1"))
+
+    if batch_size > 1:
+        consume_batch(TRANSCRIBE_QUEUE, handle_transcriber, batch_size=batch_size)
+    else:
+        # Mensagens em voo por consumidor (QoS): Whisper pesado por segmento; só adianta a próxima mensagem
+        prefetch = int(os.getenv("WORKER_PREFETCH", "2"))
+
+        # Consume a fila
+        consume(TRANSCRIBE_QUEUE, handle_transcriber, prefetch_count=prefetch)
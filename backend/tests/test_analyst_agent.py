@@ -1,19 +1,43 @@
 """
 Testes unitários para o AnalystAgent com saída estruturada via Pydantic.
+
+O LLM (safe_api.safe_llm_call) e os embeddings do Gemini são substituídos por
+mocks; o ChromaDB em memória e o restante do pipeline do agente rodam de verdade.
 """
 
+import os
 import pytest
 import json
-from src.agents.analyst import AnalystAgent
+from src.agents.analyst import AnalystAgent, RateLimitedGeminiEmbeddingFunction
+from src.utils import safe_api
+
+# Transcrição de exemplo (texto + segments com start/end)
+DUMMY_TRANSCRIPTION = os.path.join(os.path.dirname(__file__), "dummy_transcription.json")
+
+
+# Um único agente para o módulo: o __init__ cria o cliente do Chroma e configura o Gemini.
+# O agente chama safe_api.safe_llm_call a cada execução, então o monkeypatch de cada teste vale
+@pytest.fixture(scope="module")
+def agent():
+    return AnalystAgent()
+
+
+# Embeddings determinísticos (sem chamada à API nem rate limit)
+@pytest.fixture(autouse=True)
+def fake_embeddings(monkeypatch):
+    def fake_embed(self, input):
+        return [[float(len(text)), float(sum(map(ord, text)) % 997), 1.0] for text in input]
+
+    monkeypatch.setattr(RateLimitedGeminiEmbeddingFunction, "__call__", fake_embed)
 
 
 # TESTE: Execução do agente com mock do LLM
-def test_analyst_agent_parsing(monkeypatch):
+def test_analyst_agent_parsing(agent, monkeypatch):
     """
     Verifica se o AnalystAgent consegue:
     - Receber um JSON estruturado (mockado)
     - Validar via Pydantic
-    - Retornar o modelo e nenhum erro
+    - Retornar o melhor highlight
     """
 
     # Simulação de retorno válido do LLM
@@ -29,33 +53,22 @@ def test_analyst_agent_parsing(monkeypatch):
     })
 
     # Monkeypatch substitui safe_llm_call → (mock, None)
-    from src.utils import safe_api
-
     def fake_safe_call(model, prompt):
         return mock_llm_json_response, None
 
     monkeypatch.setattr(safe_api, "safe_llm_call", fake_safe_call)
 
     # Executa o agente
-    agent = AnalystAgent()
-    output, error = agent.run("transcrição simulada")
+    result = agent.run(DUMMY_TRANSCRIPTION)
 
     # Verificações
-    assert error is None
-    assert output is not None
-    assert len(output.highlights) == 1
-
-    h = output.highlights[0]
-    assert h.start == 30
-    assert h.end == 75
-    assert h.summary == "Momento mais impactante do vídeo."
-    assert h.score == 0.92
+    assert result["highlight_inicio_segundos"] == 30
+    assert result["highlight_fim_segundos"] == 75
+    assert result["resposta_bruta"] == "Momento mais impactante do vídeo."
 
 
-# TESTE: LLM retorna erro → AnalystAgent deve retornar erro
-def test_analyst_agent_llm_error(monkeypatch):
-
-    from src.utils import safe_api
+# TESTE: LLM retorna erro → AnalystAgent deve retornar o fallback
+def test_analyst_agent_llm_error(agent, monkeypatch):
 
     # Simula falha do LLM
     def fake_safe_call_err(model, prompt):
@@ -63,17 +76,15 @@ def test_analyst_agent_llm_error(monkeypatch):
 
     monkeypatch.setattr(safe_api, "safe_llm_call", fake_safe_call_err)
 
-    agent = AnalystAgent()
-    output, error = agent.run("texto qualquer")
-
-    assert output is None
-    assert error == "Falha simulada no LLM"
+    result = agent.run(DUMMY_TRANSCRIPTION)
 
+    assert result["highlight_inicio_segundos"] == 0
+    assert result["highlight_fim_segundos"] == 60
+    assert result["resposta_bruta"] == "Fallback: Erro na análise inteligente."
 
-# TESTE: JSON inválido enviado pelo LLM
-def test_analyst_agent_invalid_json(monkeypatch):
 
-    from src.utils import safe_api
+# TESTE: JSON inválido enviado pelo LLM → fallback
+def test_analyst_agent_invalid_json(agent, monkeypatch):
 
     # LLM retorna JSON mal-formado
     def fake_safe_call_invalid(model, prompt):
@@ -81,8 +92,8 @@ def test_analyst_agent_invalid_json(monkeypatch):
 
     monkeypatch.setattr(safe_api, "safe_llm_call", fake_safe_call_invalid)
 
-    agent = AnalystAgent()
-    output, error = agent.run("texto qualquer")
+    result = agent.run(DUMMY_TRANSCRIPTION)
 
-    assert output is None
-    assert "Erro ao fazer parse do JSON retornado pelo LLM" in error
+    assert result["highlight_inicio_segundos"] == 0
+    assert result["highlight_fim_segundos"] == 60
+    assert result["resposta_bruta"] == "Fallback: Erro na análise inteligente."
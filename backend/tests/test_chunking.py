@@ -0,0 +1,62 @@
+"""
+Testes unitários para o chunking temporal das transcrições.
+"""
+
+import pytest
+
+from src.utils.chunking import Segments, chunk_ranges, create_chunks_from_segments, should_use_chunking
+
+
+def _segments(starts, length=5.0):
+    return [{"start": float(s), "end": float(s) + length, "text": str(s)} for s in starts]
+
+
+def _texts(chunks):
+    return [[seg["text"] for seg in chunk] for chunk in chunks]
+
+
+# TESTE: primeiro segment depois da primeira janela, sem overlap
+def test_late_first_segment_without_overlap():
+    segments = _segments(range(40, 85, 5))
+
+    chunks = create_chunks_from_segments(segments, chunk_duration_seconds=30, overlap_seconds=0)
+
+    # A primeira janela começa no primeiro segment: nenhum chunk de um segment só nem repetido
+    assert _texts(chunks) == [
+        ["40", "45", "50", "55", "60", "65"],
+        ["70", "75", "80"],
+    ]
+
+
+# TESTE: primeiro segment tardio com overlap
+def test_late_first_segment_with_overlap():
+    segments = _segments(range(40, 85, 5))
+
+    ranges = chunk_ranges(Segments.from_list(segments), chunk_duration_seconds=30, overlap_seconds=10)
+
+    # Primeira janela [40, 70); a próxima repete só os segments dos últimos 10s
+    assert ranges[0] == (0, 6)
+    assert ranges[1][0] == 4
+    assert ranges[-1][1] == len(segments)
+
+
+# TESTE: transcrição começando em 0 mantém as janelas fixas
+def test_first_segment_at_zero():
+    segments = _segments(range(0, 60, 5))
+
+    chunks = create_chunks_from_segments(segments, chunk_duration_seconds=30, overlap_seconds=0)
+
+    assert _texts(chunks) == [
+        ["0", "5", "10", "15", "20", "25"],
+        ["30", "35", "40", "45", "50", "55"],
+    ]
+
+
+# TESTE: threshold_chars (legado) continua aceito, convertido para tokens (~4 chars/token)
+def test_should_use_chunking_threshold_chars_alias():
+    text = "palavra " * 3000
+
+    with pytest.deprecated_call():
+        assert should_use_chunking(text, threshold_chars=4) is True
+    with pytest.deprecated_call():
+        assert should_use_chunking(text, threshold_chars=10 ** 9) is False
@@ -3,6 +3,7 @@ import os
 import time
 import logging
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add backend to sys.path
 # Assuming this script is in backend/tests/
@@ -52,38 +53,50 @@ def test_pipeline():
         logger.error("No segments found!")
         return
         
-    first_segment = segment_paths[0]
-    logger.info(f"First segment: {first_segment}")
+    logger.info(f"Segments: {len(segment_paths)}")
     
-    # 2. Test Transcriber
-    logger.info("\n--- Testing Transcriber Agent ---")
-    result_transcriber = executar_transcricao_segmento(first_segment)
-    
-    if not result_transcriber or result_transcriber['status'] != 'sucesso':
-        logger.error("Transcriber failed!")
-        return
-        
-    logger.info("Transcriber success!")
-    transcription_path = result_transcriber['transcription_path']
-    logger.info(f"Transcription path: {transcription_path}")
-    
-    # 3. Test Analyst
-    logger.info("\n--- Testing Analyst Agent ---")
-    output_analysis_path = transcription_path.replace(".json", "_analysis.json")
-    
-    try:
-        result_analyst = executar_agente_analista(
-            input_json=transcription_path,
-            output_json=output_analysis_path
-        )
+    # 2 + 3. Transcriber and Analyst, overlapped: each segment goes to the analyst
+    # pool as soon as its transcription is done (Whisper on CPU, Gemini over the network)
+    logger.info("\n--- Testing Transcriber + Analyst Agents ---")
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="transcribe") as transcribe_pool, \
+         ThreadPoolExecutor(max_workers=4, thread_name_prefix="analyse") as analyse_pool:
+        transcriptions = {
+            transcribe_pool.submit(executar_transcricao_segmento, path): path
+            for path in segment_paths
+        }
+        analyses = {}
         
-        logger.info("Analyst success!")
-        logger.info(f"Result: {result_analyst}")
+        for future in as_completed(transcriptions):
+            segment = transcriptions[future]
+            result_transcriber = future.result()
+            if not result_transcriber or result_transcriber['status'] != 'sucesso':
+                logger.error(f"Transcriber failed for {segment}!")
+                continue
+            
+            transcription_path = result_transcriber['transcription_path']
+            logger.info(f"Transcriber success: {transcription_path}")
+            
+            output_analysis_path = os.path.splitext(transcription_path)[0] + "_analysis.json"
+            analyses[analyse_pool.submit(
+                executar_agente_analista,
+                input_json=transcription_path,
+                output_json=output_analysis_path
+            )] = segment
         
-    except Exception as e:
-        logger.error(f"Analyst failed: {e}")
-        import traceback
-        traceback.print_exc()
+        failed = len(segment_paths) - len(analyses)
+        for future in as_completed(analyses):
+            segment = analyses[future]
+            try:
+                result_analyst = future.result()
+                logger.info(f"Analyst success for {segment}: {result_analyst}")
+            except Exception as e:
+                logger.error(f"Analyst failed for {segment}: {e}")
+                import traceback
+                traceback.print_exc()
+                failed += 1
+    
+    if failed:
+        logger.error(f"{failed}/{len(segment_paths)} segments failed!")
         return
 
     logger.info("\n=== Full Pipeline Test Completed Successfully ===")
@@ -6,7 +6,7 @@ from dotenv import load_dotenv
 # Adiciona o diretório raiz ao path para importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.agents.analyst import RateLimitedGeminiEmbeddingFunction
+from src.agents.analyst import RateLimitedGeminiEmbeddingFunction, EMBEDDING_RPM
 
 def test_rate_limit():
     load_dotenv()
@@ -18,21 +18,27 @@ def test_rate_limit():
     print("Iniciando teste de Rate Limit...")
     embedder = RateLimitedGeminiEmbeddingFunction(api_key=api_key)
     
-    texts = ["Texto 1 para teste", "Texto 2 para teste", "Texto 3 para teste"]
+    # Sufixo único por execução: textos já vistos viriam do cache de embeddings
+    run_id = int(time.time())
+    texts = [f"Texto {i} para teste ({run_id})" for i in (1, 2, 3)]
     
+    # Primeira chamada: os 3 textos vão em uma única requisição
     start_time = time.time()
     embeddings = embedder(texts)
-    end_time = time.time()
-    
-    duration = end_time - start_time
-    print(f"Duração total: {duration:.2f}s")
-    print(f"Embeddings gerados: {len(embeddings)}")
-    
-    # Se processou 3 itens com 4.5s de delay cada, deve levar pelo menos 13.5s
-    if duration >= 13:
-        print("SUCESSO: O delay parece estar funcionando.")
+    first = time.time() - start_time
+    print(f"Lote único: {first:.2f}s | Embeddings gerados: {len(embeddings)}")
+
+    # Segunda chamada logo em seguida: o bucket deve espaçar as requisições
+    start_time = time.time()
+    embedder([f"Texto 4 para teste ({run_id})"])
+    second = time.time() - start_time
+    print(f"Segunda requisição: {second:.2f}s")
+
+    interval = 60 / EMBEDDING_RPM
+    if len(embeddings) == len(texts) and second >= interval - 0.5:
+        print(f"SUCESSO: lote único e intervalo de ~{interval:.1f}s entre requisições.")
     else:
-        print("AVISO: Foi muito rápido. O rate limit pode não estar funcionando.")
+        print("AVISO: o rate limit pode não estar funcionando.")
 
 if __name__ == "__main__":
     test_rate_limit()